@@ -1,7 +1,7 @@
 from lib.rpi_drivers import GPIO
 import time
-import numpy as np
 from lib import LCD_Config
+from lib.lcd_frame_cache import LcdFrameCache
 
 
 class LCD(object):
@@ -11,6 +11,7 @@ class LCD(object):
         self.width = 240
         self.height = 240
         self.font_scale = 1.875
+        self._frame_cache = LcdFrameCache(self.width, self.height)
         #Initialize DC RST pin
         self._dc = LCD_Config.LCD_DC_PIN
         self._rst = LCD_Config.LCD_RST_PIN
@@ -119,6 +120,7 @@ class LCD(object):
 
     def LCD_Reset(self):
         """Reset the display"""
+        self._frame_cache.reset()
         GPIO.output(self._rst,GPIO.HIGH)
         time.sleep(0.01)
         GPIO.output(self._rst,GPIO.LOW)
@@ -150,16 +152,16 @@ class LCD(object):
         if imwidth != self.width or imheight != self.height:
             raise ValueError('Image must be same dimensions as display \
                 ({0}x{1}).' .format(self.width, self.height))
-        img = np.asarray(Image)
-        pix = np.empty((self.width, self.height, 2), dtype=np.uint8)
-        pix[..., 0] = (img[..., 0] & 0xF8) | (img[..., 1] >> 5)
-        pix[..., 1] = ((img[..., 1] << 3) & 0xE0) | (img[..., 2] >> 3)
-        self.LCD_SetWindows (0, 0, self.width, self.height)
-        GPIO.output(self._dc,GPIO.HIGH)
-        self._spi.writebytes2(pix.reshape(-1))
+        self._frame_cache.encode(Image)
+        # Only the windows that differ from the frame already on the panel go over SPI
+        for rect in self._frame_cache.dirty_rects():
+            self.LCD_SetWindows(*rect)
+            GPIO.output(self._dc,GPIO.HIGH)
+            self._spi.writebytes2(self._frame_cache.window(rect))
         
     def LCD_Clear(self):
         """Clear contents of image buffer"""
+        self._frame_cache.reset()
         _buffer = [0xff]*(self.width * self.height * 2)
         self.LCD_SetWindows (0, 0, self.width, self.height)
         GPIO.output(self._dc,GPIO.HIGH)
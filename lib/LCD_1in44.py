@@ -27,7 +27,7 @@
 
 from lib import LCD_Config
 from lib.rpi_drivers import GPIO
-import numpy as np
+from lib.lcd_frame_cache import LcdFrameCache
 
 LCD_1IN44 = 1
 LCD_1IN8 = 0
@@ -65,9 +65,11 @@ class LCD:
 		self.LCD_X_Adjust = LCD_X
 		self.LCD_Y_Adjust = LCD_Y
 		self.font_scale = 1
+		self._frame_cache = LcdFrameCache(self.width, self.height)
 
 	"""    Hardware reset     """
 	def  LCD_Reset(self):
+		self._frame_cache.reset()
 		GPIO.output(LCD_Config.LCD_RST_PIN, GPIO.HIGH)
 		LCD_Config.Driver_Delay_ms(100)
 		GPIO.output(LCD_Config.LCD_RST_PIN, GPIO.LOW)
@@ -290,6 +292,7 @@ class LCD:
 
 	def LCD_Clear(self):
 		#hello
+		self._frame_cache.reset()
 		_buffer = [0xff]*(self.width * self.height * 2)
 		self.LCD_SetWindows(0, 0, self.width, self.height)
 		GPIO.output(LCD_Config.LCD_DC_PIN, GPIO.HIGH)
@@ -303,10 +306,9 @@ class LCD:
 		if imwidth != self.width or imheight != self.height:
 			raise ValueError('Image must be same dimensions as display \
 				({0}x{1}).' .format(self.width, self.height))
-		img = np.asarray(Image)
-		pix = np.empty((self.width, self.height, 2), dtype=np.uint8)
-		pix[..., 0] = (img[..., 0] & 0xF8) | (img[..., 1] >> 5)
-		pix[..., 1] = ((img[..., 1] << 3) & 0xE0) | (img[..., 2] >> 3)
-		self.LCD_SetWindows(0, 0, self.width , self.height)
-		GPIO.output(LCD_Config.LCD_DC_PIN, GPIO.HIGH)
-		LCD_Config.SPI_Write_Buffer(pix.reshape(-1))
+		self._frame_cache.encode(Image)
+		#Only the windows that differ from the frame already on the panel go over SPI
+		for rect in self._frame_cache.dirty_rects():
+			self.LCD_SetWindows(*rect)
+			GPIO.output(LCD_Config.LCD_DC_PIN, GPIO.HIGH)
+			LCD_Config.SPI_Write_Buffer(self._frame_cache.window(rect))
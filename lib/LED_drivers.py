@@ -17,6 +17,11 @@ class PixelStrip_Emu():
         if 0 < pos < self.leds:
             self.led_state[pos] = color
 
+    def set_pixels(self, positions, colors):
+        led_state = self.led_state
+        for pos, color in zip(positions, colors):
+            led_state[pos] = color
+
     def getPixels(self):
         return self.led_state
 
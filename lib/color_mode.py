@@ -34,8 +34,14 @@ class ColorMode(object):
 
         return super(ColorMode, cls).__new__(new_cls)
 
+    # NoteOn colors do not depend on when a note is played, so a song's colors can be
+    # computed up front (see lib.led_timeline)
+    bakeable = True
+
     def __init__(self, name, ledsettings):
-        self.LoadSettings(ledsettings)
+        # Load from one consistent copy of the LED settings, not the object the web interface writes to
+        snapshot = getattr(ledsettings, "snapshot", None)
+        self.LoadSettings(snapshot() if callable(snapshot) else ledsettings)
 
     def LoadSettings(self, ledsettings):
         """Called whenever settings change"""
@@ -181,6 +187,10 @@ class Multicolor(ColorMode):
         self._right_neighbors = tuple(right_neighbors)
 
 class Rainbow(ColorMode):
+    @property
+    def bakeable(self):
+        return self.timeshift == 0
+
     def LoadSettings(self, ledsettings):
         self.offset = int(ledsettings.rainbow_offset)
         self.scale = int(ledsettings.rainbow_scale)
@@ -207,6 +217,8 @@ class Rainbow(ColorMode):
 
 
 class SpeedColor(ColorMode):
+    bakeable = False
+
     def LoadSettings(self, ledsettings):
         self.notes_in_last_period = []
         self.speed_slowest = ledsettings.speed_slowest
@@ -244,14 +256,15 @@ class SpeedColor(ColorMode):
 
 class Gradient(ColorMode):
     def LoadSettings(self, ledsettings):
-        self.led_number = int(ledsettings.usersettings.get_setting_value("led_count"))
-        self.gradient_start = {"red": int(ledsettings.usersettings.get_setting_value("gradient_start_red")),
-                               "green": int(ledsettings.usersettings.get_setting_value("gradient_start_green")),
-                               "blue": int(ledsettings.usersettings.get_setting_value("gradient_start_blue"))}
-
-        self.gradient_end = {"red": int(ledsettings.usersettings.get_setting_value("gradient_end_red")),
-                             "green": int(ledsettings.usersettings.get_setting_value("gradient_end_green")),
-                             "blue": int(ledsettings.usersettings.get_setting_value("gradient_end_blue"))}
+        settings = ledsettings.usersettings.snapshot()
+        self.led_number = settings["led_count"]
+        self.gradient_start = {"red": settings["gradient_start_red"],
+                               "green": settings["gradient_start_green"],
+                               "blue": settings["gradient_start_blue"]}
+
+        self.gradient_end = {"red": settings["gradient_end_red"],
+                             "green": settings["gradient_end_green"],
+                             "blue": settings["gradient_end_blue"]}
 
     def NoteOn(self, midi_event: mido.Message, midi_time, midi_state, note_position):
         return self.gradient_get_colors(note_position)
@@ -0,0 +1,155 @@
+import os
+import struct
+import threading
+from array import array
+from functools import cached_property
+from pathlib import Path
+
+import mido
+
+from lib.log_setup import logger
+from lib.midi_event import PackedMidiEvent
+from lib.song_file_security import resolve_song_compiled_cache_path
+
+
+CACHE_MAGIC = b"PLVSONG1"
+# magic, source mtime_ns, source size, event count, data length, total delay (s)
+_HEADER = struct.Struct("=8sqqIId")
+
+
+class PackedMidiPlayback:
+    """
+    Compiled song kept as packed arrays instead of one dict and message copy per event.
+
+    ``due_us[i]`` is the event's offset from the song start and its raw MIDI bytes are
+    ``data[offsets[i]:offsets[i + 1]]``. ``events`` and ``local_messages`` provide the
+    ``CompiledMidiPlayback`` interface and are only built when first used.
+    """
+
+    def __init__(self, due_us, offsets, data, total_delay_s):
+        self.due_us = due_us
+        self.offsets = offsets
+        self.data = data
+        self.total_delay_s = total_delay_s
+
+    @classmethod
+    def from_midi_file(cls, mid):
+        due_us = array("q")
+        offsets = array("I", [0])
+        data = bytearray()
+        total_delay = 0.0
+        for message in mid:
+            total_delay += float(getattr(message, "time", 0.0) or 0.0)
+            if getattr(message, "is_meta", False):
+                continue
+            raw = message.bytes()
+            if not raw:
+                continue
+            due_us.append(int(round(total_delay * 1_000_000)))
+            data.extend(raw)
+            offsets.append(len(data))
+        return cls(due_us, offsets, bytes(data), total_delay)
+
+    @property
+    def total(self):
+        return len(self.due_us)
+
+    def event_bytes(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]]
+
+    @cached_property
+    def events(self):
+        due_us = self.due_us
+        return [{"seq": seq, "dueUs": due_us[seq], "data": list(self.event_bytes(seq))} for seq in range(self.total)]
+
+    @cached_property
+    def local_messages(self):
+        messages = []
+        for index, due_us in enumerate(self.due_us):
+            raw = self.event_bytes(index)
+            if raw[0] < 0xF0:
+                message = PackedMidiEvent(raw[0], raw[1] if len(raw) > 1 else 0, raw[2] if len(raw) > 2 else 0,
+                                          0.0, "midifile")
+            else:
+                message = mido.Message.from_bytes(raw)
+            messages.append((due_us, message))
+        return messages
+
+    def to_bytes(self, mtime_ns, size):
+        header = _HEADER.pack(CACHE_MAGIC, mtime_ns, size, self.total, len(self.data), self.total_delay_s)
+        return b"".join((header, self.due_us.tobytes(), self.offsets.tobytes(), self.data))
+
+    @classmethod
+    def from_bytes(cls, blob, mtime_ns, size):
+        """Decode a cache blob; returns None if it is corrupt or was compiled from a different file version."""
+        if len(blob) < _HEADER.size:
+            return None
+        magic, cached_mtime_ns, cached_size, count, data_len, total_delay_s = _HEADER.unpack_from(blob)
+        if magic != CACHE_MAGIC or cached_mtime_ns != mtime_ns or cached_size != size:
+            return None
+        due_us = array("q")
+        offsets = array("I")
+        due_end = _HEADER.size + count * due_us.itemsize
+        offsets_end = due_end + (count + 1) * offsets.itemsize
+        if len(blob) != offsets_end + data_len:
+            return None
+        view = memoryview(blob)
+        due_us.frombytes(view[_HEADER.size:due_end])
+        offsets.frombytes(view[due_end:offsets_end])
+        return cls(due_us, offsets, bytes(view[offsets_end:]), total_delay_s)
+
+
+def load_compiled_song(song_name, base_dir="Songs"):
+    """
+    Compiled playback for ``base_dir/song_name``, read from ``base_dir/cache`` when it
+    matches the song's mtime and size, otherwise compiled and written back.
+    """
+    song_path = Path(base_dir) / song_name
+    try:
+        stat = song_path.stat()
+    except OSError:
+        # Let mido report the missing file; there is nothing to key a cache entry on
+        stat = None
+
+    cache_path = None
+    if stat is not None:
+        try:
+            cache_path = resolve_song_compiled_cache_path(song_name, base_dir=base_dir)
+            compiled = PackedMidiPlayback.from_bytes(cache_path.read_bytes(), stat.st_mtime_ns, stat.st_size)
+            if compiled is not None:
+                return compiled
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring compiled song cache for {song_name}: {e}")
+
+    compiled = PackedMidiPlayback.from_midi_file(mido.MidiFile(str(song_path)))
+    if cache_path is not None:
+        _write_cache(cache_path, compiled.to_bytes(stat.st_mtime_ns, stat.st_size))
+    return compiled
+
+
+def _write_cache(cache_path, blob):
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_name(cache_path.name + ".tmp")
+        temp_path.write_bytes(blob)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write compiled song cache {cache_path}: {e}")
+
+
+def precompile_song_in_background(song_name, base_dir="Songs"):
+    """Fill the compiled cache for a newly uploaded song so its first playback starts without parsing."""
+    if Path(song_name).suffix.lower() != ".mid":
+        return None
+
+    def precompile():
+        try:
+            load_compiled_song(song_name, base_dir=base_dir)
+        except Exception as e:
+            logger.warning(f"Precompiling {song_name} failed: {e}")
+
+    thread = threading.Thread(target=precompile, name="song-precompile", daemon=True)
+    thread.start()
+    return thread
@@ -65,6 +65,7 @@ class ComponentInitializer:
             self.ledstrip,
         )
         self.saving.playback_scheduler = self.playback_scheduler
+        self.playback_scheduler.start_reliable_health_probe()
         self.setup_components()
 
     def setup_components(self):
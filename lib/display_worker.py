@@ -0,0 +1,60 @@
+import threading
+import time
+
+from lib.log_setup import logger
+
+
+class DisplayWorker:
+    """
+    Renders the LCD on a dedicated thread.
+
+    ``request()`` only flags that the menu state changed. Requests made while a
+    render is pending or running coalesce into a single follow-up render (latest
+    wins), so bursts of refreshes never queue up SPI transfers and callers never
+    block on the display.
+    """
+
+    def __init__(self, render, name="lcd-display", runtime_diagnostics=None):
+        self._render = render
+        self._name = name
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.runtime_diagnostics = runtime_diagnostics
+        self.requests = 0
+        self.renders = 0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request(self):
+        self.requests += 1
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            if self._stop.is_set():
+                return
+            # Clear before rendering so requests arriving mid-render trigger exactly one more pass.
+            self._wake.clear()
+            started = time.perf_counter()
+            try:
+                self._render()
+            except Exception as e:
+                logger.warning(f"[display worker] Unexpected exception occurred: {e}")
+            self.renders += 1
+            if self.runtime_diagnostics is not None:
+                self.runtime_diagnostics.record_duration("display_render", time.perf_counter() - started)
+                self.runtime_diagnostics.set_gauge("display_requests_coalesced_total", self.requests - self.renders)
@@ -0,0 +1,75 @@
+import time
+
+
+class FrameScheduler:
+    """
+    Deadline-based fixed-rate tick for the LED render loop.
+
+    Deadlines advance by exactly one frame period from the previous deadline, not
+    from when the frame finished, so the average rate does not drift with render
+    time. When a frame overruns so badly that deadlines were missed the schedule
+    skips ahead instead of bursting to catch up.
+    """
+
+    def __init__(self, fps=120, clock=time.perf_counter):
+        self.clock = clock
+        self.fps = None
+        self.period = None
+        self.next_deadline = None
+        self.frames = 0
+        self.overruns = 0
+        self.dropped_frames = 0
+        self.last_frame_ms = 0.0
+        self.set_fps(fps)
+
+    def set_fps(self, fps):
+        fps = max(1.0, float(fps))
+        if fps != self.fps:
+            if self.next_deadline is not None and self.period is not None and fps > self.fps:
+                # Speeding up (e.g. first note after idle): the pending deadline was one slow
+                # period after the last one; move it to one new period after instead.
+                self.next_deadline -= self.period - 1.0 / fps
+            self.fps = fps
+            self.period = 1.0 / fps
+
+    def is_due(self, now=None):
+        if self.next_deadline is None:
+            return True
+        if now is None:
+            now = self.clock()
+        return now >= self.next_deadline
+
+    def time_until_next(self, now=None):
+        if self.next_deadline is None:
+            return 0.0
+        if now is None:
+            now = self.clock()
+        return max(0.0, self.next_deadline - now)
+
+    def frame_done(self, started, finished=None):
+        """Record a rendered frame and schedule the next deadline."""
+        if finished is None:
+            finished = self.clock()
+        elapsed = max(0.0, finished - started)
+        self.frames += 1
+        self.last_frame_ms = elapsed * 1000.0
+        if elapsed > self.period:
+            self.overruns += 1
+
+        if self.next_deadline is None:
+            self.next_deadline = started
+        self.next_deadline += self.period
+        if finished >= self.next_deadline:
+            missed = int((finished - self.next_deadline) / self.period) + 1
+            self.dropped_frames += missed
+            self.next_deadline += missed * self.period
+
+    def stats(self):
+        return {
+            "target_fps": self.fps,
+            "frame_budget_ms": round(self.period * 1000.0, 4),
+            "frames": self.frames,
+            "overruns": self.overruns,
+            "dropped_frames": self.dropped_frames,
+            "last_frame_ms": round(self.last_frame_ms, 4),
+        }
@@ -612,6 +612,10 @@ def clear_ledstrip_state(ledstrip, *, show=True):
         strip.show()
 
     # Reset internal note tracking so fade logic cannot relight pixels.
+    reset_key_state = getattr(ledstrip, "reset_key_state", None)
+    if callable(reset_key_state):
+        reset_key_state()
+        return
     ledstrip.keylist = [0] * ledstrip.led_number
     ledstrip.keylist_status = [0] * ledstrip.led_number
     ledstrip.keylist_sustained = [0] * ledstrip.led_number
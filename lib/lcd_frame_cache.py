@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class LcdFrameCache:
+    """
+    Last frame handed to an LCD, kept as RGB888 and as the panel's RGB565 bytes.
+
+    ``encode()`` compares the new image against the previous one row by row and only
+    re-encodes rows that changed, so redraws that touch a few menu rows do not pay for
+    converting the whole screen again. ``dirty_rects()`` then describes the windows
+    that actually need to go over SPI.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.rgb = None
+        self.pix = np.empty((height, width, 2), dtype=np.uint8)
+        self.changed_rows = np.arange(height)
+        self.changed_mask = None
+
+    def reset(self):
+        """Forget the cached frame, e.g. after the panel was cleared or re-initialised."""
+        self.rgb = None
+
+    def encode(self, image):
+        """Return the RGB565 buffer (height x width x 2) for a PIL RGB image."""
+        img = np.asarray(image)
+        if img.shape[:2] != self.pix.shape[:2]:
+            # The panel's scan direction can swap width and height after construction
+            self.height, self.width = img.shape[:2]
+            self.pix = np.empty((self.height, self.width, 2), dtype=np.uint8)
+            self.rgb = None
+        if self.rgb is None or self.rgb.shape != img.shape:
+            rows = np.arange(self.height)
+            self.changed_mask = None
+        else:
+            self.changed_mask = (img != self.rgb).any(axis=2)
+            rows = np.flatnonzero(self.changed_mask.any(axis=1))
+        if rows.size:
+            src = img[rows]
+            self.pix[rows, :, 0] = (src[..., 0] & 0xF8) | (src[..., 1] >> 5)
+            self.pix[rows, :, 1] = ((src[..., 1] << 3) & 0xE0) | (src[..., 2] >> 3)
+            self.rgb = img
+        self.changed_rows = rows
+        return self.pix
+
+    def dirty_rects(self, merge_gap=4, full_frame_ratio=0.75):
+        """
+        Windows ``(x0, y0, x1, y1)`` (end-exclusive) covering what changed in the last ``encode()``.
+
+        Changed rows closer than ``merge_gap`` rows share a window, since every window costs a
+        register sequence. When the windows would cover most of the screen a single full-frame
+        window is returned instead. An unchanged frame yields no windows.
+        """
+        rows = self.changed_rows
+        if not rows.size:
+            return []
+        full = [(0, 0, self.width, self.height)]
+        if self.changed_mask is None:
+            return full
+
+        breaks = np.flatnonzero(np.diff(rows) > merge_gap)
+        starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+        ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+        rects = []
+        area = 0
+        for y0, y1 in zip(starts.tolist(), ends.tolist()):
+            cols = np.flatnonzero(self.changed_mask[y0:y1].any(axis=0))
+            x0, x1 = int(cols[0]), int(cols[-1]) + 1
+            rects.append((x0, y0, x1, y1))
+            area += (x1 - x0) * (y1 - y0)
+        if area >= full_frame_ratio * self.width * self.height:
+            return full
+        return rects
+
+    def window(self, rect):
+        """Contiguous RGB565 bytes for ``rect`` in panel write order."""
+        x0, y0, x1, y1 = rect
+        if (x0, y0, x1, y1) == (0, 0, self.width, self.height):
+            return self.pix.reshape(-1)
+        return np.ascontiguousarray(self.pix[y0:y1, x0:x1]).reshape(-1)
@@ -1,7 +1,57 @@
 import math
 import time
+
+import numpy as np
 from rpi_ws281x import Color
 
+from lib.light_modes import compile_light_mode
+
+
+def decay_key_state(keylist, keylist_status, keylist_sustained, colors, mode, decrease_amount,
+                    sustain_held, backlight_color):
+    """
+    Vectorized fade/velocity/pedal step over array-backed key state.
+
+    Mirrors the per-LED rules of ``process_fade_effects`` for every lit LED at
+    once: scales ``colors`` (float array [N, 3], modified in place) by the
+    remaining strength, decrements ``keylist`` in place, applies the pedal
+    hold/release rules and falls back to ``backlight_color`` for LEDs that
+    reached zero (pass ``None`` to leave them black).
+
+    Returns ``(dirty, fading)``: a boolean mask of LEDs whose pixel must be
+    rewritten and the per-LED brightness factor used for adjacent LEDs.
+    """
+    active = keylist > 0
+    strength = keylist.copy()
+    fading = np.ones(keylist.shape[0], dtype=np.float64)
+
+    if mode == "Fading":
+        decaying = active & (keylist_status == 0)
+    else:
+        decaying = active
+
+    fading[decaying] = strength[decaying] / 100.0 / 10
+    colors[decaying] = np.trunc(colors[decaying] * fading[decaying, None])
+    keylist[decaying] = np.maximum(0, strength[decaying] - decrease_amount)
+    dirty = decaying.copy()
+
+    if mode != "Fading":
+        released = active & (keylist_status == 0) & (keylist_sustained == 0)
+        if sustain_held:
+            # Keep the lights on when the pedal is pressed and key was released
+            keylist[released] = 1000
+        else:
+            keylist[released] = 0
+            colors[released] = 0
+        dirty |= released
+
+    if backlight_color is not None:
+        idle = active & (keylist <= 0)
+        colors[idle] = backlight_color
+        dirty |= idle
+
+    return dirty, fading
+
 
 class LEDEffectsProcessor:
     def __init__(self, ledstrip, ledsettings, menu, color_mode, last_sustain, pedal_deadzone, runtime_diagnostics=None):
@@ -12,6 +62,8 @@ class LEDEffectsProcessor:
         self.last_sustain = last_sustain
         self.pedal_deadzone = pedal_deadzone
         self.runtime_diagnostics = runtime_diagnostics
+        # Replaced by the visualizer whenever the LED settings change
+        self.light_mode = compile_light_mode(ledsettings)
         self._pulse_rgb = [[0.0, 0.0, 0.0] for _ in range(ledstrip.led_number)]
         self._pulse_seen = [False] * ledstrip.led_number
         self._pulse_touched = []
@@ -20,90 +72,86 @@ class LEDEffectsProcessor:
         any_led_changed = False
         active_leds = 0
         ledstrip = self.ledstrip
-        ledsettings = self.ledsettings
         keylist = ledstrip.keylist
         keylist_status = ledstrip.keylist_status
         keylist_sustained = ledstrip.keylist_sustained
         keylist_color = ledstrip.keylist_color
-        mode = ledsettings.mode
+        light_mode = self.light_mode
+        decays = light_mode.decays
+        decays_while_held = light_mode.decays_while_held
+        holds_sustain = light_mode.holds_sustain
+        draws_adjacent = light_mode.draws_adjacent
+        speed = light_mode.decay_speed
+        backlight_color = light_mode.backlight_rgb
         color_update = self.color_mode.ColorUpdate
         set_pixel_color = ledstrip.strip.setPixelColor
         set_adjacent_colors = ledstrip.set_adjacent_colors
         screensaver_is_running = self.menu.screensaver_is_running
         sustain_value = getattr(ledstrip, "sustain_value", self.last_sustain)
-        backlight_color = None
-
-        if mode == "Fading":
-            speed = ledsettings.fadingspeed
-        elif mode == "Velocity":
-            speed = ledsettings.velocity_speed
-        elif mode == "Pedal":
-            speed = ledsettings.pedal_speed
+
+        if decays and isinstance(keylist, np.ndarray):
+            any_led_changed, active_leds = self._process_decay_vectorized(
+                event_loop_time, light_mode, sustain_value, screensaver_is_running)
         else:
-            speed = ledsettings.fadingspeed
-
-        def get_backlight_color():
-            nonlocal backlight_color
-            if backlight_color is None:
-                backlight_level = float(ledsettings.backlight_brightness_percent) / 100
-                backlight_color = (
-                    int(ledsettings.get_backlight_color("Red")) * backlight_level,
-                    int(ledsettings.get_backlight_color("Green")) * backlight_level,
-                    int(ledsettings.get_backlight_color("Blue")) * backlight_level,
-                )
-            return backlight_color
-
-        for n, strength in enumerate(keylist):
-            if strength <= 0:
-                continue
-            active_leds += 1
-
-            red, green, blue = keylist_color[n]
-
-            led_changed = False
-            new_color = color_update(None, n, (red, green, blue))
-            if new_color is not None:
-                red, green, blue = new_color
-                led_changed = True
+            active_keys = getattr(ledstrip, "active_keys", None)
+            if active_keys is None:
+                candidates = enumerate(keylist)
+            else:
+                candidates = [(n, keylist[n]) for n in sorted(active_keys)]
+            for n, strength in candidates:
+                if strength <= 0:
+                    continue
+                active_leds += 1
 
-            fading = 1
+                red, green, blue = keylist_color[n]
 
-            if mode == "Velocity" or mode == "Pedal" or (
-                    mode == "Fading" and keylist_status[n] == 0):
-                fading = (strength / float(100)) / 10
-                red = int(red * fading)
-                green = int(green * fading)
-                blue = int(blue * fading)
+                led_changed = False
+                new_color = color_update(None, n, (red, green, blue))
+                if new_color is not None:
+                    red, green, blue = new_color
+                    led_changed = True
 
-                decrease_amount = int((event_loop_time / float(speed / 1000)) * 1000)
-                keylist[n] = max(0, keylist[n] - decrease_amount)
-                led_changed = True
+                fading = 1
 
-            if mode == "Velocity" or mode == "Pedal":
-                # Check if key is pressed or sustained
-                key_active = keylist_status[n] == 1 or keylist_sustained[n] == 1
-                
-                if int(sustain_value) >= self.pedal_deadzone and not key_active:
-                    # Keep the lights on when the pedal is pressed and key was released
-                    keylist[n] = 1000
+                if decays and (decays_while_held or keylist_status[n] == 0):
+                    fading = (strength / float(100)) / 10
+                    red = int(red * fading)
+                    green = int(green * fading)
+                    blue = int(blue * fading)
+
+                    decrease_amount = int((event_loop_time / float(speed / 1000)) * 1000)
+                    keylist[n] = max(0, keylist[n] - decrease_amount)
                     led_changed = True
-                elif int(sustain_value) < self.pedal_deadzone and keylist_status[n] == 0 and keylist_sustained[n] == 0:
-                    # Turn off if pedal is not pressed and key is not active or sustained
-                    keylist[n] = 0
-                    red, green, blue = (0, 0, 0)
+
+                if holds_sustain:
+                    # Check if key is pressed or sustained
+                    key_active = keylist_status[n] == 1 or keylist_sustained[n] == 1
+                
+                    if int(sustain_value) >= self.pedal_deadzone and not key_active:
+                        # Keep the lights on when the pedal is pressed and key was released
+                        keylist[n] = 1000
+                        led_changed = True
+                    elif int(sustain_value) < self.pedal_deadzone and keylist_status[n] == 0 and keylist_sustained[n] == 0:
+                        # Turn off if pedal is not pressed and key is not active or sustained
+                        keylist[n] = 0
+                        red, green, blue = (0, 0, 0)
+                        led_changed = True
+
+                if keylist[n] <= 0 and screensaver_is_running is not True:
+                    red, green, blue = backlight_color
                     led_changed = True
 
-            if keylist[n] <= 0 and screensaver_is_running is not True:
-                red, green, blue = get_backlight_color()
-                led_changed = True
+                if led_changed:
+                    color = Color(int(red), int(green), int(blue))
+                    set_pixel_color(n, color)
+                    if draws_adjacent:
+                        set_adjacent_colors(n, color, False, fading)
+                    any_led_changed = True
 
-            if led_changed:
-                color = Color(int(red), int(green), int(blue))
-                set_pixel_color(n, color)
-                set_adjacent_colors(n, color, False, fading)
-                any_led_changed = True
-        
-        if mode == "Pulse":
+            if active_keys is not None:
+                active_keys.difference_update([n for n, _ in candidates if keylist[n] <= 0])
+
+        if light_mode.pulses:
             if self.process_pulse_effects():
                 any_led_changed = True
 
@@ -113,6 +161,68 @@ class LEDEffectsProcessor:
 
         return any_led_changed
 
+    def _process_decay_vectorized(self, event_loop_time, light_mode, sustain_value, screensaver_is_running):
+        ledstrip = self.ledstrip
+        keylist = ledstrip.keylist
+        active_keys = getattr(ledstrip, "active_keys", None)
+        if active_keys is None:
+            active = np.flatnonzero(keylist > 0)
+        else:
+            active = np.fromiter(sorted(active_keys), dtype=np.intp, count=len(active_keys))
+        if not active.size:
+            return False, 0
+
+        # Work on the lit subset only so the cost follows the number of lit keys, not the strip length.
+        strengths = keylist[active]
+        colors = np.array(ledstrip.keylist_color[active], dtype=np.float64)
+        color_update = self.color_mode.ColorUpdate
+        color_updated = np.zeros(active.size, dtype=bool)
+        for i, n in enumerate(active.tolist()):
+            new_color = color_update(None, n, tuple(colors[i]))
+            if new_color is not None:
+                colors[i] = new_color
+                color_updated[i] = True
+
+        decrease_amount = int((event_loop_time / float(light_mode.decay_speed / 1000)) * 1000)
+        dirty, fading = decay_key_state(
+            strengths,
+            ledstrip.keylist_status[active],
+            ledstrip.keylist_sustained[active],
+            colors,
+            light_mode.name,
+            decrease_amount,
+            int(sustain_value) >= self.pedal_deadzone,
+            None if screensaver_is_running is True else light_mode.backlight_rgb,
+        )
+        keylist[active] = strengths
+        if active_keys is not None:
+            active_keys.difference_update(active[strengths <= 0].tolist())
+
+        dirty |= color_updated
+        if not dirty.any():
+            return False, int(active.size)
+
+        changed = active[dirty]
+        rgb = colors[dirty].astype(np.uint32)
+        fading = fading[dirty]
+        packed = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        strip = ledstrip.strip
+        set_adjacent_colors = ledstrip.set_adjacent_colors
+        if hasattr(strip, "set_pixels"):
+            strip.set_pixels(changed, packed)
+            if light_mode.draws_adjacent:
+                for n, color, led_fading in zip(changed.tolist(), packed.tolist(), fading.tolist()):
+                    set_adjacent_colors(n, color, False, led_fading)
+        else:
+            set_pixel_color = strip.setPixelColor
+            for n, (red, green, blue), led_fading in zip(changed.tolist(), rgb.tolist(), fading.tolist()):
+                color = Color(red, green, blue)
+                set_pixel_color(n, color)
+                if light_mode.draws_adjacent:
+                    set_adjacent_colors(n, color, False, led_fading)
+
+        return True, int(active.size)
+
     def process_pulse_effects(self):
         if not self.ledstrip.active_pulses:
             return False
@@ -130,16 +240,15 @@ class LEDEffectsProcessor:
                 touched_leds.append(index)
             return pulse_rgb[index]
         
-        max_dist = self.ledsettings.pulse_animation_distance
-        duration = self.ledsettings.pulse_animation_speed / 1000.0
-        flicker_strength = self.ledsettings.pulse_flicker_strength / 100.0
+        light_mode = self.light_mode
+        max_dist = light_mode.pulse_distance
+        duration = light_mode.pulse_duration_s
+        flicker_strength = light_mode.flicker_strength
+        flicker_speed = light_mode.flicker_speed
         
         # Base background color (backlight) to blend on top of
         if not self.menu.screensaver_is_running:
-            backlight_level = float(self.ledsettings.backlight_brightness_percent) / 100
-            br = int(self.ledsettings.get_backlight_color("Red")) * backlight_level
-            bg = int(self.ledsettings.get_backlight_color("Green")) * backlight_level
-            bb = int(self.ledsettings.get_backlight_color("Blue")) * backlight_level
+            br, bg, bb = light_mode.backlight_rgb
         else:
             br, bg, bb = 0, 0, 0
 
@@ -187,7 +296,7 @@ class LEDEffectsProcessor:
             if attack_progress >= 1.0 and state != "release":
                 # Sustain phase - apply flicker
                 # Simple sine wave flicker
-                v_val = (math.sin(current_time * self.ledsettings.pulse_flicker_speed) + 1) / 2  # 0 to 1
+                v_val = (math.sin(current_time * flicker_speed) + 1) / 2  # 0 to 1
                 # Modulate intensity down by strength
                 current_intensity = velocity * (1.0 - (flicker_strength * v_val))
                 
@@ -0,0 +1,113 @@
+import numpy as np
+
+from lib.rpi_drivers import ws
+
+
+class LedFrameBuffer:
+    """
+    Contiguous frame buffer sitting in front of an LED driver.
+
+    Producers write packed 24-bit colors (the same ints ``Color()`` returns) into
+    a ``uint32`` array instead of calling into the driver per pixel. ``show()``
+    pushes the pixels that changed since the previous flush to the driver in a
+    single pass and then renders; when the frame is byte-identical to the last
+    pushed one the render (and its DMA transfer) is skipped entirely. Anything
+    else is forwarded to the driver.
+    """
+
+    def __init__(self, driver, led_count=None):
+        self.driver = driver
+        if led_count is None:
+            led_count = driver.numPixels()
+        self.led_count = int(led_count)
+        self.pixels = np.zeros(self.led_count, dtype=np.uint32)
+        self._pushed = np.zeros(self.led_count, dtype=np.uint32)
+        self.last_changed = np.zeros(0, dtype=np.intp)
+        self.skipped_shows = 0
+        self._render_pending = True
+        self._driver_write = self._resolve_driver_writer(driver)
+
+    def __getattr__(self, name):
+        if name == "driver":
+            raise AttributeError(name)
+        return getattr(self.driver, name)
+
+    @staticmethod
+    def _resolve_driver_writer(driver):
+        """Pick the cheapest way to hand a batch of pixels to the driver."""
+        set_pixels = getattr(driver, "set_pixels", None)
+        if callable(set_pixels):
+            return set_pixels
+
+        channel = getattr(driver, "_channel", None)
+        led_set = getattr(ws, "ws2811_led_set", None)
+        if channel is not None and led_set is not None:
+            # Bypass PixelStrip.setPixelColor -> _LED_Data.__setitem__ and talk to the C channel directly.
+            def write(indices, colors):
+                for index, color in zip(indices, colors):
+                    led_set(channel, index, color)
+            return write
+
+        set_pixel_color = driver.setPixelColor
+
+        def write(indices, colors):
+            for index, color in zip(indices, colors):
+                set_pixel_color(index, color)
+        return write
+
+    def numPixels(self):
+        return self.led_count
+
+    def setPixelColor(self, n, color):
+        if 0 <= n < self.led_count:
+            self.pixels[n] = color
+
+    def setPixelColorRGB(self, n, red, green, blue, white=0):
+        self.setPixelColor(n, (white << 24) | (red << 16) | (green << 8) | blue)
+
+    def set_pixels(self, indices, colors):
+        """Vectorized write of packed colors (scalar or array) at the given indices."""
+        self.pixels[indices] = colors
+
+    def fill(self, color):
+        self.pixels.fill(color)
+
+    def getPixelColor(self, n):
+        return int(self.pixels[n])
+
+    def getPixels(self):
+        return self.pixels.tolist()
+
+    def setBrightness(self, brightness):
+        self.driver.setBrightness(brightness)
+        self.request_render()
+
+    def flush(self):
+        """Copy changed pixels to the driver without rendering. Returns the number of pixels written."""
+        # self._pushed mirrors the last frame handed to the driver, so this diff is the
+        # per-frame changed-pixel set and an empty diff means the frame is byte-identical.
+        changed = np.flatnonzero(self.pixels != self._pushed)
+        if not changed.size:
+            return 0
+        colors = self.pixels[changed]
+        self._driver_write(changed.tolist(), colors.tolist())
+        self._pushed[changed] = colors
+        self.last_changed = changed
+        self._render_pending = True
+        return int(changed.size)
+
+    def invalidate(self):
+        """Force the next flush to rewrite every pixel, e.g. after the driver was touched directly."""
+        self._pushed = ~self.pixels
+
+    def request_render(self):
+        """Render on the next show() even if no pixel changed (brightness or gamma updates)."""
+        self._render_pending = True
+
+    def show(self):
+        self.flush()
+        if not self._render_pending:
+            self.skipped_shows += 1
+            return None
+        self._render_pending = False
+        return self.driver.show()
@@ -0,0 +1,100 @@
+import bisect
+
+from lib.color_mode import ColorMode
+from lib.functions import get_note_position
+
+
+TIMELINE_NOTE_ON = 0
+TIMELINE_NOTE_OFF = 1
+TIMELINE_CONTROL_CHANGE = 2
+
+
+class LedTimeline:
+    """
+    File playback pre-rendered for the LED strip at play start.
+
+    ``entries`` are ``(due_s, kind, message, note_position, color)`` tuples sorted by song
+    time: note-ons carry the position and ``ColorMode`` color they would get live,
+    note-offs their position, and control changes only the message. Once the scheduler
+    sets ``start_perf``, the render thread applies ``take_due(now)`` each pass instead of
+    draining every note through the file queue.
+    """
+
+    def __init__(self, entries, duration_s):
+        self.entries = entries
+        self.due_s = [entry[0] for entry in entries]
+        self.duration_s = duration_s
+        self.start_perf = None
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def finished(self):
+        return self.cursor >= len(self.entries)
+
+    def seconds_until_next(self, now):
+        """Seconds from ``now`` until the next entry is due (0 if overdue); None before start or once finished."""
+        start_perf = self.start_perf
+        cursor = self.cursor
+        if start_perf is None or cursor >= len(self.due_s):
+            return None
+        return max(0.0, start_perf + self.due_s[cursor] - now)
+
+    def take_due(self, now):
+        """Entries due by ``now`` (``time.perf_counter()``) that were not taken yet."""
+        start_perf = self.start_perf
+        if start_perf is None:
+            return ()
+        cursor = self.cursor
+        end = bisect.bisect_right(self.due_s, now - start_perf, cursor)
+        if end == cursor:
+            return ()
+        self.cursor = end
+        return self.entries[cursor:end]
+
+
+def is_bakeable(color_mode):
+    """True if ``color_mode`` gives the same colors when asked for a whole song up front."""
+    return getattr(color_mode, "bakeable", False) and type(color_mode).MidiEvent is ColorMode.MidiEvent
+
+
+def bake_led_timeline(compiled, ledstrip, ledsettings, should_process_locally=None):
+    """
+    Build the ``LedTimeline`` for ``compiled`` from the current LED settings.
+
+    Colors come from a fresh ``ColorMode``, not the visualizer's: in iteration mode the
+    Multicolor rotation starts at the first color for every baked song, where a live run
+    carries ``multicolor_index`` over from whatever was played before, and the
+    visualizer's color mode is left where it was. Returns None when the color mode
+    depends on when notes are played (Speed, time-shifted Rainbow).
+    """
+    snapshot = getattr(ledsettings, "snapshot", None)
+    if callable(snapshot):
+        ledsettings = snapshot()
+    color_mode = ColorMode(ledsettings.color_mode, ledsettings)
+    if not is_bakeable(color_mode):
+        return None
+
+    led_count = ledstrip.led_number
+    entries = []
+    for due_us, message in compiled.local_messages:
+        if should_process_locally is not None and not should_process_locally(message):
+            continue
+        due_s = due_us / 1_000_000.0
+        msg_type = message.type
+        if msg_type == "control_change":
+            entries.append((due_s, TIMELINE_CONTROL_CHANGE, message, None, None))
+            continue
+        if msg_type != "note_on" and msg_type != "note_off":
+            continue
+        note_position = get_note_position(message.note, ledstrip, ledsettings)
+        if not 0 <= note_position < led_count:
+            continue
+        if msg_type == "note_off" or message.velocity == 0:
+            entries.append((due_s, TIMELINE_NOTE_OFF, message, note_position, None))
+        else:
+            color = color_mode.NoteOn(message, due_s, None, note_position)
+            entries.append((due_s, TIMELINE_NOTE_ON, message, note_position, color))
+    return LedTimeline(entries, compiled.total_delay_s)
@@ -1,10 +1,25 @@
 import ast
+import itertools
 import time
+from types import MappingProxyType
 from xml.dom import minidom
 
 from lib.functions import fastColorWipe, find_between, clamp
 from lib.rpi_drivers import Color
 
+# Shared across instances (and with note_offsets_version) so a LedSettings rebuilt on settings
+# reset or reloaded in place never repeats a version
+_versions = itertools.count(1)
+
+
+def _frozen_setting(value):
+    """Read-only copy of a settings value: lists become tuples, dicts read-only mappings."""
+    if isinstance(value, list):
+        return tuple(_frozen_setting(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({key: _frozen_setting(item) for key, item in value.items()})
+    return value
+
 
 class LedSettings:
     def __init__(self, usersettings):
@@ -19,6 +34,38 @@ class LedSettings:
         self.usersettings = usersettings
         self._load_settings()
 
+    def __setattr__(self, name, value):
+        # Settings are assigned directly from the menu and web API; every assignment
+        # bumps ``version`` so hot-path readers know to re-derive their caches.
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, "version", next(_versions))
+
+    def _snapshot_key(self):
+        # The web API edits the color lists and dicts in place and records those edits only
+        # through usersettings, so its version is part of what a snapshot was taken at
+        return self.version, getattr(self.__dict__.get("usersettings"), "version", None)
+
+    def snapshot(self):
+        """
+        ``LedSettingsSnapshot`` of the current values; taken again only after a change.
+
+        The copy is retried until no change was recorded while it was being made, so it is
+        never torn by a web request; one landing just after moves a version again and is
+        picked up by the next call.
+        """
+        cached = self.__dict__.get("_snapshot")
+        if cached is not None and cached[0] == self._snapshot_key():
+            return cached[1]
+        while True:
+            key = self._snapshot_key()
+            values = {name: _frozen_setting(value) for name, value in list(self.__dict__.items())
+                      if name not in ("_snapshot", "version")}
+            if self._snapshot_key() == key:
+                break
+        snapshot = LedSettingsSnapshot(key[0], values)
+        object.__setattr__(self, "_snapshot", (key, snapshot))
+        return snapshot
+
     def _clean_colormap_value(self, value, default):
         """Trim whitespace and return a safe colormap name with fallback."""
         if value is None:
@@ -91,6 +138,9 @@ class LedSettings:
         self.skipped_notes = us.get_setting_value("skipped_notes")
 
         self.note_offsets = ast.literal_eval(us.get_setting_value("note_offsets"))
+        # Drawn anew on every note_offsets change (including this reload) so LedStrip knows to
+        # rebuild its note position table; never reused, unlike a per-object counter reset here
+        self.note_offsets_version = next(_versions)
 
         self.speed_period_in_seconds = 0.8
 
@@ -143,20 +193,24 @@ class LedSettings:
 
     def add_note_offset(self):
         self.note_offsets.insert(0, [100, 1])
+        self.note_offsets_version = next(_versions)
         self.usersettings.change_setting_value("note_offsets", self.note_offsets)
 
     def append_note_offset(self):
         self.note_offsets.append([1, 1])
+        self.note_offsets_version = next(_versions)
         self.usersettings.change_setting_value("note_offsets", self.note_offsets)
 
     def del_note_offset(self, slot):
         del self.note_offsets[int(slot) - 1]
+        self.note_offsets_version = next(_versions)
         self.usersettings.change_setting_value("note_offsets", self.note_offsets)
 
     def update_note_offset(self, slot, data):
         pair = data.split(",")
         self.note_offsets[int(slot) - 1][0] = int(pair[0])
         self.note_offsets[int(slot) - 1][1] = int(pair[1])
+        self.note_offsets_version = next(_versions)
         self.usersettings.change_setting_value("note_offsets", self.note_offsets)
 
     def update_note_offset_lcd(self, current_choice, currentlocation, value):
@@ -165,6 +219,7 @@ class LedSettings:
             self.note_offsets[slot][0] += value
         else:
             self.note_offsets[slot][1] += value
+        self.note_offsets_version = next(_versions)
         self.usersettings.change_setting_value("note_offsets", self.note_offsets)
 
     def addcolor(self):
@@ -660,3 +715,36 @@ class LedSettings:
         self.usersettings.change_setting_value("adjacent_green", self.adjacent_green)
         self.usersettings.change_setting_value("adjacent_blue", self.adjacent_blue)
         fastColorWipe(self.ledstrip.strip, True, self)
+
+
+class LedSettingsSnapshot:
+    """
+    Immutable copy of a ``LedSettings`` at one ``version``, as taken by ``LedSettings.snapshot()``.
+
+    Reads like the live object (attributes and the ``get_*color`` helpers), so light and
+    color modes can be built from it without seeing a web request's assignments land
+    half way through. Collaborators (``usersettings``, ``ledstrip``, ``menu``) are shared.
+    """
+
+    __slots__ = ("version", "_values")
+
+    def __init__(self, version, values):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "_values", values)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LedSettingsSnapshot is read-only")
+
+    # The live object's color lookups only read attributes, so they work on a snapshot too
+    get_color = LedSettings.get_color
+    get_colors = LedSettings.get_colors
+    get_backlight_color = LedSettings.get_backlight_color
+    get_backlight_colors = LedSettings.get_backlight_colors
+    get_adjacent_color = LedSettings.get_adjacent_color
+    get_adjacent_colors = LedSettings.get_adjacent_colors
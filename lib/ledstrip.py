@@ -1,7 +1,10 @@
+import numpy as np
+
 from lib.functions import *
 import lib.colormaps as cmap
 from lib.rpi_drivers import PixelStrip, ws
 from lib.LED_drivers import PixelStrip_Emu
+from lib.led_frame_buffer import LedFrameBuffer
 from lib.log_setup import logger
 
 class LedStrip:
@@ -15,8 +18,6 @@ class LedStrip:
         self.leds_per_meter = int(self.usersettings.get_setting_value("leds_per_meter"))
         self.shift = int(self.usersettings.get_setting_value("shift"))
         self.reverse = int(self.usersettings.get_setting_value("reverse"))
-        self._note_position_cache_key = None
-        self._note_position_cache = {}
 
         self.brightness = 255 * self.brightness_percent / 100
         self.led_gamma = float(usersettings.get_setting_value("led_gamma"))
@@ -50,61 +51,96 @@ class LedStrip:
         self.init_strip()
 
     def init_strip(self):
-        self.keylist = [0] * self.led_number
-        self.keylist_status = [0] * self.led_number
-        self.keylist_color = [(0, 0, 0)] * self.led_number
-        self.keylist_sustained = [0] * self.led_number  # Track notes sustained by pedal
-        self.keylist_external_software = [0] * self.led_number  # Track LEDs lit by external software (channels 11/12)
+        self.reset_key_state()
         self.active_pulses = [] # For Pulse mode
 
 
+        driver = None
         if self.driver == "rpi_ws281x":
             try:
                 # Create NeoPixel object with appropriate configuration.
-                self.strip = PixelStrip(int(self.led_number), self.LED_PIN, self.LED_FREQ_HZ, self.LED_DMA, self.LED_INVERT,
-                                            int(self.brightness), self.LED_CHANNEL, ws.WS2811_STRIP_GRB)
+                driver = PixelStrip(int(self.led_number), self.LED_PIN, self.LED_FREQ_HZ, self.LED_DMA, self.LED_INVERT,
+                                    int(self.brightness), self.LED_CHANNEL, ws.WS2811_STRIP_GRB)
                 # Intialize the library (must be called once before other functions).
-                self.strip.begin()
-                if "releaseGIL" in dir(self.strip):
-                    self.strip.releaseGIL()
+                driver.begin()
+                if "releaseGIL" in dir(driver):
+                    driver.releaseGIL()
+                self.strip = LedFrameBuffer(driver, self.led_number)
                 self.change_gamma(self.led_gamma)
             except Exception as e:
                 logger.warning(e)
 
-                if isinstance(e, RuntimeError):
+                if isinstance(e, RuntimeError) and driver is not None:
                     # rpi_ws281x registers _cleanup() atexit, but if it's not initialized ws2811_fini will segfault.
                     # Manually clean up memory, then bypass _cleanup() using knowledge that _cleanup() checks _leds first
                     logger.info("Cleaning up ws281x instance.")
-                    ws.delete_ws2811_t(self.strip._leds)
-                    self.strip._leds = None
+                    ws.delete_ws2811_t(driver._leds)
+                    driver._leds = None
 
                 logger.info("Failed to load LED strip.  Using emu driver.")
-                self.strip = PixelStrip_Emu(int(self.led_number))
+                self.strip = LedFrameBuffer(PixelStrip_Emu(int(self.led_number)), self.led_number)
                 self.driver = "emu"
         elif self.driver == "emu":
-            self.strip = PixelStrip_Emu(int(self.led_number))
+            self.strip = LedFrameBuffer(PixelStrip_Emu(int(self.led_number)), self.led_number)
+
+    def reset_key_state(self):
+        """Allocate zeroed per-LED key state; arrays so the fade engine can process every LED in one pass."""
+        self.keylist = np.zeros(self.led_number, dtype=np.float64)
+        self.keylist_status = np.zeros(self.led_number, dtype=np.int8)
+        self.keylist_color = np.zeros((self.led_number, 3), dtype=np.float64)
+        self.keylist_sustained = np.zeros(self.led_number, dtype=np.int8)  # Track notes sustained by pedal
+        self.keylist_external_software = np.zeros(self.led_number, dtype=np.int8)  # Track LEDs lit by external software (channels 11/12)
+        self.active_keys = set()  # Indexes with keylist > 0, kept in sync by MIDIEventProcessor and the fade engine
+
+    # Note -> LED mapping inputs; assigning any of them invalidates the note position table
+
+    def _invalidate_note_positions(self):
+        self._note_position_version = getattr(self, "_note_position_version", 0) + 1
+
+    @property
+    def led_number(self):
+        return self._led_number
+
+    @led_number.setter
+    def led_number(self, value):
+        self._led_number = value
+        self._invalidate_note_positions()
+
+    @property
+    def leds_per_meter(self):
+        return self._leds_per_meter
+
+    @leds_per_meter.setter
+    def leds_per_meter(self, value):
+        self._leds_per_meter = value
+        self._invalidate_note_positions()
+
+    @property
+    def shift(self):
+        return self._shift
+
+    @shift.setter
+    def shift(self, value):
+        self._shift = value
+        self._invalidate_note_positions()
+
+    @property
+    def reverse(self):
+        return self._reverse
+
+    @reverse.setter
+    def reverse(self, value):
+        self._reverse = value
+        self._invalidate_note_positions()
 
     def _note_position_state_key(self, ledsettings):
-        note_offsets = tuple(tuple(offset) for offset in ledsettings.note_offsets)
-        return (
-            self.shift,
-            self.reverse,
-            self.led_number,
-            self.leds_per_meter,
-            note_offsets,
-        )
-
-    def get_note_position(self, note, ledsettings):
-        cache_key = self._note_position_state_key(ledsettings)
-        if getattr(self, "_note_position_cache_key", None) != cache_key:
-            self._note_position_cache_key = cache_key
-            self._note_position_cache = {}
+        offsets_key = getattr(ledsettings, "note_offsets_version", None)
+        if offsets_key is None:
+            # Settings objects without a version counter are compared by value
+            offsets_key = tuple(tuple(offset) for offset in ledsettings.note_offsets)
+        return (getattr(self, "_note_position_version", 0), id(ledsettings), offsets_key)
 
-        cache = self._note_position_cache
-        if note in cache:
-            return cache[note]
-
-        note_offsets = cache_key[4]
+    def _compute_note_position(self, note, note_offsets):
         note_offset = 0
 
         for threshold, offset in note_offsets:
@@ -117,13 +153,21 @@ class LedStrip:
         note_pos_raw = int(density * (note - 20) - note_offset)
 
         if self.reverse:
-            note_position = max(0, self.led_number - note_pos_raw)
-        else:
-            note_position = max(0, note_pos_raw)
+            return max(0, self.led_number - note_pos_raw)
+        return max(0, note_pos_raw)
 
-        cache[note] = note_position
-        return note_position
+    def get_note_position(self, note, ledsettings):
+        """LED index for ``note``; MIDI notes are a lookup in a 128-entry table rebuilt when the mapping changes."""
+        cache_key = self._note_position_state_key(ledsettings)
+        if getattr(self, "_note_position_cache_key", None) != cache_key:
+            note_offsets = tuple(tuple(offset) for offset in ledsettings.note_offsets)
+            self._note_position_cache = [self._compute_note_position(index, note_offsets) for index in range(128)]
+            self._note_position_cache_key = cache_key
 
+        if 0 <= note < 128:
+            return self._note_position_cache[note]
+        # Out-of-range notes (e.g. transposed past the MIDI range) are not tabulated
+        return self._compute_note_position(note, ledsettings.note_offsets)
 
     def change_gamma(self, value):
         self.led_gamma = float(value)
@@ -131,6 +175,7 @@ class LedStrip:
             if self.driver == "rpi_ws281x":
                 # rpi_ws281x.py interface has no ported method to set gamma by factor, using direct ws
                 ws.ws2811_set_custom_gamma_factor(self.strip._leds, self.led_gamma)
+                self.strip.request_render()
 
             # Rebuild colormaps
             cmap.generate_colormaps(cmap.gradients, self.led_gamma)
@@ -0,0 +1,174 @@
+import time
+
+from rpi_ws281x import Color
+
+
+class LightMode:
+    """
+    Light mode compiled from ``LedSettings`` for the per-event and per-frame LED paths.
+
+    Subclasses specialize ``note_on``/``note_off`` and set the decay flags read by the fade
+    engine, and the hot settings are snapshotted here, so handlers branch on attributes
+    instead of comparing mode strings or reading settings per event. This base class is
+    used for "Disabled" and unknown modes and leaves the key state untouched.
+    """
+
+    name = None
+    enabled = True
+    # Fade engine: decays=step keylist down, decays_while_held=also while the key is pressed
+    decays = False
+    decays_while_held = False
+    # A held sustain pedal keeps released keys lit
+    holds_sustain = False
+    pulses = False
+
+    def __init__(self, ledsettings):
+        self.decay_speed = getattr(ledsettings, "fadingspeed", 1000)
+        adjacent_mode = getattr(ledsettings, "adjacent_mode", "Off")
+        self.draws_adjacent = adjacent_mode != "Off"
+        skipped_notes = getattr(ledsettings, "skipped_notes", "Normal")
+        self.lights_external_notes = skipped_notes != "Finger-based"
+        self.lights_local_notes = skipped_notes != "Normal"
+        self.records_note_color = getattr(ledsettings, "color_mode", None) == "Multicolor"
+
+        red = getattr(ledsettings, "backlight_red", 0)
+        green = getattr(ledsettings, "backlight_green", 0)
+        blue = getattr(ledsettings, "backlight_blue", 0)
+        percent = getattr(ledsettings, "backlight_brightness_percent", 0)
+        # Color a released key returns to (None: switch off), as applied by the note handlers
+        if getattr(ledsettings, "backlight_brightness", 0) > 0:
+            scale = percent / 100.0
+            self.idle_color = Color(int(red * scale), int(green * scale), int(blue * scale))
+        else:
+            self.idle_color = None
+        # Backlight RGB the fade and pulse effects blend towards
+        level = float(percent) / 100
+        self.backlight_rgb = (int(red) * level, int(green) * level, int(blue) * level)
+
+    def note_on(self, ledstrip, note_position, velocity, color):
+        """Set the key state for a pressed key; returns the brightness the pixel color is divided by."""
+        return 1
+
+    def note_off(self, ledstrip, note_position):
+        """Update the key state for a released key that the sustain pedal does not hold."""
+
+
+class DisabledLightMode(LightMode):
+    name = "Disabled"
+    enabled = False
+
+
+class NormalLightMode(LightMode):
+    """Full brightness while the key is pressed."""
+
+    name = "Normal"
+
+    def note_on(self, ledstrip, note_position, velocity, color):
+        ledstrip.keylist[note_position] = 1000
+        return 1
+
+    def note_off(self, ledstrip, note_position):
+        ledstrip.keylist[note_position] = 0
+
+
+class FadingLightMode(LightMode):
+    """Full brightness while pressed, fades out after release."""
+
+    name = "Fading"
+    decays = True
+
+    def note_on(self, ledstrip, note_position, velocity, color):
+        # 1001 indicates the key is active and will start fading when released
+        ledstrip.keylist[note_position] = 1001
+        return 1
+
+    def note_off(self, ledstrip, note_position):
+        ledstrip.keylist[note_position] = 1000
+
+
+class VelocityLightMode(LightMode):
+    """Brightness follows velocity and decays while held; the sustain pedal holds released keys."""
+
+    name = "Velocity"
+    decays = True
+    decays_while_held = True
+    holds_sustain = True
+
+    def __init__(self, ledsettings):
+        super().__init__(ledsettings)
+        self.decay_speed = getattr(ledsettings, "velocity_speed", 1000)
+
+    def note_on(self, ledstrip, note_position, velocity, color):
+        brightness = velocity / 127.0
+        ledstrip.keylist[note_position] = 999 * brightness
+        return brightness
+
+
+class PedalLightMode(LightMode):
+    """Like Velocity at full strength, dropping by ``fadepedal_notedrop`` percent on release."""
+
+    name = "Pedal"
+    decays = True
+    decays_while_held = True
+    holds_sustain = True
+
+    def __init__(self, ledsettings):
+        super().__init__(ledsettings)
+        self.decay_speed = getattr(ledsettings, "pedal_speed", 1000)
+        self.release_factor = (100 - getattr(ledsettings, "fadepedal_notedrop", 0)) / 100
+
+    def note_on(self, ledstrip, note_position, velocity, color):
+        ledstrip.keylist[note_position] = 999
+        return 1
+
+    def note_off(self, ledstrip, note_position):
+        ledstrip.keylist[note_position] *= self.release_factor
+
+
+class PulseLightMode(LightMode):
+    """Each note starts a pulse animation that ``LEDEffectsProcessor`` draws."""
+
+    name = "Pulse"
+    pulses = True
+
+    def __init__(self, ledsettings):
+        super().__init__(ledsettings)
+        # Animation parameters read by LEDEffectsProcessor.process_pulse_effects every frame
+        self.pulse_distance = getattr(ledsettings, "pulse_animation_distance", 0)
+        self.pulse_duration_s = getattr(ledsettings, "pulse_animation_speed", 1000) / 1000.0
+        self.flicker_strength = getattr(ledsettings, "pulse_flicker_strength", 0) / 100.0
+        self.flicker_speed = getattr(ledsettings, "pulse_flicker_speed", 30.0)
+
+    def note_on(self, ledstrip, note_position, velocity, color):
+        ledstrip.active_pulses.append({
+            "position": note_position,
+            "color": color,
+            "start_time": time.perf_counter(),
+            "velocity": velocity / 127.0,
+            "state": "attack",
+            "release_time": None
+        })
+        ledstrip.keylist[note_position] = 0  # Pulse handles lighting
+        return 1
+
+    def note_off(self, ledstrip, note_position):
+        # Keep the pulse in the list so the effects processor animates the release
+        for pulse in ledstrip.active_pulses:
+            if pulse["position"] == note_position and pulse.get("state") != "release":
+                pulse["state"] = "release"
+                pulse["release_time"] = time.perf_counter()
+
+
+LIGHT_MODES = {
+    mode.name: mode
+    for mode in (DisabledLightMode, NormalLightMode, FadingLightMode, VelocityLightMode, PedalLightMode,
+                 PulseLightMode)
+}
+
+
+def compile_light_mode(ledsettings):
+    """Build the ``LightMode`` for the current ``ledsettings``, read from one consistent snapshot of them."""
+    snapshot = getattr(ledsettings, "snapshot", None)
+    if callable(snapshot):
+        ledsettings = snapshot()
+    return LIGHT_MODES.get(getattr(ledsettings, "mode", None), LightMode)(ledsettings)
@@ -0,0 +1,85 @@
+def _element_children(element):
+    return [child for child in element.childNodes if child.nodeType == child.ELEMENT_NODE]
+
+
+class MenuNode:
+    """A compiled ``config/menu.xml`` element."""
+
+    __slots__ = ("tag", "text", "parent", "children", "index", "value_getter")
+
+    def __init__(self, tag, text, parent=None, index=0, value_getter=None):
+        self.tag = tag
+        self.text = text
+        self.parent = parent
+        self.children = []
+        self.index = index
+        self.value_getter = value_getter
+
+    @property
+    def parent_tag(self):
+        return self.parent.tag if self.parent is not None else None
+
+    def value(self):
+        """Display value for adjustable items, or None."""
+        if self.value_getter is None:
+            return None
+        value = self.value_getter(self.text)
+        return str(value) if value is not None else None
+
+
+class MenuModel:
+    """
+    Indexed tree compiled once from the menu DOM.
+
+    The LCD addresses a menu page by tag name: every element carrying that tag is a
+    row, in document order, and the row's parent tag is where "back" goes. The model
+    keeps those row lists (and a text -> row index per page) ready so a redraw only
+    touches the rows it actually draws instead of walking the whole document.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.pages = {}
+        self._text_index = {}
+
+    @classmethod
+    def compile(cls, dom, resolve_value_getter=None):
+        """Build a model from a minidom document; ``resolve_value_getter(tag)`` returns a callable(text) or None."""
+        getters = {}
+
+        def getter_for(tag):
+            if resolve_value_getter is None:
+                return None
+            if tag not in getters:
+                getters[tag] = resolve_value_getter(tag)
+            return getters[tag]
+
+        root_element = dom.documentElement
+        root = MenuNode(root_element.tagName, root_element.getAttribute("text"))
+        model = cls(root)
+        model.pages[root.tag] = [root]
+        # Pre-order walk so every page lists its rows in document order, like getElementsByTagName.
+        stack = [(child, root) for child in reversed(_element_children(root_element))]
+        while stack:
+            element, parent = stack.pop()
+            page = model.pages.setdefault(element.tagName, [])
+            node = MenuNode(element.tagName, element.getAttribute("text"), parent, len(page),
+                            getter_for(element.tagName))
+            parent.children.append(node)
+            page.append(node)
+            stack.extend((child, node) for child in reversed(_element_children(element)))
+        return model
+
+    def has_page(self, tag):
+        return tag in self.pages
+
+    def page(self, tag):
+        return self.pages.get(tag, ())
+
+    def index_of(self, tag, text):
+        """Row index of ``text`` on page ``tag`` (last match, like the legacy scan), or None."""
+        index = self._text_index.get(tag)
+        if index is None:
+            index = {node.text: node.index for node in self.page(tag)}
+            self._text_index[tag] = index
+        return index.get(text)
@@ -1,4 +1,6 @@
+import math
 import os
+import threading
 from subprocess import call
 from xml.dom import minidom
 import webcolors as wc
@@ -9,6 +11,7 @@ from lib.functions import *
 from lib.rpi_drivers import GPIO
 import lib.colormaps as cmap
 from lib.log_setup import logger
+from lib.menu_model import MenuModel
 
 
 # ============================================================================
@@ -50,6 +53,10 @@ class UITheme:
 
 
 class MenuLCD:
+    # Bounds for the composed-frame layer caches (backgrounds per location, row tiles)
+    BACKGROUND_CACHE_SIZE = 32
+    ROW_CACHE_SIZE = 256
+
     def __init__(self, xml_file_name, args, usersettings, ledsettings, ledstrip, learning, saving, midiports, hotspot, platform):
         self.list_count = None
         self.parent_menu = None
@@ -67,6 +74,10 @@ class MenuLCD:
         self.args = args
         self._font_cache = {}
         self._title_image_cache = {}
+        self._background_cache = {}
+        self._row_cache = {}
+        # Serializes drawing/LCD writes between the display worker, GPIO handling and web requests
+        self._render_lock = threading.RLock()
         
         font_dir = "/usr/share/fonts/truetype/freefont"
         if args.fontdir is not None:
@@ -91,6 +102,10 @@ class MenuLCD:
         self.LCD.LCD_Init()
         self.LCD.LCD_ShowImage(self.rotate_image(self.image), 0, 0)
         self.DOMTree = minidom.parse(xml_file_name)
+        # Compiled view of DOMTree used for drawing/navigation; rebuilt lazily after the DOM is edited
+        self._value_getters = self._build_value_getters()
+        self._menu_model = None
+        self._colormap_names = None
         self.current_location = "menu"
         self.scroll_hold = 0
         self.cut_count = 0
@@ -297,6 +312,17 @@ class MenuLCD:
             self.usersettings.change_setting_value(setting, "1")
             self.screensaver_settings[setting] = "1"
 
+    def _get_menu_model(self):
+        """Return the compiled menu, compiling DOMTree if it changed since the last call."""
+        model = self._menu_model
+        if model is None:
+            model = MenuModel.compile(self.DOMTree, self._resolve_value_getter)
+            self._menu_model = model
+        return model
+
+    def _invalidate_menu_model(self):
+        self._menu_model = None
+
     def update_songs(self):
         # Assume the first node is "Choose song"
         replace_node = self.DOMTree.getElementsByTagName("Play_MIDI")[0]
@@ -323,8 +349,13 @@ class MenuLCD:
             element.appendChild(self.DOMTree.createTextNode(""))
             element.setAttribute("text", song)
             load_song_mc.appendChild(element)
+        self._invalidate_menu_model()
 
     def update_colormap(self):
+        colormap_names = tuple(cmap.colormaps_preview)
+        if colormap_names == self._colormap_names:
+            return
+        self._colormap_names = colormap_names
         # Assume the first node is "Velocity Colormap"
         replace_node = self.DOMTree.getElementsByTagName("Velocity_Rainbow")[0]
         velocity_colormap_mc = self.DOMTree.createElement("Velocity_Rainbow")
@@ -350,6 +381,7 @@ class MenuLCD:
             element.appendChild(self.DOMTree.createTextNode(""))
             element.setAttribute("text", key)
             velocity_colormap_mc.appendChild(element)
+        self._invalidate_menu_model()
 
     def update_sequence_list(self):
         seq_mc = self.DOMTree.createElement("LED_Strip_Settings")
@@ -381,6 +413,7 @@ class MenuLCD:
         element.appendChild(self.DOMTree.createTextNode(""))
         element.setAttribute("text", "Update")
         seq_mc.appendChild(element)
+        self._invalidate_menu_model()
         return ret
 
     def update_ports(self):
@@ -402,6 +435,7 @@ class MenuLCD:
                 element.setAttribute("text", port)
                 mc = self.DOMTree.getElementsByTagName("Ports_Settings")[index]
                 mc.appendChild(element)
+        self._invalidate_menu_model()
 
     def update_led_note_offsets(self):
         note_offsets = self.ledsettings.note_offsets
@@ -438,6 +472,7 @@ class MenuLCD:
             element.appendChild(self.DOMTree.createTextNode(""))
             element.setAttribute("text", "Append Note Offset")
             mc_note_offsets.appendChild(element)
+        self._invalidate_menu_model()
 
     def update_multicolor(self, colors_list):
         i = 0
@@ -524,6 +559,7 @@ class MenuLCD:
         element.appendChild(self.DOMTree.createTextNode(""))
         element.setAttribute("text", "Confirm")
         mc_multicolor.appendChild(element)
+        self._invalidate_menu_model()
 
     def scale(self, size):
         return int(round(size * self.LCD.font_scale))
@@ -579,10 +615,15 @@ class MenuLCD:
 
     def _draw_label_with_legacy_scroll(self, text, x, y, max_w, font, is_selected, refresh, window_len=18):
         """Legacy character-based scrolling (exactly like menulcd(old).py).
-        Fixed 18-char window; only selected row scrolls; cut_count/scroll_hold; start delay -6; end hold 8 ticks.
         max_w is intentionally ignored to keep legacy behavior."""
         if text is None:
             return
+        visible = self._legacy_scroll_text(text, is_selected, refresh, window_len)
+        self.draw.text((int(x), int(y)), visible, fill=self.text_color, font=font)
+
+    def _legacy_scroll_text(self, text, is_selected, refresh, window_len=18):
+        """Return the visible slice of a label and advance the legacy scroll state.
+        Fixed 18-char window; only selected row scrolls; cut_count/scroll_hold; start delay -6; end hold 8 ticks."""
         s = str(text)
         cut = 0
         to_be_continued = ""
@@ -613,239 +654,247 @@ class MenuLCD:
             cut = 0
             to_be_continued = ""
 
-        visible = s[cut:cut + window_len] + to_be_continued
-        self.draw.text((int(x), int(y)), visible, fill=self.text_color, font=font)
+        return s[cut:cut + window_len] + to_be_continued
     
 
     def _get_item_value(self, location, choice):
-            """Get the display value for a menu item if it has an adjustable value"""
-            value = None
-
-            # Map locations to their corresponding values
-            if location == "Brightness" and choice == "Power":
-                value = f"{self.ledstrip.brightness_percent}%"
-
-            elif location == "Backlight_Brightness" and choice == "Power":
-                value = self.ledsettings.backlight_brightness_percent
-
-            elif location == "Led_count":
-                value = self.ledstrip.led_number
-
-            elif location == "Leds_per_meter":
-                value = self.ledstrip.leds_per_meter
-
-            elif location == "Shift":
-                value = self.ledstrip.shift
-
-            elif location == "Reverse":
-                value = self.ledstrip.reverse
+        """Get the display value for a menu item if it has an adjustable value"""
+        getter = self._resolve_value_getter(location)
+        if getter is None:
+            return None
+        value = getter(choice)
+        return str(value) if value is not None else None
+
+    def _resolve_value_getter(self, location):
+        """Return a callable(choice) producing the value shown next to items on ``location``, or None."""
+        getter = self._value_getters.get(location)
+        if getter is not None:
+            return getter
+
+        # --- Key_rangeX: show Start/End values in their boxes ---
+        if location.startswith("Key_range"):
+            idx_str = location.replace("Key_range", "")
+            if idx_str.isdigit():
+                return lambda choice, idx=int(idx_str) - 1: self._key_range_value(idx, choice)  # ColorX -> 0-based
+            return None
 
-            elif location == "Start_delay":
-                value = self.screensaver_delay
+        # --- LED Note Offsets: show "LED Number" / "LED Offset" values ---
+        if location.startswith("Offset"):
+            # location like "Offset0", "Offset1", ...
+            idx_digits = "".join(ch for ch in location if ch.isdigit())
+            if idx_digits:
+                return lambda choice, idx=int(idx_digits): self._note_offset_value(idx, choice)
+            return None
 
-            elif location == "Turn_off_screen_delay":
-                value = self.screen_off_delay
+        if "RGB_Color" in location:
+            color_index = location.replace('RGB_Color', '')
+            return lambda choice: self._rgb_component(self.ledsettings.get_multicolors(color_index), choice)
+
+        return None
+
+    def _build_value_getters(self):
+        """Map menu locations to callables(choice) returning the live value for that row."""
+        ledsettings = self.ledsettings
+
+        def only(expected, getter):
+            return lambda choice: getter() if choice == expected else None
+
+        def by_choice(getters):
+            return lambda choice: getters[choice]() if choice in getters else None
+
+        def rgb_dict(getter):
+            return lambda choice: self._rgb_component(
+                ",".join(str(getter().get(name, 0)) for name in ("red", "green", "blue")), choice)
+
+        return {
+            "Brightness": only("Power", lambda: f"{self.ledstrip.brightness_percent}%"),
+            "Backlight_Brightness": only("Power", lambda: ledsettings.backlight_brightness_percent),
+            "Led_count": lambda choice: self.ledstrip.led_number,
+            "Leds_per_meter": lambda choice: self.ledstrip.leds_per_meter,
+            "Shift": lambda choice: self.ledstrip.shift,
+            "Reverse": lambda choice: self.ledstrip.reverse,
+            "Start_delay": lambda choice: self.screensaver_delay,
+            "Turn_off_screen_delay": lambda choice: self.screen_off_delay,
+            "Led_animation_delay": lambda choice: self.led_animation_delay,
+            "Animation_Speed": lambda choice: self._animation_speed_value(),
+            "Idle_timeout": lambda choice: self.idle_timeout_minutes,
+            "Period": lambda choice: ledsettings.speed_period_in_seconds,
+            "Max_notes_in_period": lambda choice: ledsettings.speed_max_notes,
+            "Content": lambda choice: "+" if str(
+                self.screensaver_settings.get(choice.lower().replace(" ", "_"))) == "1" else "-",
+            # --- Scale Coloring: show selected key name on the "Scale key" row ---
+            "Scale_Coloring": only("Scale key", self._scale_key_value),
+            # --- Rainbow_Colors: show Offset / Scale / Timeshift values ---
+            "Rainbow_Colors": by_choice({
+                "Offset": lambda: ledsettings.rainbow_offset,
+                "Scale": lambda: ledsettings.rainbow_scale,
+                "Timeshift": lambda: ledsettings.rainbow_timeshift,
+            }),
+            # --- Velocity_Rainbow: show Offset / Scale / Curve values ---
+            "Velocity_Rainbow": by_choice({
+                "Offset": lambda: ledsettings.velocityrainbow_offset,
+                "Scale": lambda: ledsettings.velocityrainbow_scale,
+                "Curve": lambda: ledsettings.velocityrainbow_curve,
+            }),
+            # --- Pulse Settings ---
+            "Pulse": by_choice({
+                "Animation Distance": lambda: ledsettings.pulse_animation_distance,
+                "Flicker Strength": lambda: ledsettings.pulse_flicker_strength,
+                # Convert radians/sec to Hz for display
+                "Flicker Speed": lambda: f"{ledsettings.pulse_flicker_speed / (2 * math.pi):.2f} Hz",
+            }),
+            "RGB": lambda choice: self._rgb_component(ledsettings.get_colors(), choice, strict=True),
+            "Backlight_Color": lambda choice: self._rgb_component(ledsettings.get_backlight_colors(), choice),
+            "Custom_RGB": lambda choice: self._rgb_component(ledsettings.get_adjacent_colors(), choice),
+            "Pointer_Color_RGB": lambda choice: self._rgb_component(
+                self._color_to_string(self.theme.pointer_color), choice),
+            "Color_for_slow_speed": rgb_dict(lambda: ledsettings.speed_slowest),
+            "Color_for_fast_speed": rgb_dict(lambda: ledsettings.speed_fastest),
+            "Gradient_start": rgb_dict(lambda: ledsettings.gradient_start),
+            "Gradient_end": rgb_dict(lambda: ledsettings.gradient_end),
+            "Color_in_scale": rgb_dict(lambda: ledsettings.key_in_scale),
+            "Color_not_in_scale": rgb_dict(lambda: ledsettings.key_not_in_scale),
+            "Learn_MIDI": self._learn_midi_value,
+        }
 
-            elif location == "Led_animation_delay":
-                value = self.led_animation_delay
+    @staticmethod
+    def _rgb_component(color_str, choice, strict=False):
+        """Pick the Red/Green/Blue component of an 'R,G,B' string for ``choice``."""
+        if strict:
+            # Malformed strings show zeros rather than partial components
+            try:
+                parts = [c.strip() for c in color_str.split(',')]
+                r, g, b = parts
+            except Exception:
+                r, g, b = "0", "0", "0"
+        else:
+            parts = [p.strip() for p in color_str.split(',')]
+            while len(parts) < 3: parts.append("0")
+            r, g, b = parts[:3]
+        return {"Red": r, "Green": g, "Blue": b}.get(choice)
+
+    def _animation_speed_value(self):
+        speed_setting = self.usersettings.get_setting_value("led_animation_speed") or ""
+        if speed_setting and speed_setting.strip():
+            # Check if it's a numeric value
+            try:
+                speed_ms = int(speed_setting)
+                return f"{speed_ms}ms"
+            except (ValueError, TypeError):
+                # It's a preset name
+                return speed_setting
+        return "Medium"
+
+    def _scale_key_value(self):
+        try:
+            return self.ledsettings.scales[self.ledsettings.scale_key]
+        except Exception:
+            return None
 
-            elif location == "Animation_Speed":
-                speed_setting = self.usersettings.get_setting_value("led_animation_speed") or ""
-                if speed_setting and speed_setting.strip():
-                    # Check if it's a numeric value
-                    try:
-                        speed_ms = int(speed_setting)
-                        value = f"{speed_ms}ms"
-                    except (ValueError, TypeError):
-                        # It's a preset name
-                        value = speed_setting
-                else:
-                    value = "Medium"
+    def _key_range_value(self, idx, choice):
+        try:
+            start_val, end_val = self.ledsettings.multicolor_range[idx]
+        except Exception:
+            return None
+        if choice == "Start":
+            return start_val
+        if choice == "End":
+            return end_val
+        return None
 
-            elif location == "Idle_timeout":
-                value = self.idle_timeout_minutes
+    def _note_offset_value(self, idx, choice):
+        try:
+            led_num, led_off = self.ledsettings.note_offsets[idx]
+        except Exception:
+            return None
+        if choice == "LED Number":
+            return led_num
+        if choice == "LED Offset":
+            return led_off
+        return None
+
+    def _learn_midi_value(self, choice):
+        learning = self.learning
+        learn_values = {
+            "Load song": lambda: learning.loadingList[learning.loading],
+            "Learning": lambda: learning.learningList[learning.is_started_midi],
+            "Practice": lambda: learning.practiceList[learning.practice],
+            "Hands": lambda: learning.handsList[learning.hands],
+            "Mute hand": lambda: learning.mute_handList[learning.mute_hand],
+            "Start point": lambda: f"{learning.start_point}%",
+            "End point": lambda: f"{learning.end_point}%",
+            "Hand color R": lambda: " ",
+            "Hand color L": lambda: " ",
+            "Set tempo": lambda: f"{learning.set_tempo}%",
+            "Wrong notes": lambda: "Enabled" if learning.show_wrong_notes else "Disabled",
+            "Future notes": lambda: "Enabled" if learning.show_future_notes else "Disabled",
+            "Max mistakes": lambda: learning.number_of_mistakes,
+        }
+        getter = learn_values.get(choice)
+        return getter() if getter is not None else None
 
-            elif location == "Period":
-                value = self.ledsettings.speed_period_in_seconds
+    def _layer_style_key(self):
+        theme = self.theme
+        return (self.LCD.width, self.LCD.height, self.background_color, self.text_color,
+                tuple(theme.pointer_color), theme.pointer_width)
 
-            elif location == "Max_notes_in_period":
-                value = self.ledsettings.speed_max_notes
+    def _get_background_layer(self, position):
+        """Return the cached background + title layer for ``position`` (do not draw on it)."""
+        # Extra: show estimated current draw under Brightness -> Power
+        # displaying brightness value
+        brightness_text = None
+        if position == "Brightness":
+            # Compute the current draw
+            miliamps = int(self.ledstrip.led_number) * (60 / (100 / float(self.ledstrip.brightness_percent)))
+            amps = round(float(miliamps) / 1000.0, 2)
+            brightness_text = ("Amps needed to\n"
+                               f"power {self.ledstrip.led_number} LEDS with\n"
+                               f"white color: {amps}")
 
-            elif location == "Content":
-                sid_temp = choice.lower().replace(" ", "_")
-                value = "+" if str(self.screensaver_settings.get(sid_temp)) == "1" else "-"
-        
-            # --- Scale Coloring: show selected key name on the "Scale key" row ---
-            elif location == "Scale_Coloring" and choice == "Scale key":
-                try:
-                    value = self.ledsettings.scales[self.ledsettings.scale_key]
-                except Exception:
-                    value = None
-
-            # --- Key_rangeX: show Start/End values in their boxes ---
-            elif location.startswith("Key_range"):
-                idx_str = location.replace("Key_range", "")
-                if idx_str.isdigit():
-                    idx = int(idx_str) - 1  # ColorX -> 0-based
-                    try:
-                        start_val, end_val = self.ledsettings.multicolor_range[idx]
-                        if choice == "Start":
-                            value = start_val
-                        elif choice == "End":
-                            value = end_val
-                    except Exception:
-                        value = None
-
-            # --- LED Note Offsets: show "LED Number" / "LED Offset" values ---
-            elif location.startswith("Offset"):
-                # location like "Offset0", "Offset1", ...
-                idx_digits = "".join(ch for ch in location if ch.isdigit())
-                if idx_digits:
-                    idx = int(idx_digits)
-                    try:
-                        led_num, led_off = self.ledsettings.note_offsets[idx]
-                        if choice == "LED Number":
-                            value = led_num
-                        elif choice == "LED Offset":
-                            value = led_off
-                    except Exception:
-                        value = None
+        title_art = self._get_menu_title_art() if position == "menu" else None
+        cache_key = self._layer_style_key() + (position, id(title_art), brightness_text)
+        layer = self._background_cache.get(cache_key)
+        if layer is not None:
+            return layer
 
-            # --- Rainbow_Colors: show Offset / Scale / Timeshift values ---
-            elif location == "Rainbow_Colors":
-                if choice == "Offset":
-                    value = self.ledsettings.rainbow_offset
-                elif choice == "Scale":
-                    value = self.ledsettings.rainbow_scale
-                elif choice == "Timeshift":
-                    value = self.ledsettings.rainbow_timeshift
+        scale = self.scale
+        theme = self.theme
+        lcd_width = self.LCD.width
+        layer = Image.new("RGB", (lcd_width, self.LCD.height), self.background_color)
+        draw = ImageDraw.Draw(layer)
 
-            # --- Velocity_Rainbow: show Offset / Scale / Curve values ---
-            elif location == "Velocity_Rainbow":
-                if choice == "Offset":
-                    value = self.ledsettings.velocityrainbow_offset
-                elif choice == "Scale":
-                    value = self.ledsettings.velocityrainbow_scale
-                elif choice == "Curve":
-                    value = self.ledsettings.velocityrainbow_curve
+        if brightness_text is not None:
+            # Render the text on three lines at (10, 50)
+            draw.multiline_text((10, 50), brightness_text, fill=self.text_color, font=self.font, spacing=scale(2))
 
-            # --- Pulse Settings ---
-            elif location == "Pulse":
-                if choice == "Animation Distance":
-                    value = self.ledsettings.pulse_animation_distance
-                elif choice == "Flicker Strength":
-                    value = self.ledsettings.pulse_flicker_strength
-                elif choice == "Flicker Speed":
-                    # Convert radians/sec to Hz for display
-                    import math
-                    hz = self.ledsettings.pulse_flicker_speed / (2 * math.pi)
-                    value = f"{hz:.2f} Hz"
-        
-            # RGB color values (existing logic)
-            elif location == "RGB":
-                color_str = self.ledsettings.get_colors()
-                try:
-                    r, g, b = [c.strip() for c in color_str.split(',')]
-                except Exception:
-                    r, g, b = "0", "0", "0"
-                color_dict = {"Red": r, "Green": g, "Blue": b}
-                value = color_dict.get(choice)
-        
-            elif "RGB_Color" in location:
-                color_str = self.ledsettings.get_multicolors(location.replace('RGB_Color', ''))
-                parts = [p.strip() for p in color_str.split(',')]
-                while len(parts) < 3: parts.append("0")
-                color_dict = {"Red": parts[0], "Green": parts[1], "Blue": parts[2]}
-                value = color_dict.get(choice)
-    
+        # Draw title area (PNG in main menu only, text in submenus)
+        title_y = scale(theme.title_padding)
+        title_height_px = scale(theme.title_height)
+        if title_art is not None:
+            art_w, art_h = title_art.size
+            x_pos = (lcd_width - art_w) // 2
+            y_pos = title_y + (title_height_px - art_h) // 2
+            if title_art.mode == 'RGBA':
+                layer.paste(title_art, (x_pos, y_pos), title_art)
+            else:
+                layer.paste(title_art, (x_pos, y_pos))
+        else:
+            # Fallback to text
+            title_text = position.replace("_", " ")
+            draw.text((scale(5), title_y), title_text, fill=self.text_color, font=self.font)
 
-            elif location == "Backlight_Color":
-                color_str = self.ledsettings.get_backlight_colors()
-                parts = [p.strip() for p in color_str.split(',')]
-                while len(parts) < 3: parts.append("0")
-                color_dict = {"Red": parts[0], "Green": parts[1], "Blue": parts[2]}
-                value = color_dict.get(choice)
-
-            elif location == "Custom_RGB":
-                color_str = self.ledsettings.get_adjacent_colors()
-                parts = [p.strip() for p in color_str.split(',')]
-                while len(parts) < 3: parts.append("0")
-                color_dict = {"Red": parts[0], "Green": parts[1], "Blue": parts[2]}
-                value = color_dict.get(choice)
-
-            elif location == "Pointer_Color_RGB":
-                r, g, b = self.theme.pointer_color
-                color_dict = {"Red": str(r), "Green": str(g), "Blue": str(b)}
-                value = color_dict.get(choice)
-        
-            elif location == "Color_for_slow_speed":
-                color_dict = {
-                    "Red": str(self.ledsettings.speed_slowest.get('red', 0)),
-                    "Green": str(self.ledsettings.speed_slowest.get('green', 0)),
-                    "Blue": str(self.ledsettings.speed_slowest.get('blue', 0)),
-                }
-                value = color_dict.get(choice)
-
-            elif location == "Color_for_fast_speed":
-                color_dict = {
-                    "Red": str(self.ledsettings.speed_fastest.get('red', 0)),
-                    "Green": str(self.ledsettings.speed_fastest.get('green', 0)),
-                    "Blue": str(self.ledsettings.speed_fastest.get('blue', 0)),
-                }
-                value = color_dict.get(choice)
-        
-            elif location == "Gradient_start":
-                color_dict = {
-                    "Red": str(self.ledsettings.gradient_start.get('red', 0)),
-                    "Green": str(self.ledsettings.gradient_start.get('green', 0)),
-                    "Blue": str(self.ledsettings.gradient_start.get('blue', 0)),
-                }
-                value = color_dict.get(choice)
-        
-            elif location == "Gradient_end":
-                color_dict = {
-                    "Red": str(self.ledsettings.gradient_end.get('red', 0)),
-                    "Green": str(self.ledsettings.gradient_end.get('green', 0)),
-                    "Blue": str(self.ledsettings.gradient_end.get('blue', 0)),
-                }
-                value = color_dict.get(choice)
-
-            elif location == "Color_in_scale":
-                color_dict = {
-                    "Red": str(self.ledsettings.key_in_scale.get('red', 0)),
-                    "Green": str(self.ledsettings.key_in_scale.get('green', 0)),
-                    "Blue": str(self.ledsettings.key_in_scale.get('blue', 0)),
-                }
-                value = color_dict.get(choice)
-
-            elif location == "Color_not_in_scale":
-                color_dict = {
-                    "Red": str(self.ledsettings.key_not_in_scale.get('red', 0)),
-                    "Green": str(self.ledsettings.key_not_in_scale.get('green', 0)),
-                    "Blue": str(self.ledsettings.key_not_in_scale.get('blue', 0)),
-                }
-                value = color_dict.get(choice)
-
-            elif location == "Learn_MIDI":
-                learn_values = {
-                    "Load song": self.learning.loadingList[self.learning.loading],
-                    "Learning": self.learning.learningList[self.learning.is_started_midi],
-                    "Practice": self.learning.practiceList[self.learning.practice],
-                    "Hands": self.learning.handsList[self.learning.hands],
-                    "Mute hand": self.learning.mute_handList[self.learning.mute_hand],
-                    "Start point": f"{self.learning.start_point}%",
-                    "End point": f"{self.learning.end_point}%",
-                    "Hand color R": " ",
-                    "Hand color L": " ",
-                    "Set tempo": f"{self.learning.set_tempo}%",
-                    "Wrong notes": "Enabled" if self.learning.show_wrong_notes else "Disabled",
-                    "Future notes": "Enabled" if self.learning.show_future_notes else "Disabled",
-                    "Max mistakes": self.learning.number_of_mistakes,
-                }
-                value = learn_values.get(choice)
-            return str(value) if value is not None else None
+        if len(self._background_cache) >= self.BACKGROUND_CACHE_SIZE:
+            # Row tiles are keyed by their background layer, so both caches go together
+            self._background_cache.clear()
+            self._row_cache.clear()
+        self._background_cache[cache_key] = layer
+        return layer
 
     def show(self, position="default", back_pointer_location=None):
+        with self._render_lock:
+            return self._show(position, back_pointer_location)
+
+    def _show(self, position="default", back_pointer_location=None):
         selected_sid = None
         if self.screen_on == 0:
             return False
@@ -865,53 +914,19 @@ class MenuLCD:
             refresh = 0
             self.scroll_offset = 0  # Reset scroll when entering new menu
 
-        self.image = Image.new("RGB", (self.LCD.width, self.LCD.height), self.background_color)
+        # Start from the cached background + title layer for this location
+        background = self._get_background_layer(position)
+        self.image = background.copy()
         self.draw = ImageDraw.Draw(self.image)
         scale = self.scale
         theme = self.theme
         draw = self.draw
         lcd_width = self.LCD.width
         lcd_height = self.LCD.height
-        # Extra: show estimated current draw under Brightness -> Power
-        # displaying brightness value
-        
-        if self.current_location == "Brightness":
-
-            # Compute the current draw
-            miliamps = int(self.ledstrip.led_number) * (60 / (100 / float(self.ledstrip.brightness_percent)))
-            amps = round(float(miliamps) / 1000.0, 2)
-
-            # Render the text on three lines at (10, 50)
-            draw.multiline_text(
-                (10, 50),
-                "Amps needed to\n"
-                f"power {self.ledstrip.led_number} LEDS with\n"
-                f"white color: {amps}",
-                fill=self.text_color,
-                font=self.font,
-                spacing=scale(2)
-            )
-
-
-        # Draw title area (PNG in main menu only, text in submenus)
-        title_y = scale(theme.title_padding)
-        title_height_px = scale(theme.title_height)
-        title_art = self._get_menu_title_art() if position == "menu" else None
-        if title_art is not None:
-            art_w, art_h = title_art.size
-            x_pos = (lcd_width - art_w) // 2
-            y_pos = title_y + (title_height_px - art_h) // 2
-            if title_art.mode == 'RGBA':
-                self.image.paste(title_art, (x_pos, y_pos), title_art)
-            else:
-                self.image.paste(title_art, (x_pos, y_pos))
-        else:
-            # Fallback to text
-            title_text = position.replace("_", " ")
-            draw.text((scale(5), title_y), title_text, fill=self.text_color, font=self.font)
 
         # Get menu items
-        staffs = self.DOMTree.getElementsByTagName(position)
+        menu_model = self._get_menu_model()
+        staffs = menu_model.page(position)
         self.list_count = len(staffs) - 1
         
         # Setup viewport dimensions
@@ -931,7 +946,6 @@ class MenuLCD:
         pointer_padding_px = scale(theme.pointer_padding)
         pointer_radius_px = scale(theme.item_corner_radius)
         outer_margin_px = scale(5)
-        label_value_spacing_px = scale(theme.item_padding_h * 2 + theme.value_gap)
         value_right_margin_px = scale(theme.value_right_margin)
         swatch_width_px = scale(30)
         swatch_gap_px = scale(6)
@@ -949,51 +963,72 @@ class MenuLCD:
             elif selected_item_y + item_height > self.scroll_offset + viewport_height - margin_bottom_px:
                 self.scroll_offset = selected_item_y + item_height - viewport_height + margin_bottom_px
         
-        # Draw menu items
-        current_y = int(round(content_start_y - self.scroll_offset))
+        # Resolve the selected row by index instead of scanning the whole page
+        if back_pointer_location:
+            selected_index = menu_model.index_of(position, back_pointer_location)
+            if selected_index is not None:
+                self.pointer_position = selected_index
+                self.parent_menu = staffs[selected_index].parent_tag or "data"
+        elif 0 <= self.pointer_position < len(staffs):
+            selected_staff = staffs[self.pointer_position]
+            self.current_choice = selected_staff.text
+            self.parent_menu = selected_staff.parent_tag or "end"
+
+        # Draw menu items (only the rows that fit in the viewport are visited)
+        base_y = int(round(content_start_y - self.scroll_offset))
+        first_visible = max(0, -((base_y - content_start_y) // total_item_height))
         displayed_items = 0
         max_items = 4
-        
-        for i, staff in enumerate(staffs):
-            sid = staff.getAttribute("text")
-            
+
+        for i in range(first_visible, len(staffs)):
+            staff = staffs[i]
+            sid = staff.text
+            current_y = base_y + i * total_item_height
+
             # Check if this item is the selected one
-            is_selected = False
             if back_pointer_location:
-                if sid == back_pointer_location:
-                    is_selected = True
-                    self.pointer_position = i
-                    try:
-                        self.parent_menu = staff.parentNode.tagName
-                    except:
-                        self.parent_menu = "data"
+                is_selected = sid == back_pointer_location
             else:
-                if i == self.pointer_position:
-                    is_selected = True
-                    self.current_choice = sid
-                    try:
-                        self.parent_menu = staff.parentNode.tagName
-                    except:
-                        self.parent_menu = "end"
-            
+                is_selected = i == self.pointer_position
+
             # Calculate item bounds
             item_x0 = outer_margin_px
             item_x1 = lcd_width - outer_margin_px
             item_y0 = current_y
             item_y1 = current_y + item_height
-            
-            # Calculate if the item would be fully visible
-            is_fully_visible = (item_y0 >= content_start_y and 
-                              item_y1 <= content_bottom and 
-                              displayed_items < max_items)
-            
-            # Skip if item is not fully visible or we've reached max items
-            if not is_fully_visible:
-                current_y += total_item_height
-                continue
-            
+
+            # Rows below the viewport (or past the row limit) are never visible
+            if item_y1 > content_bottom or displayed_items >= max_items:
+                break
+
             displayed_items += 1
-            
+            if is_selected:
+                selected_sid = sid
+
+            # Get value if applicable
+            value_text = staff.value()
+            # Scroll state advances every tick, so resolve the visible label before the cache lookup
+            label_visible = self._legacy_scroll_text(sid, is_selected, refresh,
+                                                     window_len=12 if value_text is not None else 18)
+
+            # Color swatches are part of the row, so their color is part of the cache key
+            is_hand_color = self.current_location == "Learn_MIDI" and sid in ["Hand color R", "Hand color L"]
+            swatch_fill = None
+            if is_hand_color:
+                hand_idx = self.learning.hand_colorR if sid == "Hand color R" else self.learning.hand_colorL
+                color = self.learning.hand_colorList[hand_idx]
+                swatch_fill = f"rgb({color[0]}, {color[1]}, {color[2]})"
+            elif self.current_location == "Multicolor" and sid.startswith("Color") and sid[5:].isdigit():
+                swatch_fill = f"rgb({self.ledsettings.get_multicolors(sid[5:])})"
+
+            # Rows are composed from cached tiles; a tile covers the item box plus the pointer outline
+            row_box = (0, item_y0 - pointer_padding_px, lcd_width, item_y1 + pointer_padding_px + 1)
+            row_key = (id(background), row_box, sid, label_visible, value_text, is_selected, swatch_fill)
+            row_tile = self._row_cache.get(row_key)
+            if row_tile is not None:
+                self.image.paste(row_tile, row_box[:2])
+                continue
+
             # Draw item background box
             self._draw_rounded_rect(
                 (item_x0, item_y0, item_x1, item_y1),
@@ -1005,7 +1040,6 @@ class MenuLCD:
             
             # Draw selection highlight (outline only)
             if is_selected:
-                selected_sid = sid
                 pointer_x0 = item_x0 - pointer_padding_px
                 pointer_y0 = item_y0 - pointer_padding_px
                 pointer_x1 = item_x1 + pointer_padding_px
@@ -1019,79 +1053,38 @@ class MenuLCD:
                     width=theme.pointer_width  # Use the configured pointer width
                 )
             
-            # Get value if applicable
-            value_text = self._get_item_value(self.current_location, sid)
-            
             # Calculate text areas
             text_x = item_x0 + padding_h_px
             text_y = item_y0 + padding_v_px
             
-            # Handle special case for Learn MIDI hand colors first - always draw the color box
-            if self.current_location == "Learn_MIDI" and sid in ["Hand color R", "Hand color L"]:
-                # Calculate the color preview box dimensions and position first
-                box_width = swatch_width_px
-                box_height = item_y1 - item_y0 - swatch_gap_px  # Slightly smaller for better visual
-                
-                # Center the box vertically
-                box_y = item_y0 + (item_y1 - item_y0 - box_height) // 2
-                box_x = item_x1 - box_width - outer_margin_px  # outer margin from right edge
-                
-                # Draw the color preview box
-                hand_idx = self.learning.hand_colorR if sid == "Hand color R" else self.learning.hand_colorL
-                color = self.learning.hand_colorList[hand_idx]
-                
+            # Learn MIDI hand colors and Multicolor ColorX rows get a color preview box on the right
+            if swatch_fill is not None:
+                swatch_w = swatch_width_px
+                swatch_h = (item_y1 - item_y0) - swatch_gap_px  # Slightly smaller for better visual
+                swatch_x = item_x1 - swatch_w - outer_margin_px  # outer margin from right edge
+                swatch_y = item_y0 + ((item_y1 - item_y0) - swatch_h) // 2
+
                 self._draw_rounded_rect(
-                    (box_x, box_y, box_x + box_width, box_y + box_height),
+                    (swatch_x, swatch_y, swatch_x + swatch_w, swatch_y + swatch_h),
                     radius=color_box_radius_px,
-                    fill=f"rgb({color[0]}, {color[1]}, {color[2]})"
+                    fill=swatch_fill
                 )
-            
-            # Multicolor: one swatch per ColorX row (scroll/clip within the box)
-            if self.current_location == "Multicolor":
-                if sid.startswith("Color"):
-                    idx = sid[5:]
-                    if idx.isdigit():
-                        color_str = self.ledsettings.get_multicolors(idx)
-
-                        # Rounded-rectangle dimensions inside the box (right side)
-                        swatch_w = swatch_width_px
-                        swatch_h = (item_y1 - item_y0) - swatch_gap_px
-                        swatch_x = item_x1 - swatch_w - outer_margin_px
-                        swatch_y = item_y0 + ((item_y1 - item_y0) - swatch_h) // 2
-
-                        self._draw_rounded_rect(
-                            (swatch_x, swatch_y, swatch_x + swatch_w, swatch_y + swatch_h),
-                            radius=color_box_radius_px,          # rounded rectangle
-                            fill=f"rgb({color_str})"
-                        )
 
             # Handle text display
+            draw.text((int(text_x), int(text_y)), label_visible, fill=self.text_color, font=self.font)
             if value_text is not None:
-                # Calculate space for value, accounting for color box in Learn MIDI menu
+                # Calculate value position, accounting for color box in Learn MIDI menu
                 value_width = draw.textlength(value_text, font=self.font)
-                extra_space = learn_color_extra_px if self.current_location == "Learn_MIDI" and sid in ["Hand color R", "Hand color L"] else 0
-                
-                label_max_width = (item_x1 - item_x0 -
-                                   label_value_spacing_px -
-                                   value_width - extra_space)
-                # Truncate label if needed
-                label_text = self._truncate_text(sid, label_max_width, self.font)
-                # Draw label
-                self._draw_label_with_legacy_scroll(sid, text_x, text_y, label_max_width, self.font, is_selected, refresh, window_len=12)
-
-                # Calculate value position, accounting for color box if needed
                 value_right_margin = value_right_margin_px
-                if self.current_location == "Learn_MIDI" and sid in ["Hand color R", "Hand color L"]:
+                if is_hand_color:
                     value_right_margin += learn_color_extra_px  # Add space for color box
                 value_x = item_x1 - value_right_margin - value_width
                 draw.text((value_x, text_y), value_text, fill=self.text_color, font=self.font)
-            else:
-                # Just draw label centered vertically
-                label_max_width = item_x1 - item_x0 - scale(theme.item_padding_h * 2)
-                label_text = self._truncate_text(sid, label_max_width, self.font)
-                self._draw_label_with_legacy_scroll(sid, text_x, text_y, label_max_width, self.font, is_selected, refresh, window_len=18)
 
-            current_y += total_item_height
+            if len(self._row_cache) >= self.ROW_CACHE_SIZE:
+                self._row_cache.clear()
+            self._row_cache[row_key] = self.image.crop(row_box)
+
         # Update scroll_needed flag based on actually selected item (legacy rule >18 chars)
         try:
             if isinstance(selected_sid, str) and len(selected_sid) > 18 and self.screen_on == 1:
@@ -1274,7 +1267,7 @@ class MenuLCD:
         self.is_idle_animation_running = False
         position = self.current_choice.replace(" ", "_")
 
-        if not self.DOMTree.getElementsByTagName(position):
+        if not self._get_menu_model().has_page(position):
             self.change_settings(self.current_choice, self.current_location)
         else:
             self.current_location = self.current_choice
@@ -1293,6 +1286,10 @@ class MenuLCD:
             self.show(self.parent_menu, location_readable)
 
     def render_message(self, title, message, delay=500):
+        with self._render_lock:
+            self._render_message(title, message, delay)
+
+    def _render_message(self, title, message, delay=500):
         self.image = Image.new("RGB", (self.LCD.width, self.LCD.height), self.background_color)
         self.draw = ImageDraw.Draw(self.image)
         self.draw.text((self.scale(3), self.scale(55)), title, fill=self.text_color, font=self.font)
@@ -1302,6 +1299,12 @@ class MenuLCD:
 
     def render_screensaver(self, hour, date, cpu, cpu_average, ram, temp, cpu_history=None, upload=0, download=0,
                            card_space=None, local_ip="0.0.0.0"):
+        with self._render_lock:
+            self._render_screensaver(hour, date, cpu, cpu_average, ram, temp, cpu_history, upload, download,
+                                     card_space, local_ip)
+
+    def _render_screensaver(self, hour, date, cpu, cpu_average, ram, temp, cpu_history=None, upload=0, download=0,
+                            card_space=None, local_ip="0.0.0.0"):
         if cpu_history is None:
             cpu_history = []
 
@@ -0,0 +1,147 @@
+import mido
+
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+POLYTOUCH = 0xA0
+CONTROL_CHANGE = 0xB0
+PROGRAM_CHANGE = 0xC0
+AFTERTOUCH = 0xD0
+PITCHWHEEL = 0xE0
+
+STATUS_TYPES = {
+    NOTE_OFF: "note_off",
+    NOTE_ON: "note_on",
+    POLYTOUCH: "polytouch",
+    CONTROL_CHANGE: "control_change",
+    PROGRAM_CHANGE: "program_change",
+    AFTERTOUCH: "aftertouch",
+    PITCHWHEEL: "pitchwheel",
+}
+TYPE_STATUS = {msg_type: status for status, msg_type in STATUS_TYPES.items()}
+
+# System common and real-time message types by status byte (sysex and MTC quarter frames excluded)
+SYSTEM_STATUS_TYPES = {
+    0xF2: "songpos",
+    0xF3: "song_select",
+    0xF6: "tune_request",
+    0xF8: "clock",
+    0xFA: "start",
+    0xFB: "continue",
+    0xFC: "stop",
+    0xFE: "active_sensing",
+    0xFF: "reset",
+}
+
+
+class PackedMidiEvent:
+    """
+    Channel-voice MIDI event as it travels through the live input queues.
+
+    Holds the raw ``status``/``data1``/``data2`` bytes plus the ingest ``timestamp``
+    (``time.perf_counter()``) and ``source`` tag, so the hot path can dispatch on
+    ``status & 0xF0`` instead of comparing type strings. The read-only ``type``,
+    ``channel``, ``note``, ``velocity``, ``control`` and ``value`` attributes mirror
+    ``mido.Message`` for code that only reads fields; anything that hands the event to a
+    mido port calls ``to_mido()``.
+    """
+
+    __slots__ = ("status", "data1", "data2", "timestamp", "source")
+
+    is_meta = False
+    time = 0
+
+    def __init__(self, status, data1=0, data2=0, timestamp=0.0, source=None):
+        self.status = status
+        self.data1 = data1
+        self.data2 = data2
+        self.timestamp = timestamp
+        self.source = source
+
+    @classmethod
+    def from_mido(cls, msg, timestamp=0.0, source=None):
+        """Pack a channel-voice ``mido.Message``; returns None for anything else."""
+        msg_type = msg.type
+        if msg_type == "note_on" or msg_type == "note_off":
+            return cls(TYPE_STATUS[msg_type] | msg.channel, msg.note, msg.velocity, timestamp, source)
+        if msg_type == "control_change":
+            return cls(CONTROL_CHANGE | msg.channel, msg.control, msg.value, timestamp, source)
+        if msg_type not in TYPE_STATUS:
+            return None
+        data = msg.bytes()
+        return cls(data[0], data[1], data[2] if len(data) > 2 else 0, timestamp, source)
+
+    @property
+    def kind(self):
+        """Status nibble without the channel (``NOTE_ON``, ``CONTROL_CHANGE``, ...)."""
+        return self.status & 0xF0
+
+    @property
+    def type(self):
+        return STATUS_TYPES[self.status & 0xF0]
+
+    @property
+    def channel(self):
+        return self.status & 0x0F
+
+    @property
+    def note(self):
+        return self.data1
+
+    @property
+    def velocity(self):
+        return self.data2
+
+    @property
+    def control(self):
+        return self.data1
+
+    @property
+    def value(self):
+        if self.status & 0xF0 == AFTERTOUCH:
+            return self.data1
+        return self.data2
+
+    @property
+    def is_note(self):
+        return self.status & 0xE0 == NOTE_OFF
+
+    def bytes(self):
+        if self.status & 0xF0 in (PROGRAM_CHANGE, AFTERTOUCH):
+            return [self.status, self.data1]
+        return [self.status, self.data1, self.data2]
+
+    def copy(self, time=0):
+        """Mirror ``mido.Message.copy(time=0)``; packed events never carry a delta time."""
+        return PackedMidiEvent(self.status, self.data1, self.data2, self.timestamp, self.source)
+
+    def to_mido(self):
+        return mido.Message.from_bytes(self.bytes())
+
+    def __str__(self):
+        kind = self.status & 0xF0
+        channel = self.status & 0x0F
+        if kind == NOTE_ON or kind == NOTE_OFF:
+            return f"{STATUS_TYPES[kind]} channel={channel} note={self.data1} velocity={self.data2} time=0"
+        if kind == CONTROL_CHANGE:
+            return f"control_change channel={channel} control={self.data1} value={self.data2} time=0"
+        return str(self.to_mido())
+
+    def __repr__(self):
+        return f"PackedMidiEvent({self.status:#04x}, {self.data1}, {self.data2}, source={self.source!r})"
+
+
+def pack_midi_message(msg, timestamp=0.0, source=None):
+    """Pack ``msg`` for the live queues if it is a channel-voice ``mido.Message``; otherwise return it as is."""
+    if type(msg) is mido.Message:
+        packed = PackedMidiEvent.from_mido(msg, timestamp, source)
+        if packed is not None:
+            return packed
+    return msg
+
+
+def to_mido_message(msg):
+    """Return a ``mido.Message`` for ``msg``, unpacking ``PackedMidiEvent`` records."""
+    if type(msg) is PackedMidiEvent:
+        return msg.to_mido()
+    return msg
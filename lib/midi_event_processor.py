@@ -1,10 +1,14 @@
 import time
 import inspect
 
+import numpy as np
 from rpi_ws281x import Color
 
 from lib.functions import get_note_position
+from lib.led_timeline import TIMELINE_NOTE_OFF, TIMELINE_NOTE_ON
+from lib.light_modes import compile_light_mode
 from lib.log_setup import logger
+from lib.midi_event import CONTROL_CHANGE, NOTE_OFF, NOTE_ON, PackedMidiEvent
 
 # Import app_state to check practice_active flag
 try:
@@ -17,6 +21,39 @@ except ImportError:
 
 OFF_COLOR = Color(0, 0, 0)
 
+# Queue depth above which a frame's backlog is collapsed to the final state per key
+COALESCE_BACKLOG_DEPTH = 256
+
+
+def superseded_note_events(batch):
+    """
+    Indices of note events in ``batch`` that a later note-on for the same key overrides.
+
+    Everything for a key before its last note-on only changes LEDs that the note-on then
+    redraws, so on/off/on within one frame renders as the final note-on (plus a trailing
+    note-off, if there is one). Control changes are never superseded.
+    """
+    superseded = set()
+    pressed_later = set()
+    for index in range(len(batch) - 1, -1, -1):
+        msg = batch[index][0]
+        if type(msg) is PackedMidiEvent:
+            kind = msg.status & 0xF0
+            if kind != NOTE_ON and kind != NOTE_OFF:
+                continue
+            is_note_on = kind == NOTE_ON and msg.data2 > 0
+        else:
+            msg_type = getattr(msg, "type", None)
+            if msg_type not in ("note_on", "note_off"):
+                continue
+            is_note_on = msg_type == "note_on" and getattr(msg, "velocity", 0) > 0
+        note = msg.note
+        if note in pressed_later:
+            superseded.add(index)
+        elif is_note_on:
+            pressed_later.add(note)
+    return superseded
+
 
 class MIDIEventProcessor:
     """
@@ -37,6 +74,21 @@ class MIDIEventProcessor:
         self._state_manager_accepts_midi_activity_time = None
         # Time tracking for sequence advancement to prevent rapid triggering
         self.last_sequence_advance = 0
+        # Ingest timestamps of live events handled since the last frame, for MIDI-in -> LED latency
+        self.unrendered_timestamps = []
+        self.light_mode = None
+        self.midi_logging_enabled = False
+        self.refresh_settings()
+
+    def refresh_settings(self, light_mode=None):
+        """
+        Recompile the light mode and re-read ``midi_logging``.
+
+        Called on startup and whenever the visualizer sees the LED settings change; the
+        per-event path only reads these snapshots.
+        """
+        self.light_mode = light_mode if light_mode is not None else compile_light_mode(self.ledsettings)
+        self.midi_logging_enabled = self.usersettings.snapshot().get("midi_logging") == 1
 
     def process_midi_events(self):
         """
@@ -59,8 +111,9 @@ class MIDIEventProcessor:
             # Process MIDI file playback
             self.midiports.midipending = self.midiports.midifile_queue
             queue_name = "midi_file"
+        led_timeline = getattr(self.midiports, "led_timeline", None) if queue_name == "midi_file" else None
 
-        midi_logging_enabled = int(self.usersettings.get_setting_value("midi_logging")) == 1
+        midi_logging_enabled = self.midi_logging_enabled
         log_sink = self.learning.socket_send if midi_logging_enabled else None
         midiports = self.midiports
         ledstrip = self.ledstrip
@@ -69,17 +122,19 @@ class MIDIEventProcessor:
         saving = self.saving
         handle_note_off = self.handle_note_off
         handle_note_on = self.handle_note_on
+        record_note_on = self.record_note_on
         handle_control_change = self.handle_control_change
         fallback_get_position = get_note_position
         ledstrip_get_position = getattr(ledstrip, "get_note_position", None)
         led_count = ledstrip.led_number
+        light_mode_enabled = self.light_mode.enabled
 
         # Process a bounded slice per frame to avoid jitter while preserving FIFO order.
         t0 = time.perf_counter()
         processed = 0
 
-        def _process_one(msg, msg_timestamp):
-            """Route one message exactly like before (LEDs/recording/color mode)."""
+        def _process_one(msg, msg_timestamp, visual=True):
+            """Route one message exactly like before (LEDs/recording/color mode); superseded ones are only logged and recorded."""
             if midi_logging_enabled and log_sink is not None and not getattr(msg, "is_meta", False):
                 try:
                     log_sink.append("midi_event" + str(msg))
@@ -92,23 +147,38 @@ class MIDIEventProcessor:
             if self.state_manager:
                 self._update_midi_activity(current_time)
 
-            msg_type = getattr(msg, "type", None)
-            velocity = getattr(msg, "velocity", 0)
+            if type(msg) is PackedMidiEvent:
+                # Live input: dispatch on the status nibble, no attribute lookups or string compares
+                kind = msg.status & 0xF0
+                is_note = kind == NOTE_ON or kind == NOTE_OFF
+                is_note_off = kind == NOTE_OFF or msg.data2 == 0
+                is_control_change = kind == CONTROL_CHANGE
+            else:
+                msg_type = getattr(msg, "type", None)
+                is_note = msg_type in ("note_on", "note_off")
+                is_note_off = msg_type == "note_off" or getattr(msg, "velocity", 0) == 0
+                is_control_change = msg_type == "control_change"
 
-            if ledsettings.mode != "Disabled" and msg_type in ("note_on", "note_off"):
+            if is_note and light_mode_enabled:
                 if callable(ledstrip_get_position):
                     note_position = ledstrip_get_position(msg.note, ledsettings)
                 else:
                     note_position = fallback_get_position(msg.note, ledstrip, ledsettings)
                 if 0 <= note_position < led_count:
-                    if msg_type == "note_off" or velocity == 0:
+                    if not visual:
+                        if not is_note_off:
+                            record_note_on(msg, msg_timestamp, note_position)
+                        elif saving.is_recording:
+                            saving.add_track("note_off", msg.note, 0, msg_timestamp)
+                    elif is_note_off:
                         handle_note_off(msg, msg_timestamp, note_position)
-                    elif velocity > 0:
+                    else:
                         handle_note_on(msg, msg_timestamp, note_position)
-            elif msg_type == "control_change":
+            elif is_control_change:
                 handle_control_change(msg, msg_timestamp)
 
-            color_mode.MidiEvent(msg, None, ledstrip)
+            if visual:
+                color_mode.MidiEvent(msg, None, ledstrip)
             saving.restart_time()
 
         midipending = midiports.midipending
@@ -120,6 +190,13 @@ class MIDIEventProcessor:
         diagnostics = midiports._ensure_runtime_diagnostics()
         diagnostics.set_metadata("selected_midi_queue", queue_name)
         diagnostics.set_gauge("midi_queue_depth_before", queue_depth)
+        baked = 0
+        if led_timeline is not None:
+            baked = self.process_led_timeline(led_timeline, t0)
+            if baked:
+                diagnostics.increment_counter("led_timeline_entries_applied_total", baked)
+        track_latency = queue_name == "live_input"
+        unrendered_timestamps = self.unrendered_timestamps
         is_active_use = bool(self.state_manager and self.state_manager.is_active_use())
         max_messages = 1536 if is_active_use else 512
         max_duration = 0.008 if is_active_use else 0.003
@@ -134,6 +211,20 @@ class MIDIEventProcessor:
             max_messages = min(max(max_messages, queue_depth), 2048)
             max_duration = max(max_duration, 0.01 if is_active_use else 0.006)
 
+        if queue_depth > COALESCE_BACKLOG_DEPTH:
+            # Take the whole backlog in one go and only draw each key's final state
+            if queues is not None:
+                batch = queues.drain_queue(midipending)
+            else:
+                batch = [midipending.popleft() for _ in range(queue_depth)]
+            superseded = superseded_note_events(batch)
+            for index, (msg, msg_timestamp) in enumerate(batch):
+                _process_one(msg, msg_timestamp, index not in superseded)
+            processed = len(batch)
+            if track_latency:
+                unrendered_timestamps.extend([msg_timestamp for _, msg_timestamp in batch])
+            diagnostics.increment_counter("midi_events_coalesced_total", len(superseded))
+
         while processed < max_messages and (time.perf_counter() - t0) < max_duration:
             if queues is not None:
                 batch = queues.drain_queue(
@@ -148,14 +239,61 @@ class MIDIEventProcessor:
             for msg, msg_timestamp in batch:
                 _process_one(msg, msg_timestamp)
                 processed += 1
+            if track_latency:
+                unrendered_timestamps.extend([msg_timestamp for _, msg_timestamp in batch])
         diagnostics.increment_counter("midi_events_processed_total", processed)
         diagnostics.set_gauge("midi_events_processed_last", processed)
         if queues is not None:
             diagnostics.set_gauge("midi_queue_depth_after", queues.queue_depth(midipending))
         else:
             diagnostics.set_gauge("midi_queue_depth_after", len(midipending))
-        self.midiports.refresh_queue_diagnostics()
-        return processed > 0
+        return processed > 0 or baked > 0
+
+    def process_led_timeline(self, led_timeline, now):
+        """
+        Apply the baked file-playback entries due by ``now``; returns how many were applied.
+
+        Positions and colors come from the timeline, so this skips the queue, the per-event
+        dispatch and the color mode, and goes straight to the note and control handlers.
+        """
+        batch = led_timeline.take_due(now)
+        if not batch:
+            return 0
+        start_perf = led_timeline.start_perf
+        log_sink = self.learning.socket_send if self.midi_logging_enabled else None
+        light_mode_enabled = self.light_mode.enabled
+        light_note_on = self.light_note_on
+        handle_note_off = self.handle_note_off
+        handle_control_change = self.handle_control_change
+        for due_s, kind, msg, note_position, color in batch:
+            if log_sink is not None:
+                try:
+                    log_sink.append("midi_event" + str(msg))
+                except Exception as e:
+                    logger.warning(f"[process led timeline] Unexpected exception occurred: {e}")
+            msg_timestamp = start_perf + due_s
+            if kind == TIMELINE_NOTE_ON:
+                if light_mode_enabled:
+                    light_note_on(msg, msg_timestamp, note_position, color)
+            elif kind == TIMELINE_NOTE_OFF:
+                if light_mode_enabled:
+                    handle_note_off(msg, msg_timestamp, note_position)
+            else:
+                handle_control_change(msg, msg_timestamp)
+
+        current_time = time.time()
+        self.midiports.last_activity = current_time
+        if self.state_manager:
+            self._update_midi_activity(current_time)
+        self.saving.restart_time()
+        return len(batch)
+
+    def take_unrendered_timestamps(self):
+        """Hand over the ingest timestamps of live events processed since the previous call."""
+        timestamps = self.unrendered_timestamps
+        if timestamps:
+            self.unrendered_timestamps = []
+        return timestamps
 
     def _update_midi_activity(self, current_time):
         accepts_current_time = self._state_manager_accepts_midi_activity_time
@@ -216,31 +354,14 @@ class MIDIEventProcessor:
 
         # Check if sustain pedal is active for Velocity and Pedal modes
         pedal_deadzone = 10  # Standard MIDI deadzone for sustain pedal
-        sustain_active = (self.ledsettings.mode in ["Velocity", "Pedal"] and 
-                         self.last_sustain >= pedal_deadzone)
-
-        if sustain_active:
+        light_mode = self.light_mode
+        if light_mode.holds_sustain and self.last_sustain >= pedal_deadzone:
             # Mark note as sustained instead of turning off
             self.ledstrip.keylist_sustained[note_position] = 1
         else:
-            # Apply different effects based on the current LED mode
-            if self.ledsettings.mode == "Fading":
-                # Set to fading state (1000+ indicates fading)
-                self.ledstrip.keylist[note_position] = 1000
-            elif self.ledsettings.mode == "Normal":
-                # Standard mode - full brightness while key is pressed
-                self.ledstrip.keylist[note_position] = 0
-            elif self.ledsettings.mode == "Pulse":
-                # Find the active pulse for this note and trigger release
-                for pulse in self.ledstrip.active_pulses:
-                    if pulse["position"] == note_position and pulse.get("state") != "release":
-                        pulse["state"] = "release"
-                        pulse["release_time"] = time.perf_counter()
-                        # Keep the pulse active in the list so led_effects_processor handles the animation
-                        # We don't set keylist to 0 because the pulse effect handles the LED status
-            elif self.ledsettings.mode == "Pedal":
-                # Gradually reduce brightness based on pedal settings
-                self.ledstrip.keylist[note_position] *= (100 - self.ledsettings.fadepedal_notedrop) / 100
+            light_mode.note_off(self.ledstrip, note_position)
+
+        self._sync_active_key(note_position)
 
         # If LED is completely off, set appropriate color
         if self.ledstrip.keylist[note_position] <= 0:
@@ -263,10 +384,35 @@ class MIDIEventProcessor:
             msg_timestamp: Timestamp when the message was received
             note_position: Position on the LED strip corresponding to the note
         """
-        velocity = msg.velocity
-
         # Get color from color mode handler
         color = self.color_mode.NoteOn(msg, msg_timestamp, None, note_position)
+        self.light_note_on(msg, msg_timestamp, note_position, color)
+
+    def record_note_on(self, msg, msg_timestamp, note_position):
+        """
+        The part of ``handle_note_on`` that does not draw: the color mode lookup (which
+        advances Multicolor and Speed state) and the recording.
+
+        Used for note-ons of a coalesced backlog that a later event on the same key hides.
+        """
+        color = self.color_mode.NoteOn(msg, msg_timestamp, None, note_position)
+        if not self.saving.is_recording:
+            return
+        if self._is_external_software_channel(msg) and self.light_mode.lights_external_notes:
+            color = self._hand_color(msg)
+        elif color is None:
+            color = (0, 0, 0)
+        self._record_note_on(msg, msg_timestamp, color)
+
+    def light_note_on(self, msg, msg_timestamp, note_position, color):
+        """
+        Light a pressed key in ``color`` (an RGB tuple, or None for off).
+
+        The part of ``handle_note_on`` after the color mode lookup; baked file playback
+        calls it with the color computed at play start.
+        """
+        velocity = msg.velocity
+
         if color is not None:
             red, green, blue = color
         else:
@@ -279,73 +425,55 @@ class MIDIEventProcessor:
         self.ledstrip.keylist_status[note_position] = 1
         self.ledstrip.keylist_sustained[note_position] = 0
         
-        # Calculate brightness based on velocity if in velocity mode
-        if self.ledsettings.mode == "Velocity":
-            brightness = velocity / 127.0  # Linear mapping: 0-127 velocity -> 0-1 brightness
-        else:
-            brightness = 1
-
-        # Apply different effects based on the current LED mode
-        if self.ledsettings.mode == "Fading":
-            # 1001 indicates the key is active and will start fading when released
-            self.ledstrip.keylist[note_position] = 1001
-        elif self.ledsettings.mode == "Velocity":
-            # Brightness varies with velocity (999 * brightness for linear scaling)
-            self.ledstrip.keylist[note_position] = 999 * brightness
-        elif self.ledsettings.mode == "Normal":
-            # Standard mode - full brightness while key is pressed
-            self.ledstrip.keylist[note_position] = 1000
-        elif self.ledsettings.mode == "Pedal":
-            # For pedal mode, start at 999 (will be affected by pedal status)
-            self.ledstrip.keylist[note_position] = 999
-        elif self.ledsettings.mode == "Pulse":
-            # Create a new pulse effect
-            self.ledstrip.active_pulses.append({
-                "position": note_position,
-                "color": (red, green, blue),
-                "start_time": time.perf_counter(),
-                "velocity": velocity / 127.0,
-                "state": "attack",
-                "release_time": None
-            })
-            self.ledstrip.keylist[note_position] = 0  # Pulse handles lighting
+        # Set the key level for the current light mode (velocity mode also scales brightness)
+        light_mode = self.light_mode
+        brightness = light_mode.note_on(self.ledstrip, note_position, velocity, (red, green, blue))
+
+        self._sync_active_key(note_position)
 
         # Handle special channels for hand coloring (channels 11 and 12)
         if self._is_external_software_channel(msg):
             # Mark this LED as externally controlled by external software
             self.ledstrip.keylist_external_software[note_position] = 1
-            if self.ledsettings.skipped_notes != "Finger-based":
+            if light_mode.lights_external_notes:
                 # Apply right hand or left hand color
-                if self._is_right_hand_channel(msg):
-                    hand_color = self.learning.hand_colorR
-                else:
-                    hand_color = self.learning.hand_colorL
-
-                red, green, blue = map(int, self.learning.hand_colorList[hand_color])
+                red, green, blue = self._hand_color(msg)
                 s_color = Color(red, green, blue)
                 self.ledstrip.strip.setPixelColor(note_position, s_color)
-                self.ledstrip.set_adjacent_colors(note_position, s_color, False)
+                if light_mode.draws_adjacent:
+                    self.ledstrip.set_adjacent_colors(note_position, s_color, False)
         else:
             # Normal channel is taking control - clear external software flag
             if self.ledstrip.keylist_external_software[note_position] == 1:
                 self.ledstrip.keylist_external_software[note_position] = 0
             
-            if self.ledsettings.skipped_notes != "Normal":
+            if light_mode.lights_local_notes:
                 # Apply standard note color with velocity-based brightness
                 s_color = Color(int(int(red) / float(brightness)), int(int(green) / float(brightness)),
                                 int(int(blue) / float(brightness)))
                 self.ledstrip.strip.setPixelColor(note_position, s_color)
-                self.ledstrip.set_adjacent_colors(note_position, s_color, False)
+                if light_mode.draws_adjacent:
+                    self.ledstrip.set_adjacent_colors(note_position, s_color, False)
 
         # Record the note-on event if recording is active
         if self.saving.is_recording:
-            if self.ledsettings.color_mode == "Multicolor":
-                import webcolors as wc
-                # Include color information in multicolor mode
-                self.saving.add_track("note_on", msg.note, velocity, msg_timestamp,
-                                      wc.rgb_to_hex((red, green, blue)))
-            else:
-                self.saving.add_track("note_on", msg.note, velocity, msg_timestamp)
+            self._record_note_on(msg, msg_timestamp, (red, green, blue))
+
+    def _hand_color(self, msg):
+        """The learning hand color (RGB ints) for a note on external channel 11 or 12."""
+        if self._is_right_hand_channel(msg):
+            hand_color = self.learning.hand_colorR
+        else:
+            hand_color = self.learning.hand_colorL
+        return tuple(map(int, self.learning.hand_colorList[hand_color]))
+
+    def _record_note_on(self, msg, msg_timestamp, color):
+        if self.light_mode.records_note_color:
+            import webcolors as wc
+            # Include color information in multicolor mode
+            self.saving.add_track("note_on", msg.note, msg.velocity, msg_timestamp, wc.rgb_to_hex(color))
+        else:
+            self.saving.add_track("note_on", msg.note, msg.velocity, msg_timestamp)
 
     def handle_control_change(self, msg, msg_timestamp):
         """
@@ -367,16 +495,23 @@ class MIDIEventProcessor:
             
             # Handle sustain pedal release - clear all sustained notes
             pedal_deadzone = 10  # Standard MIDI deadzone for sustain pedal
-            if value < pedal_deadzone and self.ledsettings.mode in ["Velocity", "Pedal"]:
+            if value < pedal_deadzone and self.light_mode.holds_sustain:
                 idle_color, use_backlight = self._resolve_idle_color()
-                for i, sustained in enumerate(self.ledstrip.keylist_sustained):
-                    if sustained == 1:
-                        # Clear sustained status
-                        self.ledstrip.keylist_sustained[i] = 0
-                        # If key is not currently pressed, turn it off
-                        if self.ledstrip.keylist_status[i] == 0:
-                            self.ledstrip.keylist[i] = 0  # Turn off immediately
-                            self._apply_idle_color(i, idle_color, use_backlight)
+                keylist_sustained = self.ledstrip.keylist_sustained
+                if isinstance(keylist_sustained, np.ndarray):
+                    sustained_leds = np.flatnonzero(keylist_sustained == 1).tolist()
+                else:
+                    sustained_leds = [i for i, sustained in enumerate(keylist_sustained) if sustained == 1]
+                active_keys = getattr(self.ledstrip, "active_keys", None)
+                for i in sustained_leds:
+                    # Clear sustained status
+                    keylist_sustained[i] = 0
+                    # If key is not currently pressed, turn it off
+                    if self.ledstrip.keylist_status[i] == 0:
+                        self.ledstrip.keylist[i] = 0  # Turn off immediately
+                        if active_keys is not None:
+                            active_keys.discard(i)
+                        self._apply_idle_color(i, idle_color, use_backlight)
 
         current_time = time.time()
         # Handle sequence advancement based on control values
@@ -402,18 +537,25 @@ class MIDIEventProcessor:
         if self.saving.is_recording:
             self.saving.add_control_change("control_change", 0, control, value, msg_timestamp)
 
+    def _sync_active_key(self, note_position):
+        """Keep the ledstrip's active-LED index in step with keylist after a note changed it."""
+        active_keys = getattr(self.ledstrip, "active_keys", None)
+        if active_keys is None:
+            return
+        if self.ledstrip.keylist[note_position] > 0:
+            active_keys.add(note_position)
+        else:
+            active_keys.discard(note_position)
+
     def _resolve_idle_color(self):
         """Compute the color to apply when a key returns to its idle state."""
-        if self.ledsettings.backlight_brightness > 0 and not self.menu.screensaver_is_running:
-            scale = self.ledsettings.backlight_brightness_percent / 100.0
-            return Color(
-                int(self.ledsettings.backlight_red * scale),
-                int(self.ledsettings.backlight_green * scale),
-                int(self.ledsettings.backlight_blue * scale),
-            ), True
+        idle_color = self.light_mode.idle_color
+        if idle_color is not None and not self.menu.screensaver_is_running:
+            return idle_color, True
         return OFF_COLOR, False
 
     def _apply_idle_color(self, note_position, color_value, is_backlight):
         """Apply either the backlight color or switch LEDs off for a key."""
         self.ledstrip.strip.setPixelColor(note_position, color_value)
-        self.ledstrip.set_adjacent_colors(note_position, color_value, True if is_backlight else False)
+        if self.light_mode.draws_adjacent:
+            self.ledstrip.set_adjacent_colors(note_position, color_value, True if is_backlight else False)
@@ -4,17 +4,20 @@ from enum import Enum
 
 import mido
 
+from lib.compiled_song_cache import load_compiled_song
 from lib.functions import clear_ledstrip_state, fastColorWipe
+from lib.led_timeline import bake_led_timeline
 from lib.log_setup import logger
 from lib.reliable_midi_playback_client import (
     DEFAULT_START_DELAY_MS,
     ReliableMidiPlaybackClient,
     ReliablePlaybackError,
-    compile_midi_messages,
 )
 
 
 NATIVE_RTP_START_DELAY_MS = 100
+# Baked playback keeps its timeline published this long past the song end for the last note-offs
+LED_TIMELINE_DRAIN_S = 0.1
 
 
 class PlaybackState(str, Enum):
@@ -36,6 +39,10 @@ class MidiPlaybackScheduler:
         self.stop_event = threading.Event()
         self._lock = threading.RLock()
         self.reliable_client_factory = reliable_client_factory or ReliableMidiPlaybackClient.from_settings
+        # One client per reliable_midi_host/port, so its address cache and connection outlive a song
+        self._reliable_client = None
+        self._reliable_client_key = None
+        self._probe_reliable = False
         self._reliable_handle = None
         self.playback_mode = None
         self.last_error = None
@@ -90,8 +97,7 @@ class MidiPlaybackScheduler:
             fastColorWipe(self.ledstrip.strip, True, self.ledsettings)
 
         try:
-            mid = mido.MidiFile("Songs/" + song_path)
-            compiled = compile_midi_messages(mid)
+            compiled = load_compiled_song(song_path, base_dir="Songs")
             return self._play_reliable(song_path, compiled)
         except FileNotFoundError:
             self.state = PlaybackState.ERROR
@@ -119,9 +125,41 @@ class MidiPlaybackScheduler:
                 if self.state != PlaybackState.ERROR:
                     self.state = PlaybackState.STOPPED
 
+    def start_reliable_health_probe(self):
+        """Probe the reliable receiver in the background so play() knows up front whether to use it."""
+        self._probe_reliable = True
+        self._get_reliable_client()
+
+    def _get_reliable_client(self):
+        usersettings = self._usersettings()
+        key = None
+        if usersettings is not None:
+            key = (
+                usersettings.get_setting_value("reliable_midi_host"),
+                usersettings.get_setting_value("reliable_midi_port"),
+            )
+        with self._lock:
+            client = self._reliable_client
+            if client is None or key != self._reliable_client_key:
+                if client is not None and hasattr(client, "close"):
+                    client.close()
+                client = self.reliable_client_factory(usersettings)
+                self._reliable_client = client
+                self._reliable_client_key = key
+                if self._probe_reliable and hasattr(client, "start_health_probe"):
+                    client.start_health_probe()
+        return client
+
     def _play_reliable(self, song_path, compiled):
         try:
-            client = self.reliable_client_factory(self._usersettings())
+            client = self._get_reliable_client()
+            if getattr(client, "available", None) is False:
+                # The health probe already found the receiver down; skip the connect timeout,
+                # but have it look again so a receiver that came back is used for the next song
+                request_probe = getattr(client, "request_probe", None)
+                if callable(request_probe):
+                    request_probe()
+                raise ReliablePlaybackError(getattr(client, "last_error", None) or "Reliable MIDI receiver unavailable")
             handle = client.play_events(song_path, compiled, start_delay_ms=DEFAULT_START_DELAY_MS)
             with self._lock:
                 if self.stop_event.is_set() or self.state != PlaybackState.RUNNING:
@@ -237,6 +275,11 @@ class MidiPlaybackScheduler:
         return True
 
     def _play_local_events(self, song_path, compiled, start_perf):
+        led_timeline = self._bake_led_timeline(song_path, compiled)
+        if led_timeline is not None:
+            self._play_led_timeline(song_path, led_timeline, start_perf)
+            return
+
         index = 0
         local_messages = compiled.local_messages
         while index < len(local_messages):
@@ -262,6 +305,44 @@ class MidiPlaybackScheduler:
                     self._enqueue_file_message(message.copy(time=0), due_time)
                 index += 1
 
+    def _bake_led_timeline(self, song_path, compiled):
+        """Pre-render the song's LED changes when ``baked_led_playback`` is on; None plays it live."""
+        usersettings = self._usersettings()
+        if usersettings is None or self.ledstrip is None or self.ledsettings is None:
+            return None
+        if str(usersettings.get_setting_value("baked_led_playback")) != "1":
+            return None
+        try:
+            led_timeline = bake_led_timeline(
+                compiled,
+                self.ledstrip,
+                self.ledsettings,
+                getattr(self.midiports, "should_process_locally", None),
+            )
+        except Exception as e:
+            logger.warning(f"Could not bake LED timeline for {song_path}, playing live: {e}")
+            return None
+        if led_timeline is None:
+            logger.info("midi_playback baked=off song=%s reason=time-dependent color mode", song_path)
+        return led_timeline
+
+    def _play_led_timeline(self, song_path, led_timeline, start_perf):
+        """Publish ``led_timeline`` to the render thread and hold it until the song ends or stops."""
+        led_timeline.start_perf = start_perf
+        self.midiports.led_timeline = led_timeline
+        queues = getattr(self.midiports, "queues", None)
+        if queues is not None:
+            # Nothing is queued for the render thread to wake on; it paces itself by the timeline from here
+            queues.notify_input()
+        logger.info("midi_playback baked=on song=%s entries=%s", song_path, len(led_timeline))
+        try:
+            end_time = start_perf + led_timeline.duration_s + LED_TIMELINE_DRAIN_S
+            if self.stop_event.wait(max(0.0, end_time - time.perf_counter())):
+                logger.info("midi_playback transition=stopping song=%s", song_path)
+        finally:
+            if getattr(self.midiports, "led_timeline", None) is led_timeline:
+                self.midiports.led_timeline = None
+
     def _usersettings(self):
         return getattr(self.midiports, "usersettings", None)
 
@@ -275,6 +356,8 @@ class MidiPlaybackScheduler:
             self.midiports.midifile_queue.append((msg, timestamp))
 
     def _clear_file_queue(self):
+        if getattr(self.midiports, "led_timeline", None) is not None:
+            self.midiports.led_timeline = None
         if hasattr(self.midiports, "queues"):
             self.midiports.queues.clear_file()
         else:
@@ -4,6 +4,125 @@ import threading
 import time
 from collections import deque
 
+from lib.midi_event import CONTROL_CHANGE, NOTE_OFF, NOTE_ON, PackedMidiEvent
+
+
+class SpscRingQueue:
+    """
+    Single-producer/single-consumer FIFO with preallocated slots and no lock.
+
+    The producer writes a slot and then publishes it by advancing ``_tail``; the
+    consumer reads up to the published tail and advances ``_head``. Each index has a
+    single writer and both updates are plain attribute stores, which the GIL makes
+    atomic, so neither side ever blocks the other. When the ring is full items spill
+    into an overflow deque instead of being dropped; the producer keeps using the
+    overflow until the consumer has emptied it, so FIFO order holds across both.
+
+    Only one thread may append and only one thread may pop/drain.
+    """
+
+    __slots__ = ("_slots", "_mask", "_head", "_tail", "_overflow", "maxlen")
+
+    def __init__(self, capacity=4096):
+        size = 1
+        while size < max(2, int(capacity)):
+            size <<= 1
+        self._slots = [None] * size
+        self._mask = size - 1
+        self._head = 0
+        self._tail = 0
+        self._overflow = deque()
+        # Never drops: behaves like the unbounded deques for queue_with_policy.
+        self.maxlen = None
+
+    @property
+    def capacity(self):
+        return self._mask + 1
+
+    def __len__(self):
+        return (self._tail - self._head) + len(self._overflow)
+
+    def __bool__(self):
+        return self._tail != self._head or bool(self._overflow)
+
+    def __getitem__(self, index):
+        if index != 0:
+            raise IndexError("SpscRingQueue only supports peeking the oldest item")
+        head = self._head
+        if head != self._tail:
+            return self._slots[head & self._mask]
+        return self._overflow[0]
+
+    def peek(self):
+        """
+        The oldest item, or None when empty.
+
+        Unlike ``queue[0]`` this never raises, so a third thread (the diagnostics sampler)
+        can look while the consumer drains; the item it returns may just have been popped.
+        """
+        head = self._head
+        if head != self._tail:
+            return self._slots[head & self._mask]
+        try:
+            return self._overflow[0]
+        except IndexError:
+            return None
+
+    def append(self, item):
+        tail = self._tail
+        if self._overflow or tail - self._head > self._mask:
+            self._overflow.append(item)
+            return
+        self._slots[tail & self._mask] = item
+        self._tail = tail + 1
+
+    def popleft(self):
+        head = self._head
+        if head != self._tail:
+            index = head & self._mask
+            item = self._slots[index]
+            self._slots[index] = None
+            self._head = head + 1
+            return item
+        if self._overflow:
+            return self._overflow.popleft()
+        raise IndexError("pop from an empty SpscRingQueue")
+
+    def drain(self, max_messages=None):
+        """Pop up to ``max_messages`` items (all when None) in FIFO order."""
+        slots = self._slots
+        mask = self._mask
+        head = self._head
+        available = self._tail - head
+        if max_messages is not None and available > max_messages:
+            available = max_messages
+        start = head & mask
+        end = start + available
+        if end <= mask + 1:
+            drained = slots[start:end]
+            slots[start:end] = [None] * available
+        else:
+            # Wrapped: copy the tail end of the slot list, then the beginning.
+            end -= mask + 1
+            drained = slots[start:] + slots[:end]
+            slots[start:] = [None] * (mask + 1 - start)
+            slots[:end] = [None] * end
+        self._head = head + available
+
+        overflow = self._overflow
+        while overflow and (max_messages is None or len(drained) < max_messages):
+            drained.append(overflow.popleft())
+        return drained
+
+    def clear(self):
+        self.drain()
+
+    def __iter__(self):
+        head = self._head
+        for position in range(head, self._tail):
+            yield self._slots[position & self._mask]
+        yield from list(self._overflow)
+
 
 class MidiQueues:
     def __init__(
@@ -16,13 +135,22 @@ class MidiQueues:
         scheduled_forward_maxlen=4096,
         websocket_publish_maxlen=512,
         reserved_noteoff_slots=None,
+        spsc_live=False,
+        spsc_capacity=4096,
     ):
         # MIDI-bearing queues are intentionally unbounded: dropping here loses
         # musical state. The *_maxlen arguments remain accepted as capacity
         # hints for older callers/tests, but only non-critical UI queues are
         # bounded.
-        self.live_visualizer_queue = deque()
-        self.live_learning_queue = deque()
+        # With spsc_live the live consumers (visualizer, learning) read lock-free
+        # rings fed only by the MIDI input callback thread.
+        self.spsc_live = bool(spsc_live)
+        if self.spsc_live:
+            self.live_visualizer_queue = SpscRingQueue(spsc_capacity)
+            self.live_learning_queue = SpscRingQueue(spsc_capacity)
+        else:
+            self.live_visualizer_queue = deque()
+            self.live_learning_queue = deque()
         self.file_queue = deque()
         self.websocket_queue = deque()
         self.live_forward_queue = deque()
@@ -37,8 +165,18 @@ class MidiQueues:
         self.drop_counter = 0
         self.drop_counts = {}
         self._lock = threading.RLock()
+        # Bumped whenever a locally rendered input queue goes from empty to non-empty
+        self._input_condition = threading.Condition(threading.Lock())
+        self.input_sequence = 0
 
     def classify_message(self, msg):
+        if type(msg) is PackedMidiEvent:
+            kind = msg.status & 0xF0
+            if kind == NOTE_ON:
+                return "note_on" if msg.data2 else "note_off"
+            if kind == NOTE_OFF:
+                return "note_off"
+            return "control_change" if kind == CONTROL_CHANGE else "other"
         msg_type = getattr(msg, "type", None)
         if msg_type == "note_off":
             return "note_off"
@@ -80,10 +218,41 @@ class MidiQueues:
         queue.append(item)
         return True
 
+    def _signal_input(self):
+        with self._input_condition:
+            self.input_sequence += 1
+            self._input_condition.notify_all()
+
+    def notify_input(self):
+        """Wake ``wait_for_input`` callers for input that does not arrive through a queue (a baked LED timeline)."""
+        self._signal_input()
+
+    def wait_for_input(self, timeout, since):
+        """
+        Sleep up to ``timeout`` seconds unless new input arrives.
+
+        ``since`` is the ``input_sequence`` the caller read before it last drained its
+        queue. Returns True as soon as the live, websocket or file queue has gone from
+        empty to non-empty after that, False on timeout. Only the empty to non-empty
+        transition signals, so producers pay for the wakeup once per burst, and a queue
+        nobody drains cannot keep waking the caller.
+        """
+        with self._input_condition:
+            if self.input_sequence != since:
+                return True
+            self._input_condition.wait(timeout)
+            return self.input_sequence != since
+
     def enqueue_live(self, msg, timestamp=None):
         if timestamp is None:
             timestamp = time.perf_counter()
         item = (msg, timestamp)
+        if self.spsc_live:
+            self.live_visualizer_queue.append(item)
+            self.live_learning_queue.append(item)
+            if len(self.live_visualizer_queue) == 1:
+                self._signal_input()
+            return True
         with self._lock:
             queued_visualizer = self.queue_with_policy(
                 self.live_visualizer_queue,
@@ -98,25 +267,35 @@ class MidiQueues:
                 reserve_slots=self.reserved_noteoff_slots,
                 count_drops=False,
             )
-            return queued_visualizer or queued_learning
+            signal = queued_visualizer and len(self.live_visualizer_queue) == 1
+        if signal:
+            self._signal_input()
+        return queued_visualizer or queued_learning
 
     def enqueue_file(self, msg, timestamp=None):
         if timestamp is None:
             timestamp = time.perf_counter()
         with self._lock:
             self.file_queue.append((msg, timestamp))
-            return True
+            signal = len(self.file_queue) == 1
+        if signal:
+            self._signal_input()
+        return True
 
     def enqueue_websocket(self, msg, timestamp=None):
         if timestamp is None:
             timestamp = time.perf_counter()
         with self._lock:
-            return self.queue_with_policy(
+            queued = self.queue_with_policy(
                 self.websocket_queue,
                 (msg, timestamp),
                 "websocket_input",
                 reserve_slots=self._reserve_slots_for(self.websocket_queue),
             )
+            signal = queued and len(self.websocket_queue) == 1
+        if signal:
+            self._signal_input()
+        return queued
 
     def enqueue_all_live(self, msg, timestamp=None, source="rtp_rx", is_note=False):
         if timestamp is None:
@@ -124,14 +303,24 @@ class MidiQueues:
             
         item = (msg, timestamp)
         item_forward = (msg, timestamp, source)
-        
+
+        spsc_live = self.spsc_live
+        if spsc_live:
+            self.live_visualizer_queue.append(item)
+            self.live_learning_queue.append(item)
+            # Appended first, so a consumer that just emptied the ring either sees the item or gets woken
+            if len(self.live_visualizer_queue) == 1:
+                self._signal_input()
+
         with self._lock:
-            self.queue_with_policy(
-                self.live_visualizer_queue, item, "live", reserve_slots=self.reserved_noteoff_slots,
-            )
-            self.queue_with_policy(
-                self.live_learning_queue, item, "learning", reserve_slots=self.reserved_noteoff_slots, count_drops=False,
-            )
+            if not spsc_live:
+                if self.queue_with_policy(
+                    self.live_visualizer_queue, item, "live", reserve_slots=self.reserved_noteoff_slots,
+                ) and len(self.live_visualizer_queue) == 1:
+                    self._signal_input()
+                self.queue_with_policy(
+                    self.live_learning_queue, item, "learning", reserve_slots=self.reserved_noteoff_slots, count_drops=False,
+                )
             self.queue_with_policy(
                 self.live_forward_queue, item_forward, source, reserve_slots=self._reserve_slots_for(self.live_forward_queue),
             )
@@ -256,6 +445,8 @@ class MidiQueues:
             return self.websocket_publish_queue.popleft()
 
     def drain_queue(self, queue, max_messages=None):
+        if isinstance(queue, SpscRingQueue):
+            return queue.drain(max_messages)
         drained = []
         with self._lock:
             while queue and (max_messages is None or len(drained) < max_messages):
@@ -263,12 +454,16 @@ class MidiQueues:
         return drained
 
     def pop_queue(self, queue):
+        if isinstance(queue, SpscRingQueue):
+            return queue.popleft() if queue else None
         with self._lock:
             if not queue:
                 return None
             return queue.popleft()
 
     def queue_depth(self, queue):
+        if isinstance(queue, SpscRingQueue):
+            return len(queue)
         with self._lock:
             return len(queue)
 
@@ -1,3 +1,4 @@
+import contextlib
 import threading
 import time
 
@@ -5,6 +6,13 @@ import mido
 
 from lib import connectall
 from lib.midi_connection_manager import MidiConnectionManager
+from lib.midi_event import (
+    NOTE_OFF,
+    SYSTEM_STATUS_TYPES,
+    PackedMidiEvent,
+    pack_midi_message,
+    to_mido_message,
+)
 from lib.midi_queues import MidiQueues
 from lib.log_setup import logger
 from lib.midiport_resolver import (
@@ -38,6 +46,9 @@ IGNORED_RTP_MESSAGE_TYPES = frozenset(
     }
 )
 
+# Seconds between sampled queue depth/age diagnostics (peaks are per sample, not per message)
+QUEUE_DIAGNOSTICS_INTERVAL = 0.25
+
 
 def _get_cached_input_names():
     """Get input port names, using cache if available."""
@@ -86,9 +97,12 @@ class MidiPorts:
         self.usersettings = usersettings
         self.runtime_diagnostics = RuntimeDiagnostics()
 
-        # midi queues contain tuples (midi_msg, timestamp)
-        self.queues = MidiQueues()
+        # midi queues contain tuples (midi_msg, timestamp); live input goes through
+        # lock-free SPSC rings whose only producer is the MIDI input callback
+        self.queues = MidiQueues(spsc_live=True)
         self.midifile_queue = self.queues.file_queue
+        # Baked file playback (lib.led_timeline) published by the playback scheduler
+        self.led_timeline = None
         self.midi_queue = self.queues.live_visualizer_queue
         self.learning_midi_queue = self.queues.live_learning_queue
         self.websocket_midi_queue = self.queues.websocket_queue
@@ -134,6 +148,10 @@ class MidiPorts:
         self.websocket_publish_thread = None
         self.ignored_message_types = set(IGNORED_RTP_MESSAGE_TYPES)
         self._cached_ignored_set = frozenset(self.ignored_message_types)
+        self._cached_ignored_status = None
+        self._last_queue_diagnostics_sample = None
+        # Register live inputs on python-rtmidi's raw-bytes callback instead of mido's parser
+        self.raw_input_ingest = True
         self.forward_backoff_until = 0.0
         self.forward_condition = threading.Condition()
 
@@ -168,11 +186,20 @@ class MidiPorts:
         return port_is_present(actual_port, available_ports)
 
     def _queue_oldest_age_ms(self, queue, now_perf=None):
-        if not queue:
+        # The consumer threads may empty the queue at any point, so look once and
+        # treat "nothing there" from either form of peek as an empty queue
+        peek = getattr(queue, "peek", None)
+        if peek is not None:
+            oldest = peek()
+        else:
+            try:
+                oldest = queue[0]
+            except IndexError:
+                oldest = None
+        if oldest is None:
             return 0.0
         if now_perf is None:
             now_perf = time.perf_counter()
-        oldest = queue[0]
         if queue is self.scheduled_forward_queue and hasattr(self, "queues"):
             oldest = oldest[2]
         if not isinstance(oldest, tuple) or len(oldest) < 2:
@@ -182,6 +209,22 @@ class MidiPorts:
             return 0.0
         return max(0.0, (now_perf - timestamp) * 1000.0)
 
+    def sample_queue_diagnostics(self, now_perf=None):
+        """
+        Refresh queue depth/age diagnostics at most every ``QUEUE_DIAGNOSTICS_INTERVAL`` seconds.
+
+        The main loop calls this once per iteration; the MIDI, forwarding and publish paths do
+        no queue bookkeeping of their own, and the diagnostics endpoints refresh on demand.
+        """
+        if now_perf is None:
+            now_perf = time.perf_counter()
+        last_sample = getattr(self, "_last_queue_diagnostics_sample", None)
+        if last_sample is not None and now_perf - last_sample < QUEUE_DIAGNOSTICS_INTERVAL:
+            return False
+        self._last_queue_diagnostics_sample = now_perf
+        self.refresh_queue_diagnostics(now_perf=now_perf)
+        return True
+
     def refresh_queue_diagnostics(self, now_perf=None):
         diagnostics = self._ensure_runtime_diagnostics()
         if now_perf is None:
@@ -325,7 +368,6 @@ class MidiPorts:
             )
         if queued:
             self._notify_forward_worker()
-        self.refresh_queue_diagnostics(now_perf=msg_timestamp)
         return queued
 
     def schedule_rtp_message(self, msg, due_time, source="scheduled_forward", enqueued_at=None):
@@ -372,7 +414,6 @@ class MidiPorts:
         diagnostics.set_gauge("scheduled_rtp_next_due_in_ms", max(0.0, (due_time - enqueued_at) * 1000.0))
         if queued:
             self._notify_forward_worker()
-        self.refresh_queue_diagnostics(now_perf=enqueued_at)
         return queued
 
     def _format_websocket_midi_message(self, msg):
@@ -397,8 +438,8 @@ class MidiPorts:
         if hasattr(self, "queues"):
             live_item = self.queues.peek_live_forward()
             if live_item is not None:
-                msg = live_item[0]
-                sent = self._send_rtp_message(msg, send_started=now_perf)
+                msg, enqueued_at = live_item[0], live_item[1]
+                sent = self._send_rtp_message(msg, send_started=now_perf, enqueued_at=enqueued_at)
                 if sent:
                     self.queues.pop_live_forward()
                 else:
@@ -412,7 +453,6 @@ class MidiPorts:
                     due_time = next_item[2]
                     diagnostics = self._ensure_runtime_diagnostics()
                     diagnostics.set_gauge("scheduled_rtp_next_due_in_ms", max(0.0, (due_time - now_perf) * 1000.0))
-                    self.refresh_queue_diagnostics(now_perf=now_perf)
                 return False
 
             msg, _, due_time, _ = scheduled_item
@@ -424,8 +464,8 @@ class MidiPorts:
             return sent
 
         if self.live_forward_queue:
-            msg, _ = self.live_forward_queue[0]
-            sent = self._send_rtp_message(msg, send_started=now_perf)
+            msg, enqueued_at = self.live_forward_queue[0]
+            sent = self._send_rtp_message(msg, send_started=now_perf, enqueued_at=enqueued_at)
             if sent:
                 self.live_forward_queue.popleft()
             else:
@@ -439,7 +479,6 @@ class MidiPorts:
         if due_time > now_perf:
             diagnostics = self._ensure_runtime_diagnostics()
             diagnostics.set_gauge("scheduled_rtp_next_due_in_ms", max(0.0, (due_time - now_perf) * 1000.0))
-            self.refresh_queue_diagnostics(now_perf=now_perf)
             return False
 
         sent = self._send_rtp_message(msg, send_started=now_perf, scheduled_due_time=due_time)
@@ -449,7 +488,7 @@ class MidiPorts:
             self.forward_backoff_until = now_perf + 0.05
         return sent
 
-    def _send_rtp_message(self, msg, send_started=None, scheduled_due_time=None):
+    def _send_rtp_message(self, msg, send_started=None, scheduled_due_time=None, enqueued_at=None):
         port = self.playport
         if port is None:
             return False
@@ -457,7 +496,7 @@ class MidiPorts:
             send_started = time.perf_counter()
 
         try:
-            port.send(msg)
+            port.send(to_mido_message(msg))
             elapsed_seconds = time.perf_counter() - send_started
             elapsed_ms = elapsed_seconds * 1000.0
             self.forward_stats["live_sent"] += 1
@@ -466,9 +505,14 @@ class MidiPorts:
                 self.forward_stats["send_time_max_ms"] = elapsed_ms
             diagnostics = self._ensure_runtime_diagnostics()
             diagnostics.record_duration("rtp_send", elapsed_seconds)
+            diagnostics.record_latency("rtp_send", elapsed_seconds)
             diagnostics.increment_counter("rtp_send_calls")
+            if enqueued_at is not None:
+                # Live forward queue: MIDI-in (or enqueue) timestamp to the port send returning
+                diagnostics.record_latency("midi_in_to_rtp_send", send_started + elapsed_seconds - enqueued_at)
             if scheduled_due_time is not None:
                 late_ms = max(0.0, (send_started - scheduled_due_time) * 1000.0)
+                diagnostics.record_latency("scheduled_rtp_lateness", late_ms / 1000.0)
                 self.forward_stats["scheduled_sent"] += 1
                 self.forward_stats["scheduled_late_last_ms"] = late_ms
                 diagnostics.set_gauge("scheduled_rtp_last_late_ms", round(late_ms, 4))
@@ -477,13 +521,11 @@ class MidiPorts:
                     diagnostics.increment_counter("scheduled_rtp_late_messages")
                 if late_ms > self.forward_stats["scheduled_late_max_ms"]:
                     self.forward_stats["scheduled_late_max_ms"] = late_ms
-            self.refresh_queue_diagnostics(now_perf=send_started + elapsed_seconds)
             return True
         except Exception as e:
             self.forward_stats["live_send_errors"] += 1
             logger.debug(f"Skipping playport send: {e}")
             self._ensure_runtime_diagnostics().increment_counter("rtp_send_errors")
-            self.refresh_queue_diagnostics(now_perf=send_started)
             return False
 
     def _flush_websocket_publish_queue_once(self):
@@ -503,18 +545,15 @@ class MidiPorts:
             from webinterface import app_state, webinterface
 
             if not getattr(app_state, "practice_active", False):
-                self.refresh_queue_diagnostics()
                 return False
 
             midi_string = self._format_websocket_midi_message(msg)
             if midi_string is None:
-                self.refresh_queue_diagnostics()
                 return False
 
             if len(webinterface.websocket_midi_send) >= webinterface.websocket_midi_send.maxlen:
                 self.forward_stats["websocket_dropped"] += 1
                 self._ensure_runtime_diagnostics().increment_counter("websocket_publish_dropped")
-                self.refresh_queue_diagnostics()
                 return False
 
             webinterface.websocket_midi_send.append(midi_string)
@@ -523,11 +562,9 @@ class MidiPorts:
             diagnostics = self._ensure_runtime_diagnostics()
             diagnostics.record_duration("websocket_publish", elapsed_seconds)
             diagnostics.increment_counter("websocket_publish_calls")
-            self.refresh_queue_diagnostics()
             return True
         except Exception:
             self._ensure_runtime_diagnostics().increment_counter("websocket_publish_errors")
-            self.refresh_queue_diagnostics()
             return False
 
     def _live_forward_loop(self):
@@ -692,6 +729,36 @@ class MidiPorts:
             logger.warning("Failed to enable backend MIDI input filters: %s", e)
             return False
 
+    def _open_live_input(self, port_name):
+        if not getattr(self, "raw_input_ingest", False):
+            return mido.open_input(port_name, callback=self.msg_callback)
+        input_port = mido.open_input(port_name)
+        if not self._attach_raw_input_callback(input_port):
+            input_port.callback = self.msg_callback
+        return input_port
+
+    def _attach_raw_input_callback(self, input_port):
+        """Point the rtmidi backend straight at ``raw_msg_callback``, bypassing mido's parser."""
+        backend = getattr(input_port, "_rt", None)
+        set_callback = getattr(backend, "set_callback", None)
+        cancel_callback = getattr(backend, "cancel_callback", None)
+        if not callable(set_callback) or not callable(cancel_callback):
+            return False
+
+        try:
+            with getattr(input_port, "_callback_lock", None) or contextlib.nullcontext():
+                cancel_callback()
+                # Messages that arrived before the swap were parsed into mido's queue
+                pending = getattr(input_port, "_queue", None)
+                if pending is not None:
+                    for msg in pending.iterpoll():
+                        self.msg_callback(msg)
+                set_callback(self.raw_msg_callback)
+            return True
+        except Exception as e:
+            logger.warning("Failed to attach raw MIDI input callback, using mido parsing: %s", e)
+            return False
+
     def _notify_input_connected(self, port_name):
         callback = getattr(self, "on_input_connected", None)
         if not callable(callback):
@@ -735,7 +802,7 @@ class MidiPorts:
             return old_port is not None
 
         try:
-            self.inport = mido.open_input(selected_port, callback=self.msg_callback)
+            self.inport = self._open_live_input(selected_port)
             self._configure_input_backend_filters(self.inport)
             self.actual_input_port = selected_port
             logger.info("Input port active: %s", selected_port)
@@ -982,7 +1049,61 @@ class MidiPorts:
         ts = time.perf_counter()
         self.last_activity = time.time()
         
-        is_note = self._classify_message(msg) in ("note_on", "note_off")
+        # Pack channel-voice messages once here; the visualizer, learning and forward
+        # consumers all share the same record and only the port send converts back.
+        msg = pack_midi_message(msg, ts, "rtp_rx")
+        if type(msg) is PackedMidiEvent:
+            is_note = msg.is_note
+        else:
+            is_note = self._classify_message(msg) in ("note_on", "note_off")
+        self._enqueue_live_input(msg, ts, is_note)
+
+        # Skip costly diagnostics overhead during high throughput
+        if not hasattr(self, "queues"):
+            diagnostics = self._ensure_runtime_diagnostics()
+            diagnostics.increment_counter("midi_callback_calls")
+            diagnostics.record_duration("midi_callback", time.perf_counter() - callback_started)
+
+    def raw_msg_callback(self, msg_data, data=None):
+        """
+        python-rtmidi input callback; ``msg_data`` is ``(message_bytes, delta_time)``.
+
+        Ignored system messages are dropped on their status byte and channel-voice messages
+        are packed straight from the bytes, so neither pays for ``mido.Message`` parsing.
+        Anything else (sysex, MTC) goes through ``mido`` and ``msg_callback``.
+        """
+        raw = msg_data[0]
+        status = raw[0]
+        if status >= 0xF0:
+            if status in self._ignored_status_bytes():
+                self._increment_ignored(SYSTEM_STATUS_TYPES[status])
+                self._ensure_runtime_diagnostics().increment_counter("ignored_realtime_messages")
+                return
+            try:
+                msg = mido.Message.from_bytes(raw)
+            except ValueError:
+                return
+            self.msg_callback(msg)
+            return
+        if status < 0x80 or len(raw) < 2:
+            return
+
+        ts = time.perf_counter()
+        self.last_activity = time.time()
+        event = PackedMidiEvent(status, raw[1], raw[2] if len(raw) > 2 else 0, ts, "rtp_rx")
+        self._enqueue_live_input(event, ts, status & 0xE0 == NOTE_OFF)
+
+    def _ignored_status_bytes(self):
+        ignored_status = getattr(self, "_cached_ignored_status", None)
+        if ignored_status is None:
+            ignored_types = set(IGNORED_RTP_MESSAGE_TYPES) | set(getattr(self, "ignored_message_types", set()))
+            ignored_status = frozenset(
+                status for status, msg_type in SYSTEM_STATUS_TYPES.items() if msg_type in ignored_types
+            )
+            self._cached_ignored_status = ignored_status
+        return ignored_status
+
+    def _enqueue_live_input(self, msg, ts, is_note):
         if hasattr(self, "queues"):
             self.queues.enqueue_all_live(msg, timestamp=ts, source="rtp_rx", is_note=is_note)
             self._sync_queue_drop_counters()
@@ -999,13 +1120,6 @@ class MidiPorts:
                     reserve_slots=0,
                 )
 
-        # Skip costly diagnostics overhead during high throughput
-        if not hasattr(self, "queues"):
-            diagnostics = self._ensure_runtime_diagnostics()
-            diagnostics.increment_counter("midi_callback_calls")
-            diagnostics.record_duration("midi_callback", time.perf_counter() - callback_started)
-            self.refresh_queue_diagnostics(now_perf=ts)
-
     def add_websocket_midi_message(self, msg_string):
         """
         Parse a MIDI message string from websocket and add to websocket_midi_queue.
@@ -1076,7 +1190,6 @@ class MidiPorts:
             diagnostics = self._ensure_runtime_diagnostics()
             diagnostics.increment_counter("websocket_midi_messages")
             diagnostics.record_duration("websocket_midi_parse", time.perf_counter() - ts)
-            self.refresh_queue_diagnostics(now_perf=ts)
         except Exception as e:
             logger.warning(f"Error parsing websocket MIDI message: {msg_string}, error: {e}")
 
@@ -10,18 +10,44 @@ from pathlib import Path
 
 import mido
 
+from lib.log_setup import logger
 
 PROTOCOL_VERSION = 1
+# Streaming prepare: header, then windowed "chunk" frames acked by the receiver
+STREAMING_PROTOCOL_VERSION = 2
 DEFAULT_RELIABLE_MIDI_HOST = "oscmidi-rtp.local"
 DEFAULT_RELIABLE_MIDI_PORT = 5056
 DEFAULT_START_DELAY_MS = 500
 MAX_FRAME_BYTES = 64 * 1024 * 1024
+# Chunk payload encodings the client offers in the streaming header, preferred first
+CHUNK_ENCODING_BINARY = "varint-midi"
+CHUNK_ENCODING_JSON = "json"
+CHUNK_ENCODINGS = (CHUNK_ENCODING_BINARY, CHUNK_ENCODING_JSON)
+# Set in a frame's length prefix when the payload is a binary chunk rather than JSON
+BINARY_FRAME_FLAG = 0x80000000
+_BINARY_CHUNK = 0x01
+DEFAULT_STREAM_CHUNK_EVENTS = 512
+DEFAULT_STREAM_PREBUFFER_MS = 2000
+DEFAULT_RESOLUTION_TTL_S = 300.0
+# A host that did not resolve is not looked up again (another thread and mDNS query) for this long
+DEFAULT_NEGATIVE_RESOLUTION_TTL_S = 60.0
+DEFAULT_HEALTH_PROBE_INTERVAL_S = 10.0
+# While the receiver is unavailable the probe interval doubles up to this
+DEFAULT_HEALTH_PROBE_MAX_INTERVAL_S = 300.0
 
 
 class ReliablePlaybackError(RuntimeError):
     pass
 
 
+class _StreamingUnsupported(ReliablePlaybackError):
+    pass
+
+
+class _HeaderUnanswered(ReliablePlaybackError):
+    """Connected, but the receiver closed the connection or timed out instead of answering ``prepare``."""
+
+
 @dataclass
 class CompiledMidiPlayback:
     events: list
@@ -34,24 +60,28 @@ class CompiledMidiPlayback:
 
 
 class ReliablePlaybackHandle:
-    def __init__(self, sock, session_id, start_perf):
+    def __init__(self, sock, session_id, start_perf, on_finished=None):
         self.sock = sock
         self.session_id = session_id
         self.start_perf = start_perf
+        # Called with the socket when it can carry another session, or None once it is closed
+        self._on_finished = on_finished
         self._closed = False
 
     def wait_completed(self, timeout=None):
         if timeout is not None:
             self.sock.settimeout(timeout)
+        reusable = False
         try:
             response = _recv_frame(self.sock)
             if response.get("type") != "completed":
                 raise ReliablePlaybackError(f"Unexpected reliable playback response: {response!r}")
             if response.get("sessionId") != self.session_id:
                 raise ReliablePlaybackError("Reliable playback completed response has wrong session id")
+            reusable = True
             return response
         finally:
-            self.close()
+            self.close(reusable)
 
     def stop(self):
         if self._closed:
@@ -62,21 +92,184 @@ class ReliablePlaybackHandle:
             pass
         self.close()
 
-    def close(self):
+    def close(self, reusable=False):
         if self._closed:
             return
         self._closed = True
+        if reusable and self._on_finished is not None:
+            self._on_finished(self.sock)
+            return
+        _close_quietly(self.sock)
+        if self._on_finished is not None:
+            self._on_finished(None)
+
+
+class _EventStream:
+    """Send side of a streamed prepare: keeps at most ``window`` unacknowledged events in flight."""
+
+    def __init__(self, sock, session_id, compiled, chunk_events, window, encoding=CHUNK_ENCODING_JSON):
+        self.sock = sock
+        self.session_id = session_id
+        self.compiled = compiled
+        self.total = compiled.total
+        self.chunk_events = max(1, int(chunk_events))
+        self.window = max(1, int(window))
+        self.encoding = encoding
+        self.sent = 0
+        self.acked = 0
+        self.send_lock = threading.Lock()
+
+    @property
+    def complete(self):
+        return self.acked == self.total
+
+    def buffered_us(self):
+        """Due time of the last event the receiver has acknowledged (-1 before the first ack)."""
+        return _event_due_us(self.compiled, self.acked - 1) if self.acked else -1
+
+    def send_window(self):
+        while self.sent < self.total:
+            size = min(self.chunk_events, self.window - (self.sent - self.acked), self.total - self.sent)
+            if size <= 0:
+                return
+            first = self.sent
+            if self.encoding == CHUNK_ENCODING_BINARY:
+                payload = encode_binary_chunk(self.compiled, first, size)
+                with self.send_lock:
+                    _send_binary_frame(self.sock, payload)
+            else:
+                with self.send_lock:
+                    _send_frame(
+                        self.sock,
+                        {
+                            "type": "chunk",
+                            "sessionId": self.session_id,
+                            "first": first,
+                            "events": self.compiled.events[first:first + size],
+                        },
+                    )
+            self.sent = first + size
+
+    def on_ack(self, response):
+        if response.get("sessionId") != self.session_id:
+            raise ReliablePlaybackError("Reliable playback ack has wrong session id")
+        received = int(response.get("received", -1))
+        if received < self.acked or received > self.sent:
+            raise ReliablePlaybackError(f"Reliable playback acked {received} events, sent {self.sent}")
+        self.acked = received
+
+    def recv_ack(self):
+        response = _recv_frame(self.sock)
+        if response.get("type") != "ack":
+            raise ReliablePlaybackError(f"Unexpected reliable playback response: {response!r}")
+        self.on_ack(response)
+
+
+class StreamingPlaybackHandle(ReliablePlaybackHandle):
+    """
+    Handle for a session started before all events were sent.
+
+    A ``reliable-midi-stream`` thread sends the remaining chunks as acks open the window
+    and then waits for the ``completed`` reply; ``stop()`` ends the stream mid-song.
+    """
+
+    def __init__(self, sock, session_id, start_perf, stream, on_finished=None):
+        super().__init__(sock, session_id, start_perf, on_finished)
+        self._stream = stream
+        self._completed = None
+        self._error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._pump, name="reliable-midi-stream", daemon=True)
+        self._thread.start()
+
+    def _pump(self):
+        try:
+            # Acks and the completed reply can be a whole song apart; stop() unblocks by closing
+            self.sock.settimeout(None)
+            while True:
+                self._stream.send_window()
+                response = _recv_frame(self.sock)
+                kind = response.get("type")
+                if kind == "ack":
+                    self._stream.on_ack(response)
+                    continue
+                if kind != "completed":
+                    raise ReliablePlaybackError(f"Unexpected reliable playback response: {response!r}")
+                if response.get("sessionId") != self.session_id:
+                    raise ReliablePlaybackError("Reliable playback completed response has wrong session id")
+                self._completed = response
+                return
+        except Exception as e:
+            if not self._closed:
+                self._error = e
+        finally:
+            self._done.set()
+
+    def wait_completed(self, timeout=None):
+        reusable = False
+        try:
+            if not self._done.wait(timeout):
+                raise ReliablePlaybackError("Timed out waiting for reliable playback completion")
+            if self._error is not None:
+                raise self._error
+            if self._completed is None:
+                raise ReliablePlaybackError("Reliable playback connection closed")
+            reusable = True
+            return self._completed
+        finally:
+            self.close(reusable)
+
+    def stop(self):
+        if self._closed:
+            return
         try:
-            self.sock.close()
+            with self._stream.send_lock:
+                _send_frame(self.sock, {"type": "stop", "sessionId": self.session_id})
         except OSError:
             pass
+        self.close()
 
 
 class ReliableMidiPlaybackClient:
-    def __init__(self, host=DEFAULT_RELIABLE_MIDI_HOST, port=DEFAULT_RELIABLE_MIDI_PORT, timeout=2.0):
+    """
+    Client for the reliable playback receiver, meant to live as long as its host/port setting.
+
+    The resolved addresses are cached for ``resolution_ttl_s`` (a failed lookup for
+    ``negative_resolution_ttl_s``) and the connection of a completed session is kept open
+    for the next song. ``start_health_probe()`` keeps ``available`` current in the
+    background, so callers can skip a receiver that is down without waiting for the
+    connect timeout; it probes less and less often while the receiver stays away.
+    """
+
+    def __init__(self, host=DEFAULT_RELIABLE_MIDI_HOST, port=DEFAULT_RELIABLE_MIDI_PORT, timeout=2.0,
+                 streaming=True, chunk_events=DEFAULT_STREAM_CHUNK_EVENTS,
+                 prebuffer_ms=DEFAULT_STREAM_PREBUFFER_MS, encodings=CHUNK_ENCODINGS,
+                 resolution_ttl_s=DEFAULT_RESOLUTION_TTL_S,
+                 negative_resolution_ttl_s=DEFAULT_NEGATIVE_RESOLUTION_TTL_S):
         self.host = host or DEFAULT_RELIABLE_MIDI_HOST
         self.port = int(port or DEFAULT_RELIABLE_MIDI_PORT)
         self.timeout = float(timeout)
+        # Cleared when the receiver answers the streaming header with anything but "ready"
+        self.streaming = streaming
+        self.chunk_events = int(chunk_events)
+        self.prebuffer_ms = int(prebuffer_ms)
+        # The receiver picks one in its "ready" reply; receivers that do not know the key get JSON
+        self.encodings = tuple(encodings)
+        self.resolution_ttl_s = float(resolution_ttl_s)
+        self.negative_resolution_ttl_s = float(negative_resolution_ttl_s)
+        # True/False once the health probe has run, None while unknown
+        self.available = None
+        self.last_error = None
+        self._addresses = None
+        self._addresses_expire_at = 0.0
+        self._resolution_error = None
+        self._idle_sock = None
+        self._session_active = False
+        self._closed = False
+        self._pool_lock = threading.Lock()
+        self._probe_stop = threading.Event()
+        self._probe_wake = threading.Event()
+        self._probe_thread = None
 
     @classmethod
     def from_settings(cls, usersettings):
@@ -86,23 +279,228 @@ class ReliableMidiPlaybackClient:
         port = usersettings.get_setting_value("reliable_midi_port") or DEFAULT_RELIABLE_MIDI_PORT
         return cls(host=host, port=port)
 
+    def start_health_probe(self, interval_s=DEFAULT_HEALTH_PROBE_INTERVAL_S,
+                           max_interval_s=DEFAULT_HEALTH_PROBE_MAX_INTERVAL_S):
+        if self._probe_thread is not None:
+            return
+
+        def run():
+            delay = interval_s
+            while not self._probe_stop.is_set():
+                try:
+                    available = self.probe()
+                except Exception as e:
+                    logger.debug(f"Reliable MIDI health probe failed: {e}")
+                    available = False
+                # Back off while nothing answers, so an absent receiver costs little when idle
+                delay = min(delay * 2, max_interval_s) if available is False else interval_s
+                self._probe_wake.wait(delay)
+                self._probe_wake.clear()
+
+        self._probe_thread = threading.Thread(target=run, name="reliable-midi-health", daemon=True)
+        self._probe_thread.start()
+
+    def request_probe(self):
+        """Have the health probe run now instead of at the end of its (backed off) interval."""
+        self._probe_wake.set()
+
+    def probe(self):
+        """Check the receiver is reachable, keeping the connection for the next song; returns ``available``."""
+        with self._pool_lock:
+            if self._session_active:
+                return self.available
+            sock, self._idle_sock = self._idle_sock, None
+        if sock is not None and not _connection_is_idle(sock):
+            _close_quietly(sock)
+            sock = None
+        error = None
+        if sock is None:
+            try:
+                sock = self._connect()
+            except ReliablePlaybackError as e:
+                error = str(e)
+        available = error is None
+        if available != self.available:
+            logger.info(f"Reliable MIDI receiver {self.host}:{self.port} available={available} {error or ''}")
+        self.available = available
+        self.last_error = error
+        if sock is not None:
+            self._keep_idle(sock)
+        return available
+
+    def close(self):
+        self._probe_stop.set()
+        self._probe_wake.set()
+        with self._pool_lock:
+            self._closed = True
+            sock, self._idle_sock = self._idle_sock, None
+        if sock is not None:
+            _close_quietly(sock)
+
+    def _resolve(self):
+        now = time.monotonic()
+        if now < self._addresses_expire_at:
+            if self._resolution_error is not None:
+                raise ReliablePlaybackError(self._resolution_error)
+            if self._addresses is not None:
+                return self._addresses
+        try:
+            addresses = _resolve_addresses(self.host, self.port, self.timeout)
+        except ReliablePlaybackError as e:
+            self._addresses = None
+            self._resolution_error = str(e)
+            self._addresses_expire_at = now + self.negative_resolution_ttl_s
+            raise
+        self._addresses = addresses
+        self._resolution_error = None
+        self._addresses_expire_at = now + self.resolution_ttl_s
+        return addresses
+
+    def _connect(self):
+        addresses = self._resolve()
+        try:
+            return _create_connection(self.host, self.port, timeout=self.timeout, addresses=addresses)
+        except ReliablePlaybackError:
+            # A stale mDNS answer is resolved again on the next attempt rather than after the TTL
+            self._addresses = None
+            raise
+
+    def _open_session(self, header):
+        """Send a ``prepare`` header on the kept-alive connection or a new one; returns ``(sock, reply)``."""
+        with self._pool_lock:
+            sock, self._idle_sock = self._idle_sock, None
+            self._session_active = True
+        try:
+            if sock is not None:
+                if _connection_is_idle(sock):
+                    sock.settimeout(self.timeout)
+                    try:
+                        _send_frame(sock, header)
+                        return sock, _recv_frame(sock)
+                    except (OSError, ReliablePlaybackError):
+                        # The receiver dropped the kept-alive connection since the last song
+                        pass
+                _close_quietly(sock)
+            sock = self._connect()
+            sock.settimeout(self.timeout)
+            try:
+                _send_frame(sock, header)
+                return sock, _recv_frame(sock)
+            except (OSError, ReliablePlaybackError) as e:
+                _close_quietly(sock)
+                raise _HeaderUnanswered(f"No reply to the reliable playback prepare header: {e}") from e
+            except Exception:
+                _close_quietly(sock)
+                raise
+        except Exception:
+            self._session_finished(None)
+            raise
+
+    def _session_finished(self, sock):
+        with self._pool_lock:
+            self._session_active = False
+        if sock is not None:
+            self._keep_idle(sock)
+
+    def _keep_idle(self, sock):
+        with self._pool_lock:
+            if self._idle_sock is None and not self._closed:
+                self._idle_sock = sock
+                return
+        _close_quietly(sock)
+
     def play_events(self, song, compiled, start_delay_ms=DEFAULT_START_DELAY_MS):
+        """
+        Upload ``compiled`` and start it; returns a handle whose ``start_perf`` is the song start.
+
+        Streams the events and starts once the first ``prebuffer_ms`` are acknowledged,
+        falling back to a single ``prepare`` frame for receivers that only speak version 1.
+        """
+        if self.streaming:
+            try:
+                return self._play_streaming(song, compiled, start_delay_ms)
+            except _StreamingUnsupported as e:
+                logger.info(f"Reliable MIDI receiver does not stream, sending whole song: {e}")
+            # Only settle on version 1 once it worked, so a connection dropped for another
+            # reason does not turn streaming off for good
+            handle = self._play_prepared(song, compiled, start_delay_ms)
+            self.streaming = False
+            return handle
+        return self._play_prepared(song, compiled, start_delay_ms)
+
+    def _play_streaming(self, song, compiled, start_delay_ms):
         session_id = uuid.uuid4().hex
-        sock = _create_connection(self.host, self.port, timeout=self.timeout)
-        sock.settimeout(self.timeout)
         try:
-            _send_frame(
-                sock,
+            sock, response = self._open_session(
                 {
                     "type": "prepare",
-                    "version": PROTOCOL_VERSION,
+                    "version": STREAMING_PROTOCOL_VERSION,
                     "sessionId": session_id,
                     "song": song,
                     "total": compiled.total,
-                    "events": compiled.events,
+                    "streaming": True,
+                    "encodings": list(self.encodings),
+                }
+            )
+        except _HeaderUnanswered as e:
+            # Deployed version 1 receivers may drop the connection on a header they do not
+            # know, or wait for its missing events, instead of sending an error frame
+            raise _StreamingUnsupported(str(e)) from e
+        try:
+            if response.get("type") != "ready":
+                raise _StreamingUnsupported(f"Unexpected reliable playback response: {response!r}")
+            if response.get("sessionId") != session_id:
+                raise ReliablePlaybackError("Reliable playback ready response has wrong session id")
+
+            encoding = response.get("encoding") or CHUNK_ENCODING_JSON
+            if encoding != CHUNK_ENCODING_JSON and encoding not in self.encodings:
+                raise ReliablePlaybackError(f"Reliable playback receiver chose unsupported encoding {encoding!r}")
+            stream = _EventStream(
+                sock,
+                session_id,
+                compiled,
+                self.chunk_events,
+                response.get("window") or self.chunk_events,
+                encoding,
+            )
+            prebuffer_us = self.prebuffer_ms * 1000
+            while not stream.complete and stream.buffered_us() < prebuffer_us:
+                stream.send_window()
+                stream.recv_ack()
+
+            _send_frame(
+                sock,
+                {
+                    "type": "start",
+                    "sessionId": session_id,
+                    "startDelayMs": int(start_delay_ms),
                 },
             )
-            response = _recv_frame(sock)
+            return StreamingPlaybackHandle(
+                sock,
+                session_id,
+                time.perf_counter() + (int(start_delay_ms) / 1000.0),
+                stream,
+                self._session_finished,
+            )
+        except Exception:
+            _close_quietly(sock)
+            self._session_finished(None)
+            raise
+
+    def _play_prepared(self, song, compiled, start_delay_ms):
+        session_id = uuid.uuid4().hex
+        sock, response = self._open_session(
+            {
+                "type": "prepare",
+                "version": PROTOCOL_VERSION,
+                "sessionId": session_id,
+                "song": song,
+                "total": compiled.total,
+                "events": compiled.events,
+            }
+        )
+        try:
             if response.get("type") != "prepared":
                 raise ReliablePlaybackError(f"Unexpected reliable playback response: {response!r}")
             if response.get("sessionId") != session_id:
@@ -124,18 +522,16 @@ class ReliableMidiPlaybackClient:
                 sock,
                 session_id,
                 time.perf_counter() + (int(start_delay_ms) / 1000.0),
+                self._session_finished,
             )
         except Exception:
-            try:
-                sock.close()
-            except OSError:
-                pass
+            _close_quietly(sock)
+            self._session_finished(None)
             raise
 
 
-def _create_connection(host, port, timeout):
-    """Resolve and connect within a bounded time, including slow mDNS lookups."""
-    started = time.monotonic()
+def _resolve_addresses(host, port, timeout):
+    """Resolve within a bounded time, including slow mDNS lookups."""
     results = queue.Queue(maxsize=1)
 
     def resolve():
@@ -152,6 +548,14 @@ def _create_connection(host, port, timeout):
         raise ReliablePlaybackError(f"Timed out resolving {host}") from error
     if resolution_error is not None:
         raise ReliablePlaybackError(str(resolution_error)) from resolution_error
+    return addresses
+
+
+def _create_connection(host, port, timeout, addresses=None):
+    """Resolve (unless ``addresses`` are given) and connect within a bounded time."""
+    started = time.monotonic()
+    if addresses is None:
+        addresses = _resolve_addresses(host, port, timeout)
 
     last_error = None
     deadline = started + timeout
@@ -172,6 +576,29 @@ def _create_connection(host, port, timeout):
     raise ReliablePlaybackError(f"Timed out connecting to {host}:{port}")
 
 
+def _connection_is_idle(sock):
+    """True if a kept-alive connection is still open with nothing unread on it."""
+    try:
+        sock.setblocking(False)
+        try:
+            sock.recv(1, socket.MSG_PEEK)
+        finally:
+            sock.setblocking(True)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+    # Closed by the receiver, or holding a frame nobody asked for
+    return False
+
+
+def _close_quietly(sock):
+    try:
+        sock.close()
+    except OSError:
+        pass
+
+
 def compile_midi_file(path):
     return compile_midi_messages(mido.MidiFile(str(Path(path))))
 
@@ -195,10 +622,108 @@ def compile_midi_messages(mid):
     return CompiledMidiPlayback(events=events, local_messages=local_messages, total_delay_s=total_delay)
 
 
+def _event_due_us(compiled, index):
+    due_us = getattr(compiled, "due_us", None)
+    if due_us is not None:
+        return due_us[index]
+    return compiled.events[index]["dueUs"]
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_binary_chunk(compiled, first, count):
+    """
+    Encode events ``first`` to ``first + count - 1`` as a binary chunk payload.
+
+    Layout: kind byte, varint ``first``, varint ``count``, then per event a varint
+    ``dueUs`` delta from the previous event in the chunk (the first is absolute), a
+    varint byte length and the raw MIDI bytes. A note message takes 5-7 bytes instead
+    of ~40 as JSON. ``PackedMidiPlayback`` songs are encoded straight from their arrays.
+    """
+    out = bytearray((_BINARY_CHUNK,))
+    _write_varint(out, first)
+    _write_varint(out, count)
+    previous = 0
+    due_us = getattr(compiled, "due_us", None)
+    if due_us is not None:
+        offsets = compiled.offsets
+        data = compiled.data
+        append = out.append
+        for index in range(first, first + count):
+            due = due_us[index]
+            delta = due - previous
+            previous = due
+            # Single-byte varints (deltas under 128 us, every channel message) skip the loop
+            if delta < 0x80:
+                append(delta)
+            else:
+                _write_varint(out, delta)
+            start = offsets[index]
+            end = offsets[index + 1]
+            size = end - start
+            if size < 0x80:
+                append(size)
+            else:
+                _write_varint(out, size)
+            out += data[start:end]
+    else:
+        for event in compiled.events[first:first + count]:
+            due = event["dueUs"]
+            _write_varint(out, due - previous)
+            previous = due
+            raw = event["data"]
+            _write_varint(out, len(raw))
+            out += bytes(raw)
+    return bytes(out)
+
+
+def decode_binary_chunk(payload):
+    """Decode ``encode_binary_chunk`` output into the JSON ``chunk`` frame it stands for."""
+    if not payload or payload[0] != _BINARY_CHUNK:
+        raise ReliablePlaybackError("Unknown binary reliable playback frame")
+    try:
+        first, pos = _read_varint(payload, 1)
+        count, pos = _read_varint(payload, pos)
+        events = []
+        due = 0
+        for seq in range(first, first + count):
+            delta, pos = _read_varint(payload, pos)
+            size, pos = _read_varint(payload, pos)
+            due += delta
+            events.append({"seq": seq, "dueUs": due, "data": list(payload[pos:pos + size])})
+            pos += size
+    except IndexError as error:
+        raise ReliablePlaybackError("Truncated binary reliable playback chunk") from error
+    if pos != len(payload):
+        raise ReliablePlaybackError("Malformed binary reliable playback chunk")
+    return {"type": "chunk", "first": first, "events": events}
+
+
+def _send_binary_frame(sock, payload):
+    sock.sendall(struct.pack(">I", len(payload) | BINARY_FRAME_FLAG) + payload)
+
+
 def _send_frame(sock, payload):
     data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
-    sock.sendall(struct.pack(">I", len(data)))
-    sock.sendall(data)
+    # One write per frame: a separate header write stalls on Nagle + delayed ACK for every chunk
+    sock.sendall(struct.pack(">I", len(data)) + data)
 
 
 def _recv_frame(sock):
@@ -206,9 +731,14 @@ def _recv_frame(sock):
     if not header:
         raise ReliablePlaybackError("Reliable playback connection closed")
     size = struct.unpack(">I", header)[0]
+    binary = size & BINARY_FRAME_FLAG
+    size &= ~BINARY_FRAME_FLAG
     if size > MAX_FRAME_BYTES:
         raise ReliablePlaybackError(f"Reliable playback frame too large: {size}")
-    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+    payload = _recv_exact(sock, size)
+    if binary:
+        return decode_binary_chunk(payload)
+    return json.loads(payload.decode("utf-8"))
 
 
 def _recv_exact(sock, size):
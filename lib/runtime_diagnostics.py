@@ -1,33 +1,179 @@
+import itertools
 import os
 import threading
+import weakref
+
+# Timing slot layout: [count, total_ms, max_ms, last_ms, last_sequence]
+_COUNT, _TOTAL_MS, _MAX_MS, _LAST_MS, _LAST_SEQ = range(5)
+
+# Latency histograms bucket microseconds HDR-style: exact below 32 us, then 16
+# log-spaced sub-buckets per power of two (<= 6.25% relative error) up to ~2 min.
+_HISTOGRAM_SUB_BUCKETS = 16
+_HISTOGRAM_BUCKETS = 24 * _HISTOGRAM_SUB_BUCKETS
+_HISTOGRAM_PERCENTILES = (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99), ("p999_ms", 0.999))
+
+
+def _latency_bucket(micros):
+    if micros < 2 * _HISTOGRAM_SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - 5
+    index = (shift + 1) * _HISTOGRAM_SUB_BUCKETS + (micros >> shift) - _HISTOGRAM_SUB_BUCKETS
+    return index if index < _HISTOGRAM_BUCKETS else _HISTOGRAM_BUCKETS - 1
+
+
+def _latency_bucket_upper_us(index):
+    if index < 2 * _HISTOGRAM_SUB_BUCKETS:
+        return index
+    shift = index // _HISTOGRAM_SUB_BUCKETS - 1
+    mantissa = index % _HISTOGRAM_SUB_BUCKETS + _HISTOGRAM_SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+def _histogram_summary(buckets, max_us):
+    count = sum(buckets)
+    summary = {"count": count, "max_ms": round(max_us / 1000.0, 4)}
+    targets = [(key, max(1, int(count * fraction + 0.999999))) for key, fraction in _HISTOGRAM_PERCENTILES]
+    seen = 0
+    target_index = 0
+    for index, bucket_count in enumerate(buckets):
+        if not bucket_count:
+            continue
+        seen += bucket_count
+        while target_index < len(targets) and seen >= targets[target_index][1]:
+            key = targets[target_index][0]
+            summary[key] = round(min(_latency_bucket_upper_us(index), max_us) / 1000.0, 4)
+            target_index += 1
+        if target_index == len(targets):
+            break
+    for key, _ in targets[target_index:]:
+        summary[key] = 0.0
+    return summary
+
+
+class _ThreadShard:
+    """Metrics written by one thread; only that thread mutates it, ``snapshot()`` merges."""
+
+    __slots__ = ("generation", "thread", "timings", "counters", "latencies")
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.thread = weakref.ref(threading.current_thread())
+        self.timings = {}
+        self.counters = {}
+        # name -> [bucket counts..., max_us]
+        self.latencies = {}
+
+    @property
+    def finished(self):
+        thread = self.thread()
+        return thread is None or not thread.is_alive()
+
+
+def _merge_shard(timings, counters, latencies, shard):
+    """Add ``shard``'s metrics to the merged ``timings``/``counters``/``latencies``."""
+    # list() copies in one step, so a writer adding a new metric cannot break iteration
+    for name, metric in list(shard.timings.items()):
+        count, total_ms, max_ms, last_ms, last_seq = metric
+        merged = timings.get(name)
+        if merged is None:
+            timings[name] = [count, total_ms, max_ms, last_ms, last_seq]
+            continue
+        merged[_COUNT] += count
+        merged[_TOTAL_MS] += total_ms
+        merged[_MAX_MS] = max(merged[_MAX_MS], max_ms)
+        if last_seq > merged[_LAST_SEQ]:
+            merged[_LAST_MS] = last_ms
+            merged[_LAST_SEQ] = last_seq
+    for name, counter in list(shard.counters.items()):
+        counters[name] = counters.get(name, 0) + counter[0]
+    for name, histogram in list(shard.latencies.items()):
+        merged = latencies.get(name)
+        if merged is None:
+            latencies[name] = list(histogram)
+            continue
+        for index, bucket_count in enumerate(histogram[:_HISTOGRAM_BUCKETS]):
+            merged[index] += bucket_count
+        merged[_HISTOGRAM_BUCKETS] = max(merged[_HISTOGRAM_BUCKETS], histogram[_HISTOGRAM_BUCKETS])
 
 
 class RuntimeDiagnostics:
+    """
+    Runtime timings, counters, gauges and queue observations for the diagnostics API.
+
+    Timings, counters and latency histograms go to a per-thread shard, so the main loop, render thread and
+    MIDI workers record samples without sharing a lock; each metric gets its slot the
+    first time a thread records it and is updated in place afterwards. ``snapshot()``
+    merges the shards. Shards of threads that have exited (per-song playback threads,
+    for one) are folded into a retired total, so they do not pile up. Gauges and
+    metadata are last-write-wins single stores.
+    """
+
     def __init__(self, enabled=None):
         if enabled is None:
             enabled = os.environ.get("PLV_RUNTIME_DIAGNOSTICS", "1") != "0"
         self.enabled = enabled
         self._lock = threading.Lock()
-        self._timings = {}
+        self._local = threading.local()
+        self._generation = 0
+        self._shards = []
+        # Merged metrics of finished threads' shards, in _merge_shards' output form
+        self._retired = ({}, {}, {})
+        self._sequence = itertools.count(1)
         self._queues = {}
-        self._counters = {}
         self._gauges = {}
         self._metadata = {}
 
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None or shard.generation != self._generation:
+            with self._lock:
+                shard = _ThreadShard(self._generation)
+                self._retire_finished_shards()
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _retire_finished_shards(self):
+        """Fold the shards of threads that have exited into ``_retired``; call with the lock held."""
+        live = []
+        for shard in self._shards:
+            if shard.finished:
+                _merge_shard(*self._retired, shard)
+            else:
+                live.append(shard)
+        self._shards = live
+
     def record_duration(self, name, seconds):
         if not self.enabled:
             return
-        elapsed_ms = max(0.0, float(seconds) * 1000.0)
-        with self._lock:
-            metric = self._timings.setdefault(
-                name,
-                {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0},
-            )
-            metric["count"] += 1
-            metric["total_ms"] += elapsed_ms
-            metric["last_ms"] = elapsed_ms
-            if elapsed_ms > metric["max_ms"]:
-                metric["max_ms"] = elapsed_ms
+        elapsed_ms = seconds * 1000.0
+        if elapsed_ms < 0.0:
+            elapsed_ms = 0.0
+        timings = self._shard().timings
+        metric = timings.get(name)
+        if metric is None:
+            metric = timings[name] = [0, 0.0, 0.0, 0.0, 0]
+        metric[_COUNT] += 1
+        metric[_TOTAL_MS] += elapsed_ms
+        metric[_LAST_MS] = elapsed_ms
+        metric[_LAST_SEQ] = next(self._sequence)
+        if elapsed_ms > metric[_MAX_MS]:
+            metric[_MAX_MS] = elapsed_ms
+
+    def record_latency(self, name, seconds):
+        """Add one sample to the ``name`` latency histogram (reported as percentiles)."""
+        if not self.enabled:
+            return
+        micros = int(seconds * 1_000_000.0)
+        if micros < 0:
+            micros = 0
+        latencies = self._shard().latencies
+        histogram = latencies.get(name)
+        if histogram is None:
+            histogram = latencies[name] = [0] * (_HISTOGRAM_BUCKETS + 1)
+        histogram[_latency_bucket(micros)] += 1
+        if micros > histogram[_HISTOGRAM_BUCKETS]:
+            histogram[_HISTOGRAM_BUCKETS] = micros
 
     def observe_queue(self, name, depth, oldest_age_ms=0.0):
         if not self.enabled:
@@ -54,32 +200,48 @@ class RuntimeDiagnostics:
     def increment_counter(self, name, amount=1):
         if not self.enabled:
             return
-        with self._lock:
-            self._counters[name] = self._counters.get(name, 0) + amount
+        counters = self._shard().counters
+        counter = counters.get(name)
+        if counter is None:
+            counter = counters[name] = [0]
+        counter[0] += amount
 
     def set_gauge(self, name, value):
         if not self.enabled:
             return
-        with self._lock:
-            self._gauges[name] = value
+        self._gauges[name] = value
 
     def set_metadata(self, name, value):
         if not self.enabled:
             return
-        with self._lock:
-            self._metadata[name] = value
+        self._metadata[name] = value
+
+    def _merge_shards(self):
+        self._retire_finished_shards()
+        retired_timings, retired_counters, retired_latencies = self._retired
+        timings = {name: list(metric) for name, metric in retired_timings.items()}
+        counters = dict(retired_counters)
+        latencies = {name: list(histogram) for name, histogram in retired_latencies.items()}
+        for shard in self._shards:
+            _merge_shard(timings, counters, latencies, shard)
+        return timings, counters, latencies
 
     def snapshot(self):
         with self._lock:
+            merged_timings, counters, merged_latencies = self._merge_shards()
             timings = {
                 name: {
-                    "count": metric["count"],
-                    "avg_ms": round(metric["total_ms"] / metric["count"], 4) if metric["count"] else 0.0,
-                    "max_ms": round(metric["max_ms"], 4),
-                    "last_ms": round(metric["last_ms"], 4),
-                    "total_ms": round(metric["total_ms"], 4),
+                    "count": metric[_COUNT],
+                    "avg_ms": round(metric[_TOTAL_MS] / metric[_COUNT], 4) if metric[_COUNT] else 0.0,
+                    "max_ms": round(metric[_MAX_MS], 4),
+                    "last_ms": round(metric[_LAST_MS], 4),
+                    "total_ms": round(metric[_TOTAL_MS], 4),
                 }
-                for name, metric in self._timings.items()
+                for name, metric in merged_timings.items()
+            }
+            latency = {
+                name: _histogram_summary(histogram[:_HISTOGRAM_BUCKETS], histogram[_HISTOGRAM_BUCKETS])
+                for name, histogram in merged_latencies.items()
             }
             queues = {
                 name: {
@@ -93,16 +255,19 @@ class RuntimeDiagnostics:
             return {
                 "enabled": self.enabled,
                 "timings": timings,
+                "latency": latency,
                 "queues": queues,
-                "counters": dict(self._counters),
+                "counters": counters,
                 "gauges": dict(self._gauges),
                 "metadata": dict(self._metadata),
             }
 
     def reset(self):
         with self._lock:
-            self._timings = {}
+            # Threads notice the new generation on their next sample and start a fresh shard
+            self._generation += 1
+            self._shards = []
+            self._retired = ({}, {}, {})
             self._queues = {}
-            self._counters = {}
             self._gauges = {}
             self._metadata = {}
@@ -73,6 +73,20 @@ def resolve_song_cache_path(filename, base_dir="Songs", must_exist=False):
     return cache_path
 
 
+def resolve_song_compiled_cache_path(filename, base_dir="Songs"):
+    """Path of the packed playback cache written by ``lib.compiled_song_cache`` for a .mid song."""
+    name = validate_song_filename(filename, allowed_extensions={"mid"})
+    cache_dir = (Path(base_dir).resolve() / "cache").resolve()
+    cache_path = (cache_dir / f"{name}.compiled").resolve()
+
+    try:
+        cache_path.relative_to(cache_dir)
+    except ValueError as exc:
+        raise SongFileError("cache path escapes Songs cache directory") from exc
+
+    return cache_path
+
+
 def is_bundle_main(filename):
     name = validate_song_filename(filename, allowed_extensions={"mid"})
     return Path(name).stem.endswith("_main")
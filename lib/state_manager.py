@@ -168,6 +168,29 @@ class StateManager:
         else:  # IDLE
             return 0.9  # Large delay for CPU savings
     
+    def get_frame_rate(self, current_time=None):
+        """
+        Get LED render rate for current state.
+
+        MIDI seen since the last update_state() already counts as active use, so
+        the render loop speeds up on the first note instead of a loop later.
+
+        Args:
+            current_time: Current time as float (optional, defaults to time.time())
+
+        Returns:
+            float: Target frames per second for the render scheduler
+        """
+        if current_time is None:
+            current_time = time.time()
+        if (self.current_state == SystemState.ACTIVE_USE
+                or current_time - self.last_midi_activity < self.midi_timeout_seconds):
+            return 120.0
+        elif self.current_state == SystemState.NORMAL:
+            return 60.0
+        else:  # IDLE
+            return 10.0
+
     def should_refresh_screen(self):
         """
         Determine if screen should be refreshed based on current state.
@@ -265,6 +288,7 @@ class StateManager:
             'time_since_midi': current_time - self.last_midi_activity,
             'time_since_user': current_time - self.last_user_activity,
             'loop_delay': self.get_loop_delay(),
+            'frame_rate': self.get_frame_rate(current_time),
             'screen_refresh_interval': self.get_screen_refresh_interval(),
         }
 
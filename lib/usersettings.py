@@ -1,12 +1,71 @@
 from xml.etree import ElementTree as ET
+import itertools
+import re
+import threading
 import time
 from functools import reduce
+from types import MappingProxyType
 from lib.log_setup import logger
 
 
+_INT_RE = re.compile(r"-?\d+")
+_FLOAT_RE = re.compile(r"-?\d+\.\d*|-?\.\d+")
+
+
+def _typed_setting(value):
+    """Convert a stored setting string to int/float where it is one; nested groups become read-only mappings."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _typed_setting(item) for key, item in value.items()})
+    if isinstance(value, str):
+        text = value.strip()
+        if _INT_RE.fullmatch(text):
+            return int(text)
+        if _FLOAT_RE.fullmatch(text):
+            return float(text)
+    return value
+
+
+class SettingsSnapshot:
+    """
+    Immutable, typed copy of all settings at one ``version``.
+
+    Numbers are already converted, so readers do not re-parse strings; holding on to a
+    snapshot gives a consistent view even while the web interface changes settings.
+    """
+
+    __slots__ = ("_version", "_values")
+
+    def __init__(self, version, values):
+        self._version = version
+        self._values = _typed_setting(values)
+
+    @property
+    def version(self):
+        return self._version
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._values[key]
+        return reduce(lambda group, name: group[name], key, self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (KeyError, TypeError):
+            return default
+
+
 class UserSettings:
     def __init__(self, config="config/settings.xml", default_config="config/default_settings.xml"):
         self.cache = {}
+        # Bumped on every change; snapshot() republishes when it moves
+        self._versions = itertools.count(1)
+        self.version = 0
+        self._snapshot = None
+        self._lock = threading.RLock()
 
         self.CONFIG_FILE = config
         self.DEFAULT_CONFIG_FILE = default_config
@@ -49,18 +108,33 @@ class UserSettings:
     def get_copy(self):
         return self.cache.copy()
 
+    def snapshot(self):
+        """Current ``SettingsSnapshot``; rebuilt only after a change, so hot-path readers can compare ``version``."""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != self.version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != self.version:
+                    snapshot = self._snapshot = SettingsSnapshot(self.version, self.cache)
+        return snapshot
+
+    def _changed(self):
+        self.version = next(self._versions)
+
 
     # set setting
 
     def __setitem__(self, key, value):
         val = str(value)
-        self._xml_set(key, val)
+        with self._lock:
+            self._xml_set(key, val)
 
-        if isinstance(key, str):
-            self.cache[key] = val
-        elif hasattr(key, '__iter__'):
-            d = reduce(dict.__getitem__, key[:-1], self.cache)
-            d[key[-1]] = val
+            if isinstance(key, str):
+                self.cache[key] = val
+            elif hasattr(key, '__iter__'):
+                d = reduce(dict.__getitem__, key[:-1], self.cache)
+                d[key[-1]] = val
+            self._changed()
 
     def set(self, key, value):
         self.__setitem__(key, value)
@@ -111,7 +185,9 @@ class UserSettings:
         self.tree = ET.parse(self.DEFAULT_CONFIG_FILE)
         self.tree.write(self.CONFIG_FILE)
         self.root = self.tree.getroot()
-        self.xml_to_dict(self.cache, self.root)
+        with self._lock:
+            self.xml_to_dict(self.cache, self.root)
+            self._changed()
         self.pending_reset = True
         self.last_save = time.time()
 
@@ -160,4 +236,6 @@ class UserSettings:
                 path.pop()
 
         if self.pending_changes:
-            self.xml_to_dict(self.cache, self.root)
+            with self._lock:
+                self.xml_to_dict(self.cache, self.root)
+                self._changed()
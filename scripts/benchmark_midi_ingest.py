@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Live MIDI ingest cost: mido parsing vs. the raw python-rtmidi callback.
+
+Replays what the rtmidi backend hands to Python during a 1 kHz MIDI clock flood
+with notes and pedal mixed in, once through mido's path (``Message.from_bytes`` +
+``MidiPorts.msg_callback``) and once through ``MidiPorts.raw_msg_callback``.
+Reports callback cost per event overall and split into clock vs. musical events.
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import mido
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.midi_queues import MidiQueues
+from lib.midiports import IGNORED_RTP_MESSAGE_TYPES, MidiPorts
+
+
+def make_ports():
+    # Bare MidiPorts without opening devices or starting the worker threads
+    ports = MidiPorts.__new__(MidiPorts)
+    ports.queues = MidiQueues(spsc_live=True)
+    ports.midi_queue = ports.queues.live_visualizer_queue
+    ports.learning_midi_queue = ports.queues.live_learning_queue
+    ports.live_forward_queue = ports.queues.live_forward_queue
+    ports.websocket_publish_queue = ports.queues.websocket_publish_queue
+    ports.drop_counter = 0
+    ports.drop_counts = {}
+    ports.ignored_counts = {}
+    ports.ignored_message_types = set(IGNORED_RTP_MESSAGE_TYPES)
+    ports.last_activity = 0
+    return ports
+
+
+def flood(seconds, notes_per_second):
+    """rtmidi callback payloads: 1000 clocks/s with notes, note-offs and pedal interleaved."""
+    events = []
+    note_every = max(1, 1000 // max(1, notes_per_second))
+    for tick in range(int(seconds * 1000)):
+        events.append(([0xF8], 0.001))
+        if tick % note_every == 0:
+            note = 36 + (tick // note_every) % 48
+            events.append(([0x90, note, 96], 0.0))
+            events.append(([0x80, note, 0], 0.0))
+        if tick % 250 == 0:
+            events.append(([0xB0, 64, 127 if tick % 500 else 0], 0.0))
+    return events
+
+
+def run(ports, events, callback):
+    perf_ns = time.perf_counter_ns
+    clock_ns = []
+    music_ns = []
+    for index, payload in enumerate(events):
+        started = perf_ns()
+        callback(payload)
+        elapsed = perf_ns() - started
+        (clock_ns if payload[0][0] == 0xF8 else music_ns).append(elapsed)
+        if index % 256 == 0:
+            ports.queues.drain_live_for_visualizer()
+            ports.queues.drain_live_for_learning()
+            while ports.queues.pop_live_forward() is not None:
+                pass
+            while ports.queues.pop_websocket_publish() is not None:
+                pass
+    return clock_ns, music_ns
+
+
+def summarize(label, clock_ns, music_ns):
+    all_ns = sorted(clock_ns + music_ns)
+    print(
+        f"{label:>10}: {statistics.fmean(all_ns) / 1000.0:.2f} us/event "
+        f"(p99 {all_ns[int(len(all_ns) * 0.99)] / 1000.0:.2f} us)  "
+        f"clock {statistics.fmean(clock_ns) / 1000.0:.2f} us  "
+        f"notes/cc {statistics.fmean(music_ns) / 1000.0:.2f} us"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30.0, help="simulated flood duration")
+    parser.add_argument("--notes-per-second", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    events = flood(args.seconds, args.notes_per_second)
+
+    def via_mido(ports):
+        # What mido's rtmidi Input._callback_wrapper does before calling msg_callback
+        def callback(payload):
+            ports.msg_callback(mido.Message.from_bytes(payload[0]))
+        return callback
+
+    def via_raw(ports):
+        return ports.raw_msg_callback
+
+    print(f"{len(events)} callbacks ({args.seconds:g} s of 1 kHz clock, {args.notes_per_second} notes/s)")
+    for label, make_callback in (("mido", via_mido), ("raw", via_raw)):
+        ports = make_ports()
+        summarize(label, *run(ports, events, make_callback(ports)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Contention benchmark: live MIDI ingest through deque+RLock vs. SPSC rings.
+
+A producer thread plays the rtmidi callback (``enqueue_all_live``) while a
+consumer thread drains the visualizer queue in 64-item slices like
+``MIDIEventProcessor.process_midi_events``. Reports producer cost per event and
+end-to-end throughput for both queue modes.
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.midi_queues import MidiQueues
+
+
+class BenchMessage:
+    __slots__ = ("type", "note", "velocity")
+
+    def __init__(self, note):
+        self.type = "note_on"
+        self.note = note
+        self.velocity = 100
+
+
+def run(spsc_live, events, batch):
+    queues = MidiQueues(spsc_live=spsc_live)
+    messages = [BenchMessage(index % 128) for index in range(events)]
+    producer_ns = []
+    consumed = 0
+    done = threading.Event()
+
+    def produce():
+        perf_ns = time.perf_counter_ns
+        enqueue = queues.enqueue_all_live
+        for msg in messages:
+            started = perf_ns()
+            enqueue(msg, timestamp=0.0, source="rtp_rx", is_note=True)
+            producer_ns.append(perf_ns() - started)
+            # Keep the forward/publish queues from growing without a forward worker.
+            queues.pop_live_forward()
+            queues.pop_websocket_publish()
+        done.set()
+
+    def consume():
+        nonlocal consumed
+        while consumed < events:
+            drained = queues.drain_live_for_visualizer(max_messages=batch)
+            queues.drain_live_for_learning(max_messages=batch)
+            consumed += len(drained)
+            if not drained and done.is_set() and not queues.live_visualizer_queue:
+                break
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=produce), threading.Thread(target=consume)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    producer_ns.sort()
+    return {
+        "events": consumed,
+        "throughput_per_s": consumed / elapsed,
+        "producer_mean_us": statistics.fmean(producer_ns) / 1000.0,
+        "producer_p50_us": producer_ns[len(producer_ns) // 2] / 1000.0,
+        "producer_p99_us": producer_ns[int(len(producer_ns) * 0.99)] / 1000.0,
+        "producer_max_us": producer_ns[-1] / 1000.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    for label, spsc_live in (("deque+RLock", False), ("spsc ring", True)):
+        result = run(spsc_live, args.events, args.batch)
+        print(
+            f"{label:>12}: {result['throughput_per_s']:>10.0f} ev/s  "
+            f"producer p50 {result['producer_p50_us']:.2f} us  "
+            f"mean {result['producer_mean_us']:.2f} us  "
+            f"p99 {result['producer_p99_us']:.2f} us  "
+            f"max {result['producer_max_us']:.1f} us"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
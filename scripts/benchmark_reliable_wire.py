@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Reliable playback upload cost: JSON vs. binary chunk encoding.
+
+Streams a song to a local stand-in receiver (in its own process, as the real one is
+on another host) once per chunk encoding, with the prebuffer covering the whole song
+so ``play_events`` returns only after every event was acknowledged. Reports the
+prepare time, the bytes on the wire and the client-side encode cost alone.
+"""
+import argparse
+import json
+import multiprocessing
+import socket
+import statistics
+import struct
+import sys
+import time
+from pathlib import Path
+
+import mido
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.compiled_song_cache import PackedMidiPlayback
+from lib.reliable_midi_playback_client import (
+    BINARY_FRAME_FLAG,
+    CHUNK_ENCODING_BINARY,
+    CHUNK_ENCODING_JSON,
+    ReliableMidiPlaybackClient,
+    _read_varint,
+    _recv_exact,
+    _send_frame,
+    encode_binary_chunk,
+)
+
+
+class CountingSocket:
+    """Wraps the receiver's connection to count the bytes the client sent."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.received = 0
+
+    def recv(self, size):
+        data = self.sock.recv(size)
+        self.received += len(data)
+        return data
+
+    def sendall(self, data):
+        self.sock.sendall(data)
+
+
+def recv_frame(conn):
+    """Like ``_recv_frame``, but binary chunks only have their event count read, as a native receiver would."""
+    size = struct.unpack(">I", _recv_exact(conn, 4))[0]
+    payload = _recv_exact(conn, size & ~BINARY_FRAME_FLAG)
+    if size & BINARY_FRAME_FLAG:
+        _, pos = _read_varint(payload, 1)
+        count, _ = _read_varint(payload, pos)
+        return {"type": "chunk", "count": count}
+    frame = json.loads(payload)
+    if frame["type"] == "chunk":
+        frame["count"] = len(frame["events"])
+    return frame
+
+
+class StandInReceiver:
+    """Acks every chunk and completes the session once started with all events in."""
+
+    def __init__(self, encodings):
+        self.encodings = encodings
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.port = self.server.getsockname()[1]
+
+    def serve(self, sessions, results):
+        for _ in range(sessions):
+            conn, _ = self.server.accept()
+            with conn:
+                counting = CountingSocket(conn)
+                try:
+                    self.session(counting)
+                except Exception:
+                    pass
+                results.put(counting.received)
+
+    def session(self, conn):
+        prepare = recv_frame(conn)
+        session_id = prepare["sessionId"]
+        ready = {"type": "ready", "sessionId": session_id, "window": 1 << 20}
+        offered = [encoding for encoding in prepare.get("encodings", []) if encoding in self.encodings]
+        if offered:
+            ready["encoding"] = offered[0]
+        _send_frame(conn, ready)
+        received = 0
+        started = False
+        while not (started and received == prepare["total"]):
+            frame = recv_frame(conn)
+            if frame["type"] == "chunk":
+                received += frame["count"]
+                _send_frame(conn, {"type": "ack", "sessionId": session_id, "received": received})
+            elif frame["type"] == "start":
+                started = True
+        _send_frame(conn, {"type": "completed", "sessionId": session_id, "processed": received, "dropped": 0})
+
+
+
+def run_receiver(sessions, ports, results):
+    receiver = StandInReceiver(encodings=(CHUNK_ENCODING_BINARY,))
+    ports.put(receiver.port)
+    receiver.serve(sessions, results)
+
+
+def upload(song, encoding, chunk_events, rounds):
+    context = multiprocessing.get_context("spawn")
+    ports = context.Queue()
+    results = context.Queue()
+    process = context.Process(target=run_receiver, args=(rounds, ports, results), daemon=True)
+    process.start()
+    port = ports.get(timeout=30)
+    prebuffer_ms = int(song.total_delay_s * 1000) + 1000
+    timings = []
+    wire_bytes = []
+    try:
+        for _ in range(rounds):
+            client = ReliableMidiPlaybackClient(
+                host="127.0.0.1",
+                port=port,
+                chunk_events=chunk_events,
+                prebuffer_ms=prebuffer_ms,
+                encodings=(encoding,),
+            )
+            started = time.perf_counter()
+            handle = client.play_events("benchmark", song, start_delay_ms=0)
+            timings.append(time.perf_counter() - started)
+            handle.wait_completed(timeout=10)
+            client.close()
+            wire_bytes.append(results.get(timeout=10))
+    finally:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    return timings, wire_bytes
+
+
+def encode_cost(song, encoding, chunk_events):
+    started = time.perf_counter()
+    for first in range(0, song.total, chunk_events):
+        count = min(chunk_events, song.total - first)
+        if encoding == CHUNK_ENCODING_BINARY:
+            encode_binary_chunk(song, first, count)
+        else:
+            json.dumps(song.events[first:first + count], separators=(",", ":")).encode("utf-8")
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("song", nargs="?", default=str(Path("Songs") / "La Campanella.mid"))
+    parser.add_argument("--chunk-events", type=int, default=512)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    song = PackedMidiPlayback.from_midi_file(mido.MidiFile(args.song))
+    # Build the JSON event list up front so its one-time cost is not charged to the first round
+    song.events
+
+    print(f"{song.total} events, {song.total_delay_s:.1f} s ({args.song})")
+    for encoding in (CHUNK_ENCODING_JSON, CHUNK_ENCODING_BINARY):
+        timings, wire_bytes = upload(song, encoding, args.chunk_events, args.rounds)
+        encode_s = encode_cost(song, encoding, args.chunk_events)
+        print(
+            f"{encoding:>12}: prepare {statistics.median(timings) * 1000.0:.1f} ms "
+            f"(min {min(timings) * 1000.0:.1f} ms)  "
+            f"{statistics.median(wire_bytes) / 1024.0:.1f} KiB on the wire "
+            f"({statistics.median(wire_bytes) / song.total:.1f} B/event)  "
+            f"encode {encode_s * 1000.0:.1f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
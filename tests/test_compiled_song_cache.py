@@ -0,0 +1,100 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import mido
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.compiled_song_cache import PackedMidiPlayback, load_compiled_song, precompile_song_in_background
+from lib.midi_event import PackedMidiEvent
+from lib.reliable_midi_playback_client import compile_midi_messages
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _songs_dir(tmp_path, name="La Campanella.mid"):
+    songs_dir = tmp_path / "Songs"
+    songs_dir.mkdir()
+    shutil.copy(ROOT / "Songs" / name, songs_dir / name)
+    return songs_dir
+
+
+def test_compiled_song_matches_compile_midi_messages_and_is_cached(tmp_path):
+    songs_dir = _songs_dir(tmp_path)
+    expected = compile_midi_messages(mido.MidiFile(str(songs_dir / "La Campanella.mid")))
+
+    compiled = load_compiled_song("La Campanella.mid", base_dir=songs_dir)
+
+    assert (songs_dir / "cache" / "La Campanella.mid.compiled").is_file()
+    assert compiled.total == expected.total == 8556
+    assert compiled.events == expected.events
+    assert compiled.total_delay_s == expected.total_delay_s
+
+    with patch("lib.compiled_song_cache.mido.MidiFile", side_effect=AssertionError("cache miss")):
+        cached = load_compiled_song("La Campanella.mid", base_dir=songs_dir)
+
+    assert list(cached.due_us) == list(compiled.due_us)
+    assert cached.data == compiled.data
+    assert cached.events == expected.events
+
+
+def test_local_messages_are_packed_and_equivalent_to_mido_messages(tmp_path):
+    songs_dir = _songs_dir(tmp_path)
+    expected = compile_midi_messages(mido.MidiFile(str(songs_dir / "La Campanella.mid")))
+
+    compiled = load_compiled_song("La Campanella.mid", base_dir=songs_dir)
+
+    assert len(compiled.local_messages) == len(expected.local_messages)
+    for (due_us, message), (expected_due_us, expected_message) in zip(compiled.local_messages, expected.local_messages):
+        assert due_us == expected_due_us
+        if type(message) is PackedMidiEvent:
+            assert message.copy(time=0).to_mido() == expected_message
+        else:
+            assert message == expected_message
+
+
+def test_cache_is_rebuilt_when_song_file_changes(tmp_path):
+    songs_dir = tmp_path / "Songs"
+    songs_dir.mkdir()
+    song = songs_dir / "Short.mid"
+    mid = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.Message("note_on", note=60, velocity=100, time=0))
+    mid.save(str(song))
+    assert load_compiled_song("Short.mid", base_dir=songs_dir).total == 1
+
+    track.append(mido.Message("note_off", note=60, velocity=0, time=480))
+    mid.save(str(song))
+    stat = song.stat()
+    os.utime(song, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    compiled = load_compiled_song("Short.mid", base_dir=songs_dir)
+
+    assert compiled.total == 2
+    assert [event["data"] for event in compiled.events] == [[0x90, 60, 100], [0x80, 60, 0]]
+
+
+def test_corrupt_cache_is_ignored(tmp_path):
+    songs_dir = _songs_dir(tmp_path)
+    cache_dir = songs_dir / "cache"
+    cache_dir.mkdir()
+    (cache_dir / "La Campanella.mid.compiled").write_bytes(b"PLVSONG1 truncated")
+
+    assert load_compiled_song("La Campanella.mid", base_dir=songs_dir).total == 8556
+    stat = (songs_dir / "La Campanella.mid").stat()
+    blob = (cache_dir / "La Campanella.mid.compiled").read_bytes()
+    assert PackedMidiPlayback.from_bytes(blob, stat.st_mtime_ns, stat.st_size).total == 8556
+
+
+def test_upload_precompile_runs_in_background(tmp_path):
+    songs_dir = _songs_dir(tmp_path)
+
+    thread = precompile_song_in_background("La Campanella.mid", base_dir=songs_dir)
+    thread.join(timeout=30)
+
+    assert (songs_dir / "cache" / "La Campanella.mid.compiled").is_file()
+    assert precompile_song_in_background("Notes.musicxml", base_dir=songs_dir) is None
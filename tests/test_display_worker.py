@@ -0,0 +1,78 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.display_worker import DisplayWorker
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_request_renders_on_worker_thread():
+    threads = []
+    worker = DisplayWorker(lambda: threads.append(threading.current_thread().name))
+    worker.start()
+    try:
+        worker.request()
+        assert _wait_for(lambda: threads)
+    finally:
+        worker.stop()
+
+    assert threads == ["lcd-display"]
+
+
+def test_requests_during_render_coalesce_into_one_more_pass():
+    entered = threading.Event()
+    release = threading.Event()
+    renders = []
+
+    def render():
+        renders.append(time.monotonic())
+        if len(renders) == 1:
+            entered.set()
+            release.wait(2.0)
+
+    worker = DisplayWorker(render)
+    worker.start()
+    try:
+        worker.request()
+        assert entered.wait(2.0)
+        for _ in range(10):
+            worker.request()
+        release.set()
+        assert _wait_for(lambda: len(renders) >= 2)
+        time.sleep(0.05)
+    finally:
+        worker.stop()
+
+    assert len(renders) == 2
+    assert worker.requests == 11
+
+
+def test_render_errors_do_not_stop_the_worker():
+    calls = []
+
+    def render():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("spi busy")
+
+    worker = DisplayWorker(render)
+    worker.start()
+    try:
+        worker.request()
+        assert _wait_for(lambda: worker.renders == 1)
+        worker.request()
+        assert _wait_for(lambda: len(calls) == 2)
+    finally:
+        worker.stop()
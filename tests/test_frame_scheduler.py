@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import sys
+import unittest
+
+sys.path.append("./")
+sys.path.append("../")
+
+from lib.frame_scheduler import FrameScheduler
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestFrameScheduler(unittest.TestCase):
+    def test_first_frame_is_due_immediately(self):
+        scheduler = FrameScheduler(fps=100, clock=FakeClock())
+
+        self.assertTrue(scheduler.is_due())
+        self.assertEqual(scheduler.time_until_next(), 0.0)
+
+    def test_deadlines_advance_from_previous_deadline_not_finish_time(self):
+        clock = FakeClock(10.0)
+        scheduler = FrameScheduler(fps=100, clock=clock)
+
+        scheduler.frame_done(10.0, 10.004)
+        self.assertAlmostEqual(scheduler.next_deadline, 10.01)
+
+        # Woke up 3 ms late: the following deadline still lands on the 10 ms grid.
+        scheduler.frame_done(10.013, 10.015)
+        self.assertAlmostEqual(scheduler.next_deadline, 10.02)
+        self.assertEqual(scheduler.overruns, 0)
+
+    def test_overrun_is_counted_and_missed_deadlines_are_skipped(self):
+        scheduler = FrameScheduler(fps=100, clock=FakeClock())
+
+        scheduler.frame_done(0.0, 0.035)
+
+        self.assertEqual(scheduler.overruns, 1)
+        self.assertEqual(scheduler.dropped_frames, 3)
+        self.assertAlmostEqual(scheduler.next_deadline, 0.04)
+        self.assertFalse(scheduler.is_due(0.036))
+        self.assertAlmostEqual(scheduler.time_until_next(0.036), 0.004)
+
+    def test_raising_fps_pulls_pending_deadline_in(self):
+        scheduler = FrameScheduler(fps=10, clock=FakeClock())
+        scheduler.frame_done(1.0, 1.001)
+        self.assertAlmostEqual(scheduler.next_deadline, 1.1)
+
+        scheduler.set_fps(100)
+        self.assertAlmostEqual(scheduler.next_deadline, 1.01)
+        self.assertTrue(scheduler.is_due(1.02))
+
+        scheduler.set_fps(10)
+        self.assertAlmostEqual(scheduler.next_deadline, 1.01)
+
+    def test_stats_report_frame_budget(self):
+        scheduler = FrameScheduler(fps=120)
+        scheduler.set_fps(50)
+
+        stats = scheduler.stats()
+
+        self.assertEqual(stats["target_fps"], 50.0)
+        self.assertEqual(stats["frame_budget_ms"], 20.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
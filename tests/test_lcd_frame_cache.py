@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.lcd_frame_cache import LcdFrameCache
+
+
+def _reference_rgb565(image):
+    img = np.asarray(image)
+    pix = np.empty(img.shape[:2] + (2,), dtype=np.uint8)
+    pix[..., 0] = (img[..., 0] & 0xF8) | (img[..., 1] >> 5)
+    pix[..., 1] = ((img[..., 1] << 3) & 0xE0) | (img[..., 2] >> 3)
+    return pix
+
+
+def test_first_frame_is_fully_encoded():
+    image = Image.new("RGB", (16, 16), (200, 100, 50))
+    cache = LcdFrameCache(16, 16)
+
+    pix = cache.encode(image)
+
+    assert np.array_equal(pix, _reference_rgb565(image))
+    assert cache.changed_rows.tolist() == list(range(16))
+
+
+def test_only_changed_rows_are_reencoded():
+    image = Image.new("RGB", (16, 16), (0, 0, 0))
+    cache = LcdFrameCache(16, 16)
+    cache.encode(image)
+
+    ImageDraw.Draw(image).rectangle((2, 5, 9, 6), fill=(255, 255, 255))
+    pix = cache.encode(image)
+
+    assert cache.changed_rows.tolist() == [5, 6]
+    assert np.array_equal(pix, _reference_rgb565(image))
+
+    cache.encode(image)
+    assert cache.changed_rows.size == 0
+
+
+def test_reset_forces_full_encode():
+    image = Image.new("RGB", (8, 8), (1, 2, 3))
+    cache = LcdFrameCache(8, 8)
+    cache.encode(image)
+
+    cache.reset()
+    cache.encode(image)
+
+    assert cache.changed_rows.size == 8
+
+
+def test_dirty_rects_cover_changed_bands_only():
+    image = Image.new("RGB", (32, 32), (0, 0, 0))
+    cache = LcdFrameCache(32, 32)
+    cache.encode(image)
+    assert cache.dirty_rects() == [(0, 0, 32, 32)]
+
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((4, 2, 6, 3), fill=(255, 0, 0))
+    draw.point((10, 4), fill=(0, 255, 0))
+    draw.rectangle((20, 25, 21, 25), fill=(0, 0, 255))
+    cache.encode(image)
+
+    assert cache.dirty_rects() == [(4, 2, 11, 5), (20, 25, 22, 26)]
+
+    cache.encode(image)
+    assert cache.dirty_rects() == []
+
+
+def test_large_changes_fall_back_to_one_full_window():
+    cache = LcdFrameCache(16, 16)
+    cache.encode(Image.new("RGB", (16, 16), (0, 0, 0)))
+
+    cache.encode(Image.new("RGB", (16, 16), (9, 9, 9)))
+
+    assert cache.dirty_rects() == [(0, 0, 16, 16)]
+
+
+def test_lcd_1in44_sends_only_changed_windows(monkeypatch):
+    from lib import LCD_1in44, LCD_Config
+
+    writes = []
+    monkeypatch.setattr(LCD_Config, "SPI_Write_Buffer", lambda data: writes.append(len(data)))
+    lcd = LCD_1in44.LCD()
+    windows = []
+    monkeypatch.setattr(lcd, "LCD_SetWindows", lambda *rect: windows.append(rect))
+
+    image = Image.new("RGB", (lcd.width, lcd.height), (0, 0, 0))
+    lcd.LCD_ShowImage(image, 0, 0)
+    ImageDraw.Draw(image).rectangle((10, 20, 19, 29), fill=(255, 255, 255))
+    lcd.LCD_ShowImage(image, 0, 0)
+    lcd.LCD_ShowImage(image, 0, 0)
+
+    assert windows == [(0, 0, lcd.width, lcd.height), (10, 20, 20, 30)]
+    assert writes == [lcd.width * lcd.height * 2, 10 * 10 * 2]
@@ -9,6 +9,8 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 if "rpi_ws281x" not in sys.modules:
     sys.modules["rpi_ws281x"] = types.SimpleNamespace(Color=lambda red, green, blue: (red, green, blue))
 
+import numpy as np
+
 import lib.led_effects_processor as effects_module
 from lib.led_effects_processor import LEDEffectsProcessor
 
@@ -52,15 +54,14 @@ class FakeSettings:
         self.velocity_speed = 1000
         self.pedal_speed = 1000
         self.backlight_brightness_percent = 50
+        self.backlight_red = 20
+        self.backlight_green = 40
+        self.backlight_blue = 60
+        self.adjacent_mode = "Main"
         self.pulse_animation_distance = 4
         self.pulse_animation_speed = 1000
         self.pulse_flicker_strength = 0
         self.pulse_flicker_speed = 1
-        self.backlight_calls = []
-
-    def get_backlight_color(self, channel):
-        self.backlight_calls.append(channel)
-        return {"Red": 20, "Green": 40, "Blue": 60}[channel]
 
 
 class RemoveForbiddenList(list):
@@ -99,14 +100,15 @@ def test_process_fade_effects_reuses_color_object_for_single_led_update(monkeypa
     assert ledstrip.adjacent_calls[0][1] is colors[0][3]
 
 
-def test_process_fade_effects_reads_backlight_once_per_pass():
+def test_process_fade_effects_uses_backlight_snapshot_from_light_mode():
     ledstrip = FakeLedStrip([1, 1])
     settings = FakeSettings(mode="Fading")
     processor = _processor(ledstrip, settings)
+    settings.backlight_red = 255
 
     assert processor.process_fade_effects(1.0) is True
 
-    assert settings.backlight_calls == ["Red", "Green", "Blue"]
+    assert ledstrip.strip.calls == [(0, (10, 20, 30)), (1, (10, 20, 30))]
 
 
 def test_process_fade_effects_uses_dynamic_ledstrip_sustain_value():
@@ -153,3 +155,82 @@ def test_process_pulse_effects_rebuilds_surviving_pulses_instead_of_removing(mon
     assert processor.process_pulse_effects() is True
 
     assert ledstrip.active_pulses == [survivor]
+
+
+class ArrayLedStrip(FakeLedStrip):
+    def __init__(self, keylist, keylist_color=None):
+        super().__init__(keylist, keylist_color)
+        self.keylist = np.array(self.keylist, dtype=np.float64)
+        self.keylist_status = np.array(self.keylist_status, dtype=np.int8)
+        self.keylist_sustained = np.array(self.keylist_sustained, dtype=np.int8)
+        self.keylist_color = np.array(self.keylist_color, dtype=np.float64)
+
+
+def _run_both_paths(mode, keylist, status, sustained, sustain_value, event_loop_time):
+    results = []
+    for strip_cls in (FakeLedStrip, ArrayLedStrip):
+        colors = [[200, 100, 50] for _ in keylist]
+        ledstrip = strip_cls(keylist, colors)
+        for n, value in enumerate(status):
+            ledstrip.keylist_status[n] = value
+        for n, value in enumerate(sustained):
+            ledstrip.keylist_sustained[n] = value
+        ledstrip.sustain_value = sustain_value
+        processor = _processor(ledstrip, FakeSettings(mode=mode))
+        changed = processor.process_fade_effects(event_loop_time)
+        results.append((changed, [float(v) for v in ledstrip.keylist], ledstrip.strip.calls, ledstrip.adjacent_calls))
+    return results
+
+
+def test_vectorized_decay_matches_per_led_loop_for_all_decay_modes():
+    keylist = [0, 1000, 500, 20, 1001, 0]
+    status = [0, 0, 1, 0, 1, 0]
+    sustained = [0, 0, 0, 1, 0, 0]
+
+    for mode in ("Fading", "Velocity", "Pedal"):
+        for sustain_value in (0, 127):
+            loop_result, vector_result = _run_both_paths(mode, keylist, status, sustained, sustain_value, 0.05)
+            assert vector_result[0] == loop_result[0]
+            assert vector_result[1] == loop_result[1]
+            assert sorted(vector_result[2]) == sorted(loop_result[2])
+            assert sorted(vector_result[3]) == sorted(loop_result[3])
+
+
+def test_decay_key_state_returns_dirty_mask_only_for_lit_leds():
+    keylist = np.array([0.0, 1000.0, 10.0, 1001.0])
+    status = np.array([0, 0, 0, 1], dtype=np.int8)
+    sustained = np.zeros(4, dtype=np.int8)
+    colors = np.full((4, 3), 100.0)
+
+    dirty, fading = effects_module.decay_key_state(
+        keylist, status, sustained, colors, "Fading", 50, False, (1.0, 2.0, 3.0))
+
+    assert dirty.tolist() == [False, True, True, False]
+    assert keylist.tolist() == [0.0, 950.0, 0.0, 1001.0]
+    assert colors[1].tolist() == [100.0, 100.0, 100.0]
+    assert colors[2].tolist() == [1.0, 2.0, 3.0]
+    assert fading[2] == 0.01
+
+
+def test_active_key_index_limits_work_to_lit_leds_and_prunes_finished_ones():
+    ledstrip = ArrayLedStrip([0, 0, 0, 0])
+    ledstrip.keylist[1] = 10
+    ledstrip.keylist[3] = 900
+    ledstrip.active_keys = {1, 3}
+    processor = _processor(ledstrip, FakeSettings(mode="Fading"))
+
+    assert processor.process_fade_effects(0.05) is True
+
+    assert [led for led, _ in ledstrip.strip.calls] == [1, 3]
+    assert ledstrip.active_keys == {3}
+    assert ledstrip.keylist[3] == 850
+
+
+def test_idle_strip_with_active_key_index_does_no_per_led_work():
+    ledstrip = ArrayLedStrip([0] * 300)
+    ledstrip.keylist[10] = 5  # stale value outside the index is never visited
+    ledstrip.active_keys = set()
+    processor = _processor(ledstrip, FakeSettings(mode="Velocity"))
+
+    assert processor.process_fade_effects(0.05) is False
+    assert ledstrip.strip.calls == []
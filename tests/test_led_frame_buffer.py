@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.LED_drivers import PixelStrip_Emu
+from lib.led_frame_buffer import LedFrameBuffer
+
+
+class RecordingDriver:
+    def __init__(self, count):
+        self.count = count
+        self.writes = []
+        self.show_calls = 0
+        self.brightness = None
+
+    def numPixels(self):
+        return self.count
+
+    def setPixelColor(self, n, color):
+        self.writes.append((n, color))
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def show(self):
+        self.show_calls += 1
+
+
+def test_writes_stay_in_buffer_until_show():
+    driver = RecordingDriver(8)
+    frame = LedFrameBuffer(driver)
+
+    frame.setPixelColor(2, 0x112233)
+    frame.setPixelColor(5, 0x0000FF)
+
+    assert driver.writes == []
+    assert frame.getPixelColor(2) == 0x112233
+
+    frame.show()
+
+    assert sorted(driver.writes) == [(2, 0x112233), (5, 0x0000FF)]
+    assert driver.show_calls == 1
+
+
+def test_show_only_pushes_pixels_changed_since_last_flush():
+    driver = RecordingDriver(4)
+    frame = LedFrameBuffer(driver)
+    frame.setPixelColor(1, 10)
+    frame.show()
+    driver.writes.clear()
+
+    frame.setPixelColor(1, 10)
+    frame.setPixelColor(3, 20)
+    frame.show()
+
+    assert driver.writes == [(3, 20)]
+
+
+def test_out_of_range_writes_are_ignored_like_the_driver():
+    frame = LedFrameBuffer(RecordingDriver(3))
+
+    frame.setPixelColor(-1, 1)
+    frame.setPixelColor(3, 1)
+
+    assert frame.getPixels() == [0, 0, 0]
+
+
+def test_vectorized_write_and_invalidate_rewrite_everything():
+    driver = RecordingDriver(4)
+    frame = LedFrameBuffer(driver)
+    frame.set_pixels([0, 2], [7, 9])
+    frame.show()
+    driver.writes.clear()
+
+    frame.invalidate()
+    frame.flush()
+
+    assert sorted(driver.writes) == [(0, 7), (1, 0), (2, 9), (3, 0)]
+
+
+def test_unknown_attributes_are_forwarded_to_driver():
+    driver = RecordingDriver(2)
+    frame = LedFrameBuffer(driver)
+
+    frame.setBrightness(128)
+
+    assert driver.brightness == 128
+
+
+def test_emu_driver_receives_bulk_flush():
+    emu = PixelStrip_Emu(4)
+    emu.VIS_FPS = 10000
+    frame = LedFrameBuffer(emu)
+    frame.fill(5)
+
+    frame.show()
+
+    assert emu.getPixels() == [5, 5, 5, 5]
+
+
+def test_show_skips_driver_render_when_frame_is_unchanged():
+    driver = RecordingDriver(4)
+    frame = LedFrameBuffer(driver)
+    frame.setPixelColor(0, 3)
+    frame.show()
+
+    frame.setPixelColor(0, 3)
+    frame.show()
+    frame.show()
+
+    assert driver.show_calls == 1
+    assert frame.skipped_shows == 2
+    assert frame.last_changed.tolist() == [0]
+
+
+def test_brightness_change_forces_next_render():
+    driver = RecordingDriver(2)
+    frame = LedFrameBuffer(driver)
+    frame.show()
+
+    frame.setBrightness(40)
+    frame.show()
+    frame.show()
+
+    assert driver.show_calls == 2
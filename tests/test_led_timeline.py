@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import mido
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.led_timeline import (
+    TIMELINE_CONTROL_CHANGE,
+    TIMELINE_NOTE_OFF,
+    TIMELINE_NOTE_ON,
+    LedTimeline,
+    bake_led_timeline,
+)
+from lib.reliable_midi_playback_client import compile_midi_messages
+
+
+class FakeLedStrip:
+    led_number = 20
+
+    def get_note_position(self, note, ledsettings):
+        return note - 50
+
+
+def _settings(color_mode="Single"):
+    colors = {"Red": 255, "Green": 100, "Blue": 0}
+    return SimpleNamespace(
+        color_mode=color_mode,
+        get_color=colors.get,
+        speed_slowest={"red": 0, "green": 0, "blue": 0},
+        speed_fastest={"red": 255, "green": 255, "blue": 255},
+        speed_period_in_seconds=1,
+        speed_max_notes=10,
+    )
+
+
+def _song():
+    mid = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.Message("note_on", note=60, velocity=100, time=0))
+    track.append(mido.Message("note_on", note=90, velocity=100, time=0))
+    track.append(mido.Message("control_change", control=64, value=127, time=480))
+    track.append(mido.Message("note_on", note=60, velocity=0, time=480))
+    return compile_midi_messages(mid)
+
+
+def test_bake_precomputes_positions_and_colors():
+    timeline = bake_led_timeline(_song(), FakeLedStrip(), _settings())
+
+    # note 90 maps past the end of the strip and is dropped like it is live
+    assert [(entry[0], entry[1], entry[3], entry[4]) for entry in timeline.entries] == [
+        (0.0, TIMELINE_NOTE_ON, 10, (255, 100, 0)),
+        (0.5, TIMELINE_CONTROL_CHANGE, None, None),
+        (1.0, TIMELINE_NOTE_OFF, 10, None),
+    ]
+    assert timeline.duration_s == 1.0
+
+
+def test_bake_skips_time_dependent_color_modes():
+    assert bake_led_timeline(_song(), FakeLedStrip(), _settings("Speed")) is None
+
+
+def test_take_due_hands_out_each_entry_once_after_start():
+    timeline = LedTimeline([(0.0, TIMELINE_NOTE_ON, None, 1, (1, 2, 3)), (0.5, TIMELINE_NOTE_OFF, None, 1, None)], 0.5)
+
+    assert timeline.take_due(100.0) == ()
+    timeline.start_perf = 100.0
+    assert [entry[0] for entry in timeline.take_due(100.2)] == [0.0]
+    assert timeline.take_due(100.2) == ()
+    assert [entry[0] for entry in timeline.take_due(101.0)] == [0.5]
+    assert timeline.finished
+
+
+def test_seconds_until_next_points_at_the_first_entry_not_taken():
+    timeline = LedTimeline([(0.0, TIMELINE_NOTE_ON, None, 1, (1, 2, 3)), (0.5, TIMELINE_NOTE_OFF, None, 1, None)], 0.5)
+
+    assert timeline.seconds_until_next(100.0) is None
+    timeline.start_perf = 100.0
+    assert timeline.seconds_until_next(99.75) == 0.25
+    assert timeline.seconds_until_next(100.1) == 0.0
+    timeline.take_due(100.1)
+    assert timeline.seconds_until_next(100.25) == 0.25
+    timeline.take_due(100.5)
+    assert timeline.seconds_until_next(100.5) is None
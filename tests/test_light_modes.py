@@ -0,0 +1,132 @@
+import sys
+import types
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Drivers pick their null fallbacks before the stub below stands in for rpi_ws281x
+import lib.rpi_drivers
+
+if "rpi_ws281x" not in sys.modules:
+    sys.modules["rpi_ws281x"] = types.SimpleNamespace(Color=lambda red, green, blue: (red, green, blue))
+
+from lib.light_modes import LightMode, PedalLightMode, compile_light_mode
+
+
+def _settings(**overrides):
+    values = dict(
+        mode="Normal",
+        color_mode="Single",
+        fadingspeed=1000,
+        velocity_speed=2000,
+        pedal_speed=3000,
+        fadepedal_notedrop=25,
+        adjacent_mode="Off",
+        skipped_notes="Normal",
+        backlight_brightness=0,
+        backlight_brightness_percent=50,
+        backlight_red=20,
+        backlight_green=40,
+        backlight_blue=60,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_compile_light_mode_specializes_each_mode():
+    assert compile_light_mode(_settings(mode="Fading")).decay_speed == 1000
+    assert compile_light_mode(_settings(mode="Velocity")).decay_speed == 2000
+    pedal = compile_light_mode(_settings(mode="Pedal"))
+    assert isinstance(pedal, PedalLightMode)
+    assert pedal.decay_speed == 3000
+    assert pedal.holds_sustain and pedal.decays_while_held
+    assert not compile_light_mode(_settings(mode="Disabled")).enabled
+    assert type(compile_light_mode(_settings(mode="Unknown"))) is LightMode
+
+
+def test_light_mode_snapshots_hot_settings():
+    light_mode = compile_light_mode(_settings(skipped_notes="Finger-based", backlight_brightness=127))
+
+    assert not light_mode.draws_adjacent
+    assert light_mode.lights_local_notes
+    assert not light_mode.lights_external_notes
+    assert light_mode.idle_color == (10, 20, 30)
+    assert light_mode.backlight_rgb == (10.0, 20.0, 30.0)
+    assert compile_light_mode(_settings()).idle_color is None
+
+
+def test_pedal_and_velocity_note_levels():
+    ledstrip = SimpleNamespace(keylist=[0, 0])
+
+    velocity = compile_light_mode(_settings(mode="Velocity"))
+    assert velocity.note_on(ledstrip, 0, 127, (1, 2, 3)) == 1.0
+    assert ledstrip.keylist[0] == 999
+
+    pedal = compile_light_mode(_settings(mode="Pedal"))
+    pedal.note_on(ledstrip, 1, 64, (1, 2, 3))
+    pedal.note_off(ledstrip, 1)
+    assert ledstrip.keylist[1] == 999 * 0.75
+
+
+def test_ledsettings_assignments_bump_version():
+    from lib.ledsettings import LedSettings
+
+    ledsettings = LedSettings.__new__(LedSettings)
+    ledsettings.mode = "Fading"
+    version = ledsettings.version
+
+    ledsettings.adjacent_mode = "RGB"
+
+    assert ledsettings.version > version
+
+
+def _ledsettings(**values):
+    from lib.ledsettings import LedSettings
+
+    ledsettings = LedSettings.__new__(LedSettings)
+    for name, value in values.items():
+        setattr(ledsettings, name, value)
+    return ledsettings
+
+
+def test_ledsettings_snapshot_is_read_only_and_taken_once_per_version():
+    usersettings = SimpleNamespace(version=1)
+    ledsettings = _ledsettings(usersettings=usersettings, mode="Fading", red=10, green=20, blue=30,
+                               multicolor=[[1, 2, 3]], speed_slowest={"red": 5})
+
+    snapshot = ledsettings.snapshot()
+    assert ledsettings.snapshot() is snapshot
+    assert snapshot.version == ledsettings.version
+    assert snapshot.get_color("Green") == 20
+    assert snapshot.multicolor == ((1, 2, 3),)
+    with pytest.raises(AttributeError):
+        snapshot.red = 0
+    with pytest.raises(TypeError):
+        snapshot.speed_slowest["red"] = 0
+
+    ledsettings.red = 99
+    assert ledsettings.snapshot().red == 99
+    assert snapshot.red == 10
+
+    # In-place edits from the web API are recorded only through usersettings
+    ledsettings.multicolor[0][0] = 7
+    usersettings.version = 2
+    assert ledsettings.snapshot().multicolor == ((7, 2, 3),)
+
+
+def test_compiled_light_mode_ignores_later_assignments():
+    ledsettings = _ledsettings(mode="Pulse", fadingspeed=10, pulse_animation_distance=12,
+                               pulse_animation_speed=500, pulse_flicker_strength=50)
+
+    light_mode = compile_light_mode(ledsettings)
+    ledsettings.fadingspeed = 90
+    ledsettings.pulse_animation_speed = 100
+
+    assert light_mode.decay_speed == 10
+    assert light_mode.pulse_duration_s == 0.5
+    assert light_mode.flicker_strength == 0.5
+    assert compile_light_mode(ledsettings).pulse_duration_s == 0.1
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+from xml.dom import minidom
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.menu_model import MenuModel
+
+
+MENU_XML = Path(__file__).resolve().parents[1] / "config" / "menu.xml"
+
+
+def test_pages_match_dom_lookup_in_document_order():
+    dom = minidom.parse(str(MENU_XML))
+    model = MenuModel.compile(dom)
+
+    for tag in {element.tagName for element in dom.getElementsByTagName("*")} - {"data"}:
+        expected = [(element.getAttribute("text"), element.parentNode.tagName)
+                    for element in dom.getElementsByTagName(tag)]
+        assert [(node.text, node.parent_tag) for node in model.page(tag)] == expected
+
+
+def test_nodes_link_parents_children_and_indices():
+    dom = minidom.parseString(
+        '<data text="menu"><menu text="A"><A text="x"/><A text="y"><y text="deep"/></A></menu>'
+        '<menu text="B"/></data>')
+    model = MenuModel.compile(dom)
+
+    menu_a, menu_b = model.page("menu")
+    assert [child.text for child in menu_a.children] == ["x", "y"]
+    assert model.page("y")[0].parent is model.page("A")[1]
+    assert menu_b.index == 1
+    assert model.index_of("A", "y") == 1
+    assert model.index_of("A", "missing") is None
+    assert model.has_page("A") and not model.has_page("B")
+
+
+def test_value_getters_are_resolved_once_per_page():
+    dom = minidom.parseString('<data text="menu"><menu text="Brightness"/>'
+                              '<Brightness text="Power"/><Brightness text="Other"/></data>')
+    resolved = []
+
+    def resolve(tag):
+        resolved.append(tag)
+        if tag == "Brightness":
+            return lambda choice: 42 if choice == "Power" else None
+        return None
+
+    model = MenuModel.compile(dom, resolve)
+
+    assert sorted(resolved) == ["Brightness", "menu"]
+    assert [node.value() for node in model.page("Brightness")] == ["42", None]
+    assert model.page("menu")[0].value() is None
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+import mido
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lib.midi_event import PackedMidiEvent, pack_midi_message, to_mido_message
+
+
+def test_packed_event_mirrors_mido_fields_and_text():
+    for msg in (
+        mido.Message("note_on", channel=3, note=61, velocity=90),
+        mido.Message("note_off", channel=0, note=20, velocity=0),
+        mido.Message("control_change", channel=15, control=64, value=127),
+    ):
+        packed = pack_midi_message(msg, 1.5, "rtp_rx")
+
+        assert type(packed) is PackedMidiEvent
+        assert packed.type == msg.type
+        assert packed.channel == msg.channel
+        assert str(packed) == str(msg)
+        assert packed.to_mido() == msg
+        assert packed.timestamp == 1.5 and packed.source == "rtp_rx"
+
+    note = pack_midi_message(mido.Message("note_on", note=60, velocity=100))
+    assert (note.note, note.velocity, note.is_note) == (60, 100, True)
+    cc = pack_midi_message(mido.Message("control_change", control=7, value=12))
+    assert (cc.control, cc.value, cc.is_note) == (7, 12, False)
+
+
+def test_other_channel_voice_messages_round_trip():
+    for msg in (
+        mido.Message("program_change", channel=2, program=5),
+        mido.Message("aftertouch", channel=1, value=33),
+        mido.Message("pitchwheel", channel=4, pitch=-1234),
+        mido.Message("polytouch", note=70, value=9),
+    ):
+        packed = pack_midi_message(msg)
+        assert packed.type == msg.type
+        assert to_mido_message(packed) == msg
+        assert str(packed) == str(msg)
+
+
+def test_non_channel_messages_are_left_untouched():
+    sysex = mido.Message("sysex", data=[1, 2, 3])
+    fake = object()
+
+    assert pack_midi_message(sysex) is sysex
+    assert pack_midi_message(fake) is fake
+    assert to_mido_message(sysex) is sysex
@@ -14,7 +14,11 @@ rpi_ws281x.PixelStrip = object
 rpi_ws281x.ws = types.SimpleNamespace()
 sys.modules["rpi_ws281x"] = rpi_ws281x
 
-from lib.midi_event_processor import MIDIEventProcessor
+from lib.color_mode import ColorMode
+from lib.led_timeline import TIMELINE_CONTROL_CHANGE, TIMELINE_NOTE_OFF, TIMELINE_NOTE_ON, LedTimeline
+from lib.midi_event import PackedMidiEvent
+from lib.midi_event_processor import MIDIEventProcessor, superseded_note_events
+from lib.usersettings import SettingsSnapshot
 
 
 class FakeMessage:
@@ -107,10 +111,8 @@ class FakeLedSettings:
 
 
 class FakeUserSettings:
-    def get_setting_value(self, name):
-        if name == "midi_logging":
-            return "0"
-        raise KeyError(name)
+    def snapshot(self):
+        return SettingsSnapshot(1, {"midi_logging": "0"})
 
 
 class FakeSaving:
@@ -183,16 +185,12 @@ class FakeMidiPorts:
         self.queues = None
         self.last_activity = 0
         self.diagnostics = FakeDiagnostics()
-        self.refresh_count = 0
 
     def _ensure_runtime_diagnostics(self):
         return self.diagnostics
 
-    def refresh_queue_diagnostics(self):
-        self.refresh_count += 1
 
-
-def make_processor(*, ledstrip=None, ledsettings=None, saving=None, state_manager=None, messages=()):
+def make_processor(*, ledstrip=None, ledsettings=None, saving=None, state_manager=None, messages=(), color_mode=None):
     return MIDIEventProcessor(
         FakeMidiPorts(messages),
         ledstrip or FakeLedStrip(),
@@ -201,7 +199,7 @@ def make_processor(*, ledstrip=None, ledsettings=None, saving=None, state_manage
         saving or FakeSaving(),
         FakeLearning(),
         FakeMenu(),
-        FakeColorMode(),
+        color_mode or FakeColorMode(),
         state_manager=state_manager,
     )
 
@@ -255,6 +253,110 @@ def test_process_midi_events_falls_back_to_function_note_position():
     assert ledstrip.keylist_status[6] == 1
 
 
+def test_packed_live_events_drive_notes_pedal_and_recording():
+    ledstrip = FakeLedStrip(note_position=3)
+    saving = FakeSaving()
+    saving.is_recording = True
+    messages = [
+        (PackedMidiEvent(0x90, 60, 80), 1.0),
+        (PackedMidiEvent(0xB0, 64, 100), 1.1),
+        (PackedMidiEvent(0x90, 60, 0), 1.2),
+    ]
+    processor = make_processor(ledstrip=ledstrip, saving=saving, messages=messages)
+
+    processor.process_midi_events()
+
+    assert saving.tracks == [("note_on", 60, 80, 1.0), ("note_off", 60, 0, 1.2)]
+    assert saving.control_changes == [("control_change", 0, 64, 100, 1.1)]
+    assert processor.last_sustain == 100
+    assert ledstrip.keylist_status[3] == 0
+
+
+def test_live_event_timestamps_are_handed_to_the_next_frame():
+    messages = [(PackedMidiEvent(0x90, 60, 80), 1.0), (PackedMidiEvent(0x80, 60, 0), 1.5)]
+    processor = make_processor(ledstrip=FakeLedStrip(note_position=3), messages=messages)
+
+    processor.process_midi_events()
+
+    assert processor.take_unrendered_timestamps() == [1.0, 1.5]
+    assert processor.take_unrendered_timestamps() == []
+
+
+def test_superseded_note_events_keep_last_note_on_and_trailing_note_off():
+    batch = [
+        (PackedMidiEvent(0x90, 60, 10), 0.0),
+        (PackedMidiEvent(0x80, 60, 0), 0.1),
+        (PackedMidiEvent(0xB0, 64, 127), 0.2),
+        (PackedMidiEvent(0x90, 60, 90), 0.3),
+        (PackedMidiEvent(0x90, 62, 50), 0.4),
+        (PackedMidiEvent(0x90, 62, 0), 0.5),
+        (FakeMessage(msg_type="note_off", note=64, velocity=0), 0.6),
+    ]
+
+    assert superseded_note_events(batch) == {0, 1}
+
+
+def test_backlog_is_coalesced_per_key_but_recorded_in_full():
+    ledstrip = FakeLedStrip(note_position=3)
+    saving = FakeSaving()
+    saving.is_recording = True
+    messages = []
+    for index in range(150):
+        messages.append((PackedMidiEvent(0x90, 60, 1 + index % 100), index * 0.01))
+        messages.append((PackedMidiEvent(0x80, 60, 0), index * 0.01 + 0.005))
+    messages.append((PackedMidiEvent(0x90, 60, 77), 2.0))
+    processor = make_processor(ledstrip=ledstrip, saving=saving, messages=messages)
+    drawn = []
+    handle_note_on = processor.handle_note_on
+    processor.handle_note_on = lambda msg, ts, pos: (drawn.append(msg.velocity), handle_note_on(msg, ts, pos))
+    processor.handle_note_off = lambda msg, ts, pos: drawn.append(0)
+
+    processor.process_midi_events()
+
+    assert drawn == [77]
+    assert len(saving.tracks) == len(messages)
+    assert saving.tracks[0] == ("note_on", 60, 1, 0.0)
+    assert saving.tracks[-1] == ("note_on", 60, 77, 2.0)
+    assert ledstrip.keylist_status[3] == 1
+    assert processor.midiports.diagnostics.counters["midi_events_coalesced_total"] == 300
+    assert len(processor.take_unrendered_timestamps()) == len(messages)
+
+
+def test_coalesced_backlog_records_the_same_multicolor_notes_as_uncoalesced():
+    ledsettings = FakeLedSettings()
+    ledsettings.color_mode = "Multicolor"
+    ledsettings.multicolor = [[255, 0, 0], [0, 255, 0], [0, 0, 255]]
+    ledsettings.multicolor_range = [[21, 108], [21, 108], [21, 108]]
+    ledsettings.multicolor_iteration = 1
+    messages = []
+    for index in range(200):
+        note = 60 + index % 2
+        messages.append((PackedMidiEvent(0x90, note, 90), index * 0.01))
+        messages.append((PackedMidiEvent(0x80, note, 0), index * 0.01 + 0.005))
+
+    recordings = []
+    for batch_size in (len(messages), 100):
+        saving = FakeSaving()
+        saving.is_recording = True
+        color_mode = ColorMode("Multicolor", ledsettings)
+        processor = make_processor(
+            ledstrip=FakeLedStrip(note_position=3), ledsettings=ledsettings, saving=saving, color_mode=color_mode
+        )
+        for first in range(0, len(messages), batch_size):
+            processor.midiports.midi_queue.extend(messages[first:first + batch_size])
+            while processor.midiports.midi_queue:
+                processor.process_midi_events()
+        recordings.append((saving.tracks, color_mode.multicolor_index))
+
+    coalesced, uncoalesced = recordings
+    assert coalesced == uncoalesced
+    assert coalesced[0][:3] == [
+        ("note_on", 60, 90, 0.0, "#ff0000"),
+        ("note_off", 60, 0, 0.005),
+        ("note_on", 61, 90, 0.01, "#00ff00"),
+    ]
+
+
 def test_sustain_control_updates_led_runtime_value():
     ledstrip = FakeLedStrip()
     processor = make_processor(ledstrip=ledstrip)
@@ -342,3 +444,94 @@ def test_midi_activity_update_falls_back_for_legacy_state_manager():
     processor.process_midi_events()
 
     assert state_manager.calls == 1
+
+
+def test_note_handlers_maintain_ledstrip_active_key_index():
+    ledstrip = FakeLedStrip()
+    ledstrip.active_keys = set()
+    processor = make_processor(ledstrip=ledstrip)
+
+    processor.handle_note_on(FakeMessage(velocity=90), 1.0, 4)
+    assert ledstrip.active_keys == {4}
+
+    processor.handle_note_off(FakeMessage(msg_type="note_off", velocity=0), 2.0, 4)
+    assert ledstrip.active_keys == set()
+
+
+def test_sustain_release_drops_sustained_keys_from_active_index():
+    ledstrip = FakeLedStrip()
+    ledstrip.active_keys = {2, 5}
+    ledstrip.keylist[2] = 1000
+    ledstrip.keylist[5] = 1000
+    ledstrip.keylist_status[5] = 1
+    ledstrip.keylist_sustained[2] = 1
+    ledstrip.keylist_sustained[5] = 1
+    ledsettings = FakeLedSettings()
+    ledsettings.mode = "Velocity"
+    processor = make_processor(ledstrip=ledstrip, ledsettings=ledsettings)
+
+    processor.handle_control_change(FakeMessage(msg_type="control_change", control=64, value=0), 3.0)
+
+    assert ledstrip.active_keys == {5}
+    assert ledstrip.keylist[2] == 0
+    assert ledstrip.keylist_sustained == [0] * ledstrip.led_number
+
+
+def test_light_mode_changes_apply_after_refresh_settings():
+    ledstrip = FakeLedStrip()
+    ledsettings = FakeLedSettings()
+    processor = make_processor(ledstrip=ledstrip, ledsettings=ledsettings)
+
+    ledsettings.mode = "Fading"
+    processor.handle_note_on(FakeMessage(velocity=90), 1.0, 4)
+    assert ledstrip.keylist[4] == 1000
+
+    processor.refresh_settings()
+    processor.handle_note_on(FakeMessage(velocity=90), 2.0, 4)
+    assert ledstrip.keylist[4] == 1001
+
+
+def test_baked_timeline_drives_handlers_without_color_mode_or_queue():
+    ledstrip = FakeLedStrip()
+    saving = FakeSaving()
+    saving.is_playing_midi = True
+    ledsettings = FakeLedSettings()
+    ledsettings.skipped_notes = "Disabled"
+    processor = make_processor(ledstrip=ledstrip, ledsettings=ledsettings, saving=saving)
+    processor.color_mode.NoteOn = None  # the baked color must be used
+    note_on = FakeMessage(note=60, velocity=127)
+    note_off = FakeMessage(msg_type="note_off", note=60, velocity=0)
+    timeline = LedTimeline(
+        [
+            (0.0, TIMELINE_NOTE_ON, note_on, 4, (9, 8, 7)),
+            (0.5, TIMELINE_NOTE_OFF, note_off, 4, None),
+        ],
+        0.5,
+    )
+    timeline.start_perf = 0.0
+    processor.midiports.led_timeline = timeline
+
+    with patch("lib.midi_event_processor.time.perf_counter", return_value=0.1):
+        assert processor.process_midi_events() is True
+
+    assert ledstrip.strip.pixels[-1] == (4, (9, 8, 7))
+    assert ledstrip.keylist[4] == 1000
+    assert processor.color_mode.midi_events == []
+
+    processor.process_led_timeline(timeline, 1.0)
+
+    assert ledstrip.keylist[4] == 0
+    assert timeline.finished
+
+
+def test_baked_timeline_feeds_the_midi_log_when_enabled():
+    processor = make_processor()
+    processor.midi_logging_enabled = True
+    note_on = FakeMessage(note=60, velocity=127)
+    control = FakeMessage(msg_type="control_change", control=64, value=127)
+    timeline = LedTimeline([(0.0, TIMELINE_NOTE_ON, note_on, 4, (9, 8, 7)), (0.1, TIMELINE_CONTROL_CHANGE, control, None, None)], 0.1)
+    timeline.start_perf = 0.0
+
+    processor.process_led_timeline(timeline, 1.0)
+
+    assert processor.learning.socket_send == ["midi_event" + str(note_on), "midi_event" + str(control)]
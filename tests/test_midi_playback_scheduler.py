@@ -2,6 +2,7 @@
 
 import sys
 import unittest
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import mido
@@ -11,7 +12,7 @@ sys.path.append("../")
 
 from lib.midi_playback_scheduler import MidiPlaybackScheduler, PlaybackState
 from lib.midi_queues import MidiQueues
-from lib.reliable_midi_playback_client import CompiledMidiPlayback, ReliablePlaybackError
+from lib.reliable_midi_playback_client import CompiledMidiPlayback, ReliablePlaybackError, compile_midi_messages
 
 
 class FakeMidiPorts:
@@ -258,6 +259,62 @@ class TestMidiPlaybackScheduler(unittest.TestCase):
         self.assertEqual(scheduler.last_error, "connect failed")
         self.assertEqual(scheduler.state, PlaybackState.STOPPED)
 
+    def test_unavailable_receiver_falls_back_without_connecting(self):
+        midiports = FakeMidiPorts()
+        client = FakeReliableClient()
+        client.available = False
+        client.last_error = "connection refused"
+        probes = []
+        client.request_probe = lambda: probes.append(True)
+        created = []
+        scheduler = MidiPlaybackScheduler(
+            midiports,
+            FakeSaving(),
+            FakeMenu(),
+            None,
+            None,
+            reliable_client_factory=lambda _settings: created.append(client) or client,
+        )
+        mid = mido.MidiFile(ticks_per_beat=480)
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        track.append(mido.Message("note_on", note=60, velocity=100, time=0))
+
+        with patch("lib.midi_playback_scheduler.mido.MidiFile", return_value=mid), patch(
+            "lib.midi_playback_scheduler.time.perf_counter", return_value=100.0
+        ):
+            scheduler.stop_event.wait = lambda _delay: False
+            self.assertTrue(scheduler.play("song.mid"))
+            self.assertTrue(scheduler.play("song.mid"))
+
+        self.assertEqual(client.calls, [])
+        self.assertEqual(probes, [True, True])
+        self.assertEqual(len(created), 1)
+        self.assertEqual(scheduler.playback_mode, "native_rtp_fallback")
+        self.assertEqual(scheduler.last_error, "connection refused")
+
+    def test_baked_playback_publishes_led_timeline_instead_of_queueing_notes(self):
+        midiports = FakeMidiPorts()
+        midiports.usersettings = FakeUserSettings({"baked_led_playback": "1"})
+        ledstrip = SimpleNamespace(led_number=88, get_note_position=lambda note, _settings: note - 21)
+        ledsettings = SimpleNamespace(color_mode="Single", get_color={"Red": 10, "Green": 20, "Blue": 30}.get)
+        scheduler = MidiPlaybackScheduler(midiports, FakeSaving(), FakeMenu(), ledsettings, ledstrip)
+        mid = mido.MidiFile(ticks_per_beat=480)
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        track.append(mido.Message("note_on", note=60, velocity=100, time=0))
+        track.append(mido.Message("note_off", note=60, velocity=0, time=480))
+        published = []
+        scheduler.stop_event.wait = lambda _delay: published.append(midiports.led_timeline) or False
+
+        scheduler._play_local_events("song.mid", compile_midi_messages(mid), 100.0)
+
+        self.assertEqual(midiports.file_enqueued, [])
+        self.assertEqual(len(published), 1)
+        self.assertEqual(published[0].start_perf, 100.0)
+        self.assertEqual([(entry[3], entry[4]) for entry in published[0].entries], [(39, (10, 20, 30)), (39, None)])
+        self.assertIsNone(midiports.led_timeline)
+
     def test_native_rtp_fallback_schedules_simultaneous_events_before_waiting(self):
         midiports = FakeMidiPorts()
         scheduler = MidiPlaybackScheduler(midiports, FakeSaving(), FakeMenu(), None, None)
@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 
 import sys
+import threading
+import time
 import unittest
 
 sys.path.append("./")
 sys.path.append("../")
 
-from lib.midi_queues import MidiQueues
+from lib.midi_queues import MidiQueues, SpscRingQueue
 
 
 class FakeMidiMessage:
@@ -143,6 +145,97 @@ class TestMidiQueues(unittest.TestCase):
 
         self.assertEqual(popped, messages)
 
+    def test_input_wakeup_fires_once_per_empty_to_non_empty_transition(self):
+        for spsc_live in (False, True):
+            queues = MidiQueues(spsc_live=spsc_live)
+            since = queues.input_sequence
+
+            self.assertFalse(queues.wait_for_input(0.0, since))
+            queues.enqueue_all_live(FakeMidiMessage(note=60), timestamp=1.0, is_note=True)
+            queues.enqueue_all_live(FakeMidiMessage(note=61), timestamp=1.1, is_note=True)
+            self.assertTrue(queues.wait_for_input(0.0, since))
+            self.assertEqual(queues.input_sequence, since + 1)
+
+            since = queues.input_sequence
+            queues.drain_live_for_visualizer()
+            queues.enqueue_websocket(FakeMidiMessage(note=62), timestamp=2.0)
+            queues.enqueue_file(FakeMidiMessage(note=63), timestamp=2.0)
+            self.assertEqual(queues.input_sequence, since + 2)
+
+    def test_waiting_consumer_is_woken_by_producer_thread(self):
+        queues = MidiQueues(spsc_live=True)
+        since = queues.input_sequence
+        producer = threading.Timer(0.05, queues.enqueue_live, args=(FakeMidiMessage(),))
+
+        started = time.perf_counter()
+        producer.start()
+        woke = queues.wait_for_input(5.0, since)
+        producer.join()
+
+        self.assertTrue(woke)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(len(queues.live_visualizer_queue), 1)
+
+
+class TestSpscRingQueue(unittest.TestCase):
+    def test_overflow_keeps_fifo_order_without_dropping(self):
+        ring = SpscRingQueue(capacity=4)
+
+        for index in range(10):
+            ring.append(index)
+
+        self.assertEqual(len(ring), 10)
+        self.assertEqual(ring[0], 0)
+        self.assertEqual(ring.drain(3), [0, 1, 2])
+        ring.append(10)
+        self.assertEqual(ring.popleft(), 3)
+        self.assertEqual(ring.drain(), [4, 5, 6, 7, 8, 9, 10])
+        self.assertFalse(ring)
+        with self.assertRaises(IndexError):
+            ring.popleft()
+
+    def test_peek_returns_oldest_item_or_none_without_raising(self):
+        ring = SpscRingQueue(capacity=2)
+
+        self.assertIsNone(ring.peek())
+        for index in range(3):
+            ring.append(index)
+        self.assertEqual(ring.peek(), 0)
+        ring.drain(2)
+        self.assertEqual(ring.peek(), 2)
+        ring.popleft()
+        self.assertIsNone(ring.peek())
+
+    def test_concurrent_producer_and_consumer_see_every_item_in_order(self):
+        ring = SpscRingQueue(capacity=64)
+        total = 100_000
+        received = []
+
+        def produce():
+            for index in range(total):
+                ring.append(index)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        while len(received) < total:
+            received.extend(ring.drain(64))
+        producer.join()
+
+        self.assertEqual(received, list(range(total)))
+
+    def test_spsc_live_queues_fan_out_without_the_lock(self):
+        queues = MidiQueues(spsc_live=True)
+        msg = FakeMidiMessage(note=64)
+
+        self.assertIsInstance(queues.live_visualizer_queue, SpscRingQueue)
+        self.assertTrue(queues.enqueue_all_live(msg, timestamp=3.0, source="rtp_rx", is_note=True))
+
+        self.assertEqual(queues.queue_depth(queues.live_visualizer_queue), 1)
+        self.assertEqual(queues.drain_live_for_visualizer(max_messages=64), [(msg, 3.0)])
+        self.assertEqual(queues.pop_queue(queues.live_learning_queue), (msg, 3.0))
+        self.assertEqual(queues.pop_live_forward(), (msg, 3.0, "rtp_rx"))
+        self.assertEqual(queues.snapshot_depths()["live_input"], 0)
+
 
 if __name__ == "__main__":
     unittest.main()
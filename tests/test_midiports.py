@@ -5,9 +5,12 @@ import unittest
 from collections import deque
 from unittest.mock import patch
 
+import mido
+
 sys.path.append("./")
 sys.path.append("../")
 
+from lib.midi_event import PackedMidiEvent
 from lib.midi_queues import MidiQueues
 from lib.midiports import MidiPorts
 
@@ -27,6 +30,7 @@ class FakePlayPort:
 class FakeInputBackend:
     def __init__(self):
         self.calls = []
+        self.raw_callback = None
 
     def ignore_types(self, sysex=True, timing=True, active_sense=True):
         self.calls.append(
@@ -37,12 +41,27 @@ class FakeInputBackend:
             }
         )
 
+    def cancel_callback(self):
+        self.raw_callback = None
+
+    def set_callback(self, callback):
+        self.raw_callback = callback
+
 
 class FakeInputPort:
     def __init__(self):
         self._rt = FakeInputBackend()
 
 
+class FakePendingQueue:
+    def __init__(self, messages):
+        self.messages = list(messages)
+
+    def iterpoll(self):
+        while self.messages:
+            yield self.messages.pop(0)
+
+
 class FakeMidiMessage:
     def __init__(
         self,
@@ -160,6 +179,24 @@ class TestMidiPorts(unittest.TestCase):
         self.assertIs(learning_msg, msg)
         self.assertIs(visualizer_msg, msg)
 
+    def test_live_mido_input_is_packed_once_and_unpacked_for_the_port(self):
+        ports = self.make_ports()
+        msg = mido.Message("note_on", channel=2, note=64, velocity=70)
+
+        ports.msg_callback(msg)
+
+        visualizer_msg, timestamp = ports.midi_queue.popleft()
+        learning_msg, _ = ports.learning_midi_queue.popleft()
+        self.assertIsInstance(visualizer_msg, PackedMidiEvent)
+        self.assertIs(learning_msg, visualizer_msg)
+        self.assertEqual(visualizer_msg.timestamp, timestamp)
+        self.assertEqual(len(ports.websocket_publish_queue), 1)
+
+        ports._flush_live_forward_queue_once()
+
+        self.assertEqual(ports.playport.sent, [msg])
+        self.assertIsInstance(ports.playport.sent[0], mido.Message)
+
     def test_live_and_forward_critical_queues_do_not_drop_when_capacity_hint_is_small(self):
         ports = self.make_ports(midi_maxlen=4, forward_maxlen=16)
         first = FakeMidiMessage(note=60)
@@ -242,6 +279,52 @@ class TestMidiPorts(unittest.TestCase):
         self.assertEqual(len(ports.websocket_publish_queue), 0)
         self.assertEqual(ports.ignored_counts["clock"], 1)
 
+    def test_raw_callback_packs_channel_messages_and_drops_realtime_bytes(self):
+        ports = self.make_ports()
+
+        ports.raw_msg_callback(([0xF8], 0.0))
+        ports.raw_msg_callback(([0xFE], 0.0))
+        ports.raw_msg_callback(([0x91, 60, 100], 0.001))
+        ports.raw_msg_callback(([0xB0, 64, 127], 0.001))
+        ports.raw_msg_callback(([0xF0, 0x7D, 0x01, 0xF7], 0.001))
+
+        queued = [msg for msg, _ in ports.midi_queue]
+        self.assertEqual([msg.type for msg in queued], ["note_on", "control_change", "sysex"])
+        self.assertIsInstance(queued[0], PackedMidiEvent)
+        self.assertEqual((queued[0].channel, queued[0].note, queued[0].velocity), (1, 60, 100))
+        self.assertIsInstance(queued[2], mido.Message)
+        self.assertEqual(ports.ignored_counts, {"clock": 1, "active_sensing": 1})
+        self.assertEqual(len(ports.websocket_publish_queue), 1)
+
+    def test_raw_ingest_attaches_to_rtmidi_backend_and_replays_pending_input(self):
+        ports = self.make_ports()
+        ports.raw_input_ingest = True
+        ports.usersettings = type(
+            "FakeSettings",
+            (),
+            {"get_setting_value": lambda self, name: "default"},
+        )()
+        input_port = FakeInputPort()
+        input_port._queue = FakePendingQueue([mido.Message("note_on", note=61, velocity=50)])
+        opened = []
+
+        def fake_open_input(port_name, callback=None):
+            opened.append(callback)
+            return input_port
+
+        with patch(
+            "lib.midiports._get_cached_input_names",
+            return_value=["USB AudioDevice:USB AudioDevice MIDI 1 16:0"],
+        ), patch("lib.midiports._get_cached_output_names", return_value=[]), patch(
+            "lib.midiports.mido.open_input",
+            side_effect=fake_open_input,
+        ):
+            self.assertTrue(ports._reconnect_input(force=True))
+
+        self.assertEqual(opened, [None])
+        self.assertEqual(input_port._rt.raw_callback, ports.raw_msg_callback)
+        self.assertEqual([msg.note for msg, _ in ports.midi_queue], [61])
+
     def test_enqueue_rtp_message_routes_software_notes_through_forward_queue(self):
         ports = self.make_ports()
         msg = FakeMidiMessage(note=72)
@@ -338,6 +421,17 @@ class TestMidiPorts(unittest.TestCase):
             ],
         )
 
+    def test_queue_age_survives_the_consumer_emptying_the_queue_mid_sample(self):
+        ports = self.make_ports()
+
+        class DrainedWhileSampling(deque):
+            # Looks non-empty to a bool check, then the consumer wins the race for [0]
+            def __bool__(self):
+                return True
+
+        self.assertEqual(ports._queue_oldest_age_ms(DrainedWhileSampling(), now_perf=5.0), 0.0)
+        self.assertEqual(ports._queue_oldest_age_ms(deque([("msg", 4.0)]), now_perf=5.0), 1000.0)
+
     def test_diagnostics_refresh_runtime_play_port_label_from_current_alsa_slot(self):
         ports = self.make_ports()
         ports.actual_play_port = "rtpmidid:PC_Robin 128:3"
@@ -498,6 +592,39 @@ class TestMidiPorts(unittest.TestCase):
         self.assertEqual(live_input["max_oldest_age_ms"], 3000.0)
         self.assertEqual(live_forward["current_depth"], 1)
 
+    def test_queue_diagnostics_are_sampled_not_refreshed_per_message(self):
+        ports = self.make_ports()
+        refreshed = []
+        ports.refresh_queue_diagnostics = lambda now_perf=None: refreshed.append(now_perf)
+
+        ports.enqueue_rtp_message(FakeMidiMessage(), msg_timestamp=1.0)
+        ports.schedule_rtp_message(FakeMidiMessage(note=61), due_time=1.0, enqueued_at=1.0)
+        while ports._flush_live_forward_queue_once():
+            pass
+        self.assertEqual(len(ports.playport.sent), 2)
+        self.assertEqual(refreshed, [])
+
+        self.assertTrue(ports.sample_queue_diagnostics(now_perf=10.0))
+        self.assertFalse(ports.sample_queue_diagnostics(now_perf=10.1))
+        self.assertTrue(ports.sample_queue_diagnostics(now_perf=10.3))
+        self.assertEqual(refreshed, [10.0, 10.3])
+
+    def test_forward_sends_feed_latency_histograms(self):
+        ports = self.make_ports()
+
+        with patch("lib.midiports.time.perf_counter", side_effect=[10.0, 10.002, 12.0, 12.001]):
+            ports.enqueue_rtp_message(FakeMidiMessage(), msg_timestamp=9.99)
+            ports._flush_live_forward_queue_once()
+            ports.schedule_rtp_message(FakeMidiMessage(note=61), due_time=11.995, enqueued_at=11.0)
+            ports._flush_live_forward_queue_once()
+
+        latency = ports.runtime_diagnostics.snapshot()["latency"]
+
+        self.assertEqual(latency["rtp_send"]["count"], 2)
+        self.assertAlmostEqual(latency["rtp_send"]["max_ms"], 2.0, places=2)
+        self.assertAlmostEqual(latency["midi_in_to_rtp_send"]["p50_ms"], 12.0, delta=12.0 * 0.0625)
+        self.assertAlmostEqual(latency["scheduled_rtp_lateness"]["max_ms"], 5.0, places=2)
+
     def test_websocket_publish_loop_does_not_back_off_while_queue_still_has_backlog(self):
         ports = self.make_ports()
         ports.worker_running = True
@@ -1,14 +1,28 @@
 from types import SimpleNamespace
 import sys
 from pathlib import Path
+from xml.etree import ElementTree
 
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from lib.functions import get_note_position as legacy_get_note_position
+from lib.ledsettings import LedSettings
 from lib.ledstrip import LedStrip
 
 
+class FakeUserSettings:
+    def __init__(self):
+        root = ElementTree.parse(Path(__file__).resolve().parents[1] / "config" / "default_settings.xml").getroot()
+        self.values = {element.tag: element.text for element in root}
+
+    def get_setting_value(self, name):
+        return self.values.get(name)
+
+    def change_setting_value(self, name, value):
+        self.values[name] = value
+
+
 def _expected_note_position(note, strip, ledsettings):
     note_offset = 0
     for threshold, offset in ledsettings.note_offsets:
@@ -92,3 +106,43 @@ def test_legacy_get_note_position_delegates_to_ledstrip_cache_when_available():
 
     assert legacy_get_note_position(64, strip, ledsettings) == 42
     assert calls == [(64, ledsettings)]
+
+
+def test_note_position_table_is_rebuilt_only_when_note_offsets_version_changes():
+    ledsettings = SimpleNamespace(note_offsets=[[40, 2]], note_offsets_version=0)
+    strip = _strip(led_number=90, leds_per_meter=72, shift=1, reverse=0)
+
+    strip.get_note_position(64, ledsettings)
+    table = strip._note_position_cache
+    assert len(table) == 128
+
+    # In-place edits go through LedSettings methods, which bump the version
+    ledsettings.note_offsets[0][1] = 5
+    assert strip.get_note_position(64, ledsettings) == table[64]
+    assert strip._note_position_cache is table
+
+    ledsettings.note_offsets_version += 1
+    assert strip.get_note_position(64, ledsettings) == _expected_note_position(64, strip, ledsettings)
+    assert strip._note_position_cache is not table
+
+
+def test_note_position_outside_midi_range_is_computed_directly():
+    ledsettings = _settings([(30, 1)])
+    strip = _strip(led_number=100, leds_per_meter=72, shift=0, reverse=0)
+
+    for note in (-3, 128, 140):
+        assert strip.get_note_position(note, ledsettings) == _expected_note_position(note, strip, ledsettings)
+
+
+def test_note_position_table_is_rebuilt_after_settings_reload_with_new_offsets():
+    usersettings = FakeUserSettings()
+    usersettings.values["note_offsets"] = "[[60, 10]]"
+    ledsettings = LedSettings(usersettings)
+    strip = _strip(led_number=200, leds_per_meter=144, shift=0, reverse=0)
+    assert strip.get_note_position(70, ledsettings) == _expected_note_position(70, strip, ledsettings)
+
+    # A preset load or app state reload re-reads every setting into the same object
+    usersettings.values["note_offsets"] = "[[60, 0]]"
+    ledsettings.reload_settings()
+
+    assert strip.get_note_position(70, ledsettings) == _expected_note_position(70, strip, ledsettings) == 100
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 
+import json
 import sys
 import socket
+import threading
+import time
 import unittest
 from pathlib import Path
 from unittest.mock import patch
@@ -12,11 +15,20 @@ sys.path.append("./")
 sys.path.append("../")
 
 from lib.reliable_midi_playback_client import (
+    CHUNK_ENCODING_BINARY,
+    CompiledMidiPlayback,
+    ReliableMidiPlaybackClient,
     ReliablePlaybackError,
+    StreamingPlaybackHandle,
     _create_connection,
+    _recv_frame,
+    _send_frame,
     compile_midi_file,
     compile_midi_messages,
+    decode_binary_chunk,
+    encode_binary_chunk,
 )
+from lib.compiled_song_cache import PackedMidiPlayback
 
 
 class FakeSocket:
@@ -35,6 +47,347 @@ class FakeSocket:
         self.closed = True
 
 
+class StandInReceiver:
+    """
+    Local TCP receiver speaking the reliable playback protocol, one session per connection.
+
+    With ``streaming`` it answers the version 2 header with ``ready``/``window`` and acks
+    every chunk after ``ack_delay`` seconds; otherwise it only accepts a version 1
+    ``prepare`` carrying all events and meets the streaming header as ``unknown_header``
+    says: send an ``"error"`` frame, ``"close"`` the connection or stay ``"silent"``.
+    ``encodings`` are the chunk encodings it accepts besides JSON. With ``keep_alive`` a
+    connection serves sessions until the client closes it.
+    """
+
+    def __init__(self, streaming=True, window=64, ack_delay=0.0, encodings=(), keep_alive=False,
+                 unknown_header="error"):
+        self.streaming = streaming
+        self.unknown_header = unknown_header
+        self.keep_alive = keep_alive
+        self.connections = 0
+        self.encodings = encodings
+        self.encoding = None
+        self.window = window
+        self.ack_delay = ack_delay
+        self.events = []
+        self.prepares = []
+        self.max_in_flight = 0
+        self.received_at_start = None
+        self.stopped = threading.Event()
+        self.errors = []
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.port = self.server.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        try:
+            self.server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.server.close()
+        self.thread.join(timeout=2)
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            with conn:
+                try:
+                    while self._session(conn) and self.keep_alive:
+                        pass
+                except (OSError, ReliablePlaybackError):
+                    pass
+                except AssertionError as e:
+                    self.errors.append(e)
+
+    def _session(self, conn):
+        """Serve one session; returns True if it completed."""
+        prepare = _recv_frame(conn)
+        self.events = []
+        self.prepares.append(prepare)
+        session_id = prepare["sessionId"]
+        total = prepare["total"]
+        if prepare.get("streaming"):
+            if not self.streaming:
+                if self.unknown_header == "error":
+                    _send_frame(conn, {"type": "error", "message": "unsupported version"})
+                elif self.unknown_header == "silent":
+                    # Wait for the events a version 1 prepare would carry until the client gives up
+                    _recv_frame(conn)
+                return False
+            ready = {"type": "ready", "sessionId": session_id, "window": self.window}
+            offered = [encoding for encoding in prepare.get("encodings", []) if encoding in self.encodings]
+            if offered:
+                self.encoding = ready["encoding"] = offered[0]
+            _send_frame(conn, ready)
+        else:
+            self.events.extend(prepare["events"])
+            _send_frame(conn, {"type": "prepared", "sessionId": session_id, "received": len(self.events)})
+
+        acked = len(self.events)
+        started = False
+        while not (started and len(self.events) == total):
+            frame = _recv_frame(conn)
+            if frame["type"] == "chunk":
+                assert frame["first"] == len(self.events), "chunk out of order"
+                self.events.extend(frame["events"])
+                in_flight = len(self.events) - acked
+                self.max_in_flight = max(self.max_in_flight, in_flight)
+                assert in_flight <= self.window, "client overran the window"
+                time.sleep(self.ack_delay)
+                acked = len(self.events)
+                _send_frame(conn, {"type": "ack", "sessionId": session_id, "received": acked})
+            elif frame["type"] == "start":
+                started = True
+                self.received_at_start = len(self.events)
+            elif frame["type"] == "stop":
+                self.stopped.set()
+                return False
+        _send_frame(conn, {"type": "completed", "sessionId": session_id, "processed": total, "dropped": 0})
+        return True
+
+
+def make_compiled(count, spacing_us=10_000):
+    events = [{"seq": seq, "dueUs": seq * spacing_us, "data": [0x90, 60 + seq % 12, 100]} for seq in range(count)]
+    return CompiledMidiPlayback(events=events, local_messages=[], total_delay_s=count * spacing_us / 1e6)
+
+
+class TestStreamingPrepare(unittest.TestCase):
+    def make_client(self, receiver, **kwargs):
+        return ReliableMidiPlaybackClient(host="127.0.0.1", port=receiver.port, timeout=2.0, **kwargs)
+
+    def test_starts_after_prebuffer_and_streams_rest_in_order(self):
+        receiver = StandInReceiver(window=64)
+        self.addCleanup(receiver.close)
+        compiled = make_compiled(1000)
+        client = self.make_client(receiver, chunk_events=16, prebuffer_ms=500)
+
+        handle = client.play_events("song.mid", compiled, start_delay_ms=0)
+        completed = handle.wait_completed(timeout=5)
+
+        self.assertIsInstance(handle, StreamingPlaybackHandle)
+        self.assertEqual(completed["processed"], 1000)
+        self.assertEqual(receiver.events, compiled.events)
+        self.assertEqual(receiver.errors, [])
+        # 500 ms of 10 ms spaced events are buffered before start, not the whole song
+        self.assertGreaterEqual(receiver.received_at_start, 51)
+        self.assertLess(receiver.received_at_start, 1000)
+        self.assertLessEqual(receiver.max_in_flight, 64)
+        self.assertNotIn("events", receiver.prepares[0])
+
+    def test_stop_mid_stream(self):
+        receiver = StandInReceiver(window=32, ack_delay=0.02)
+        self.addCleanup(receiver.close)
+        compiled = make_compiled(5000)
+        client = self.make_client(receiver, chunk_events=32, prebuffer_ms=100)
+
+        handle = client.play_events("song.mid", compiled, start_delay_ms=0)
+        handle.stop()
+
+        self.assertTrue(receiver.stopped.wait(2))
+        self.assertLess(len(receiver.events), 5000)
+        self.assertEqual(receiver.events, compiled.events[:len(receiver.events)])
+        with self.assertRaises(ReliablePlaybackError):
+            handle.wait_completed(timeout=1)
+
+    def test_streams_binary_chunks_when_receiver_accepts_them(self):
+        receiver = StandInReceiver(window=64, encodings=(CHUNK_ENCODING_BINARY,))
+        self.addCleanup(receiver.close)
+        compiled = make_compiled(300)
+        client = self.make_client(receiver, chunk_events=32, prebuffer_ms=200)
+
+        completed = client.play_events("song.mid", compiled, start_delay_ms=0).wait_completed(timeout=5)
+
+        self.assertEqual(completed["processed"], 300)
+        self.assertEqual(receiver.encoding, CHUNK_ENCODING_BINARY)
+        self.assertEqual(receiver.events, compiled.events)
+        self.assertEqual(receiver.errors, [])
+
+    def test_falls_back_to_single_prepare_for_version_1_receiver(self):
+        receiver = StandInReceiver(streaming=False)
+        self.addCleanup(receiver.close)
+        compiled = make_compiled(100)
+        client = self.make_client(receiver)
+
+        handle = client.play_events("song.mid", compiled, start_delay_ms=0)
+        completed = handle.wait_completed(timeout=5)
+
+        self.assertEqual(completed["processed"], 100)
+        self.assertEqual(receiver.events, compiled.events)
+        self.assertFalse(client.streaming)
+        self.assertEqual([prepare["version"] for prepare in receiver.prepares], [2, 1])
+
+    def test_falls_back_when_version_1_receiver_closes_or_ignores_the_header(self):
+        for unknown_header in ("close", "silent"):
+            with self.subTest(unknown_header=unknown_header):
+                receiver = StandInReceiver(streaming=False, unknown_header=unknown_header)
+                self.addCleanup(receiver.close)
+                compiled = make_compiled(100)
+                client = ReliableMidiPlaybackClient(host="127.0.0.1", port=receiver.port, timeout=0.5)
+
+                completed = client.play_events("song.mid", compiled, start_delay_ms=0).wait_completed(timeout=5)
+
+                self.assertEqual(completed["processed"], 100)
+                self.assertEqual(receiver.events, compiled.events)
+                self.assertFalse(client.streaming)
+                self.assertEqual([prepare["version"] for prepare in receiver.prepares], [2, 1])
+                self.assertEqual(receiver.connections, 2)
+
+    def test_unreachable_receiver_is_not_retried_as_version_1(self):
+        with socket.create_server(("127.0.0.1", 0)) as unused:
+            port = unused.getsockname()[1]
+        client = ReliableMidiPlaybackClient(host="127.0.0.1", port=port, timeout=0.5)
+
+        with patch.object(client, "_play_prepared") as play_prepared:
+            with self.assertRaises(ReliablePlaybackError):
+                client.play_events("song.mid", make_compiled(10), start_delay_ms=0)
+
+        play_prepared.assert_not_called()
+        self.assertTrue(client.streaming)
+
+
+class TestConnectionReuse(unittest.TestCase):
+    def make_receiver(self, **kwargs):
+        receiver = StandInReceiver(**kwargs)
+        self.addCleanup(receiver.close)
+        return receiver
+
+    def make_client(self, port, **kwargs):
+        client = ReliableMidiPlaybackClient(host="127.0.0.1", port=port, timeout=2.0, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def play(self, client, count=50):
+        return client.play_events("song.mid", make_compiled(count), start_delay_ms=0).wait_completed(timeout=5)
+
+    def test_completed_session_connection_is_reused_for_next_song(self):
+        receiver = self.make_receiver(keep_alive=True)
+        client = self.make_client(receiver.port)
+
+        self.assertEqual(self.play(client)["processed"], 50)
+        self.assertEqual(self.play(client, 80)["processed"], 80)
+
+        self.assertEqual(receiver.connections, 1)
+
+    def test_connection_closed_by_receiver_is_replaced(self):
+        receiver = self.make_receiver()
+        client = self.make_client(receiver.port)
+
+        self.play(client)
+        self.assertEqual(self.play(client)["processed"], 50)
+
+        self.assertEqual(receiver.connections, 2)
+
+    def test_resolution_is_cached_until_ttl_expires(self):
+        receiver = self.make_receiver()
+        for ttl, expected_lookups in ((300.0, 1), (0.0, 2)):
+            client = self.make_client(receiver.port, resolution_ttl_s=ttl)
+            with patch(
+                "lib.reliable_midi_playback_client.socket.getaddrinfo", wraps=socket.getaddrinfo
+            ) as getaddrinfo:
+                self.play(client)
+                self.play(client)
+            self.assertEqual(getaddrinfo.call_count, expected_lookups)
+
+    def test_probe_reports_availability_and_keeps_connection_for_next_song(self):
+        receiver = self.make_receiver(keep_alive=True)
+        client = self.make_client(receiver.port)
+
+        self.assertTrue(client.probe())
+        self.play(client)
+
+        self.assertTrue(client.available)
+        self.assertEqual(receiver.connections, 1)
+
+    def test_probe_reports_unreachable_receiver(self):
+        with socket.create_server(("127.0.0.1", 0)) as unused:
+            port = unused.getsockname()[1]
+        client = self.make_client(port)
+
+        self.assertFalse(client.probe())
+        self.assertFalse(client.available)
+        self.assertTrue(client.last_error)
+
+
+    def test_failed_resolution_is_not_retried_until_negative_ttl_expires(self):
+        failure = socket.gaierror(-2, "Name or service not known")
+        for ttl, expected_lookups in ((60.0, 1), (0.0, 2)):
+            client = ReliableMidiPlaybackClient(host="missing.local", negative_resolution_ttl_s=ttl)
+            self.addCleanup(client.close)
+            with patch("lib.reliable_midi_playback_client.socket.getaddrinfo", side_effect=failure) as getaddrinfo:
+                self.assertFalse(client.probe())
+                self.assertFalse(client.probe())
+            self.assertEqual(getaddrinfo.call_count, expected_lookups)
+            self.assertIn("Name or service not known", client.last_error)
+
+    def test_health_probe_backs_off_while_receiver_is_unavailable(self):
+        client = ReliableMidiPlaybackClient(host="127.0.0.1")
+        results = iter([False, False, False, False, True, False])
+        delays = []
+
+        class RecordingWake:
+            def wait(self, delay):
+                delays.append(delay)
+                if len(delays) == 6:
+                    client._probe_stop.set()
+
+            def clear(self):
+                pass
+
+        client.probe = lambda: next(results)
+        client._probe_wake = RecordingWake()
+        client.start_health_probe(interval_s=10.0, max_interval_s=60.0)
+        client._probe_thread.join(timeout=5)
+
+        self.assertEqual(delays, [20.0, 40.0, 60.0, 60.0, 10.0, 20.0])
+
+    def test_requested_probe_runs_without_waiting_out_the_interval(self):
+        client = ReliableMidiPlaybackClient(host="127.0.0.1")
+        self.addCleanup(client.close)
+        probed = threading.Semaphore(0)
+        client.probe = lambda: probed.release() or False
+
+        client.start_health_probe(interval_s=60.0)
+        self.assertTrue(probed.acquire(timeout=5))
+        client.request_probe()
+
+        self.assertTrue(probed.acquire(timeout=5))
+
+
+class TestBinaryChunkEncoding(unittest.TestCase):
+    def test_round_trip_from_packed_and_dict_songs(self):
+        mid = mido.MidiFile(ticks_per_beat=480)
+        track = mido.MidiTrack()
+        mid.tracks.append(track)
+        track.append(mido.Message("note_on", note=60, velocity=100, time=0))
+        track.append(mido.Message("program_change", program=5, time=0))
+        track.append(mido.Message("sysex", data=[1, 2, 3], time=480))
+        track.append(mido.Message("note_off", note=60, velocity=0, time=96000))
+        compiled = compile_midi_messages(mid)
+        packed = PackedMidiPlayback.from_midi_file(mid)
+
+        for song in (compiled, packed):
+            decoded = decode_binary_chunk(encode_binary_chunk(song, 1, 3))
+            self.assertEqual(decoded["first"], 1)
+            self.assertEqual(decoded["events"], compiled.events[1:])
+
+    def test_dense_score_is_an_order_of_magnitude_smaller_than_json(self):
+        packed = PackedMidiPlayback.from_midi_file(mido.MidiFile(str(Path("Songs") / "La Campanella.mid")))
+        binary_size = len(encode_binary_chunk(packed, 0, packed.total))
+        json_size = len(json.dumps(packed.events, separators=(",", ":")))
+
+        self.assertLess(binary_size * 5, json_size)
+
+    def test_truncated_chunk_is_rejected(self):
+        payload = encode_binary_chunk(make_compiled(3), 0, 3)
+        with self.assertRaises(ReliablePlaybackError):
+            decode_binary_chunk(payload[:-2])
+
+
 class TestReliableMidiPlaybackClient(unittest.TestCase):
     def test_connection_uses_resolved_numeric_endpoint(self):
         fake_socket = FakeSocket()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import sys
+import threading
 import unittest
 
 sys.path.append("./")
@@ -54,6 +55,109 @@ class TestRuntimeDiagnostics(unittest.TestCase):
         self.assertEqual(snapshot["gauges"], {})
         self.assertEqual(snapshot["metadata"], {})
 
+    def test_samples_from_several_threads_are_merged_in_snapshot(self):
+        diagnostics = RuntimeDiagnostics()
+        diagnostics.record_duration("rtp_send", 0.001)
+        diagnostics.increment_counter("rtp_send_calls")
+
+        def worker(seconds):
+            for _ in range(100):
+                diagnostics.increment_counter("rtp_send_calls")
+            diagnostics.record_duration("rtp_send", seconds)
+
+        threads = [threading.Thread(target=worker, args=(0.003,)), threading.Thread(target=worker, args=(0.005,))]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        diagnostics.set_gauge("scheduled_rtp_last_late_ms", 1.5)
+
+        snapshot = diagnostics.snapshot()
+        rtp_send = snapshot["timings"]["rtp_send"]
+
+        self.assertEqual(snapshot["counters"]["rtp_send_calls"], 201)
+        self.assertEqual(rtp_send["count"], 3)
+        self.assertEqual(rtp_send["avg_ms"], 3.0)
+        self.assertEqual(rtp_send["max_ms"], 5.0)
+        self.assertEqual(rtp_send["last_ms"], 5.0)
+        self.assertEqual(snapshot["gauges"]["scheduled_rtp_last_late_ms"], 1.5)
+
+    def test_finished_threads_shards_are_retired_without_losing_samples(self):
+        diagnostics = RuntimeDiagnostics()
+
+        def song(seconds):
+            diagnostics.increment_counter("songs_played")
+            diagnostics.record_duration("song_compile", seconds)
+            diagnostics.record_latency("note_latency", seconds)
+
+        for index in range(20):
+            thread = threading.Thread(target=song, args=(0.001 * (index + 1),))
+            thread.start()
+            thread.join()
+        diagnostics.increment_counter("songs_played")
+
+        self.assertLessEqual(len(diagnostics._shards), 2)
+        snapshot = diagnostics.snapshot()
+        self.assertEqual(len(diagnostics._shards), 1)
+        self.assertEqual(snapshot["counters"]["songs_played"], 21)
+        self.assertEqual(snapshot["timings"]["song_compile"]["count"], 20)
+        self.assertEqual(snapshot["timings"]["song_compile"]["max_ms"], 20.0)
+        self.assertEqual(snapshot["timings"]["song_compile"]["last_ms"], 20.0)
+        self.assertEqual(snapshot["latency"]["note_latency"]["count"], 20)
+        self.assertEqual(diagnostics.snapshot()["counters"]["songs_played"], 21)
+
+    def test_reset_discards_samples_held_by_other_threads(self):
+        diagnostics = RuntimeDiagnostics()
+        recorded = threading.Event()
+        resume = threading.Event()
+
+        def worker():
+            diagnostics.increment_counter("midi_callback_calls")
+            recorded.set()
+            resume.wait(1.0)
+            diagnostics.increment_counter("midi_callback_calls")
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        recorded.wait(1.0)
+        diagnostics.reset()
+        resume.set()
+        thread.join()
+
+        self.assertEqual(diagnostics.snapshot()["counters"], {"midi_callback_calls": 1})
+
+    def test_latency_histogram_reports_percentiles_within_bucket_precision(self):
+        diagnostics = RuntimeDiagnostics()
+        for micros in range(1, 1001):
+            diagnostics.record_latency("midi_in_to_led", micros / 1_000_000.0)
+
+        def other_thread():
+            diagnostics.record_latency("midi_in_to_led", 0.25)
+
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join()
+
+        latency = diagnostics.snapshot()["latency"]["midi_in_to_led"]
+
+        self.assertEqual(latency["count"], 1001)
+        self.assertEqual(latency["max_ms"], 250.0)
+        self.assertAlmostEqual(latency["p50_ms"], 0.5, delta=0.5 * 0.0625)
+        self.assertAlmostEqual(latency["p95_ms"], 0.95, delta=0.95 * 0.0625)
+        self.assertAlmostEqual(latency["p99_ms"], 0.99, delta=0.99 * 0.0625)
+        self.assertAlmostEqual(latency["p999_ms"], 1.0, delta=1.0 * 0.0625)
+
+    def test_disabled_diagnostics_record_nothing(self):
+        diagnostics = RuntimeDiagnostics(enabled=False)
+
+        diagnostics.record_duration("main_loop", 0.005)
+        diagnostics.record_latency("rtp_send", 0.001)
+        diagnostics.increment_counter("strip_show_calls")
+
+        snapshot = diagnostics.snapshot()
+        self.assertEqual(snapshot["timings"], {})
+        self.assertEqual(snapshot["latency"], {})
+        self.assertEqual(snapshot["counters"], {})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -36,6 +36,16 @@ class TestStateManager(unittest.TestCase):
         self.assertEqual(manager.last_midi_activity, supplied_time)
         self.assertEqual(manager.last_user_activity, supplied_time)
 
+    def test_frame_rate_follows_state_and_recent_midi(self):
+        manager = StateManager(FakeUserSettings())
+        manager.current_state = SystemState.IDLE
+        idle_fps = manager.get_frame_rate(current_time=5000.0)
+
+        manager.update_midi_activity(current_time=4999.0)
+
+        self.assertLess(idle_fps, manager.get_frame_rate(current_time=5000.0))
+        self.assertEqual(manager.get_frame_rate(current_time=5000.0), 120.0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -91,6 +91,20 @@ class TestUserSettings(unittest.TestCase):
 
         self.assertEqual(self.us.get_cms("VelocityRainbow", "offset"), "210")
 
+    def test_08_snapshot(self):
+        snapshot = self.us.snapshot()
+        self.assertIs(self.us.snapshot(), snapshot)
+        self.assertEqual(snapshot["screen_on"], 1)
+        self.assertEqual(snapshot[["color_mode_settings", "VelocityRainbow", "scale"]], 120)
+        with self.assertRaises(TypeError):
+            snapshot["color_mode_settings"]["VelocityRainbow"]["scale"] = 1
+
+        self.us.set("screen_on", "0")
+        updated = self.us.snapshot()
+        self.assertGreater(updated.version, snapshot.version)
+        self.assertEqual(updated["screen_on"], 0)
+        self.assertEqual(snapshot["screen_on"], 1)
+
 
 if __name__ == '__main__':
     unittest.main()
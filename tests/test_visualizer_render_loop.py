@@ -0,0 +1,105 @@
+import sys
+import threading
+import time
+import types
+import unittest
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Drivers pick their null fallbacks first; the stubs below only satisfy modules that
+# import the hardware libraries directly, and are removed again once visualizer is loaded
+import lib.rpi_drivers
+
+rpi = types.ModuleType("RPi")
+rpi.GPIO = MagicMock()
+rpi_ws281x = types.ModuleType("rpi_ws281x")
+rpi_ws281x.Color = lambda red, green, blue: (int(red), int(green), int(blue))
+rpi_ws281x.PixelStrip = object
+rpi_ws281x.ws = types.SimpleNamespace()
+stubs = {"RPi": rpi, "RPi.GPIO": rpi.GPIO, "rpi_ws281x": rpi_ws281x}
+stubs = {name: module for name, module in stubs.items() if name not in sys.modules}
+sys.modules.update(stubs)
+try:
+    import visualizer
+finally:
+    for name in stubs:
+        sys.modules.pop(name, None)
+
+from lib.frame_scheduler import FrameScheduler
+from lib.led_timeline import TIMELINE_NOTE_ON, LedTimeline
+from lib.midi_playback_scheduler import MidiPlaybackScheduler
+from lib.midi_queues import MidiQueues
+from lib.runtime_diagnostics import RuntimeDiagnostics
+
+IDLE_FPS = 10.0
+
+
+class IdleStateManager:
+    def get_frame_rate(self):
+        return IDLE_FPS
+
+    def get_loop_delay(self):
+        return 1.0 / IDLE_FPS
+
+
+class TimelineProcessor:
+    """Applies due timeline entries like MIDIEventProcessor and notes how late each one was."""
+
+    def __init__(self, midiports):
+        self.midiports = midiports
+        self.lateness = []
+
+    def process_midi_events(self):
+        led_timeline = self.midiports.led_timeline
+        if led_timeline is None:
+            return False
+        now = time.perf_counter()
+        batch = led_timeline.take_due(now)
+        for entry in batch:
+            self.lateness.append(now - (led_timeline.start_perf + entry[0]))
+        return bool(batch)
+
+
+def make_app(midiports):
+    app = visualizer.VisualizerApp.__new__(visualizer.VisualizerApp)
+    app.ci = SimpleNamespace(midiports=midiports)
+    app.frame_scheduler = FrameScheduler(IDLE_FPS)
+    app.state_manager = IdleStateManager()
+    app.runtime_diagnostics = RuntimeDiagnostics()
+    app.midi_event_processor = TimelineProcessor(midiports)
+    app.render_frame = lambda started: app.frame_scheduler.frame_done(started)
+    app._midi_render_pending = False
+    app._render_stop = threading.Event()
+    app._render_thread = None
+    return app
+
+
+class TestRenderLoopBakedTimeline(unittest.TestCase):
+    def test_baked_entries_are_applied_on_time_from_idle(self):
+        midiports = SimpleNamespace(queues=MidiQueues(), midipending=deque(), led_timeline=None)
+        app = make_app(midiports)
+        app.start_render_thread()
+        self.addCleanup(app._render_thread.join, 2)
+        self.addCleanup(app._render_stop.set)
+        # Let the render thread settle into its idle wait
+        time.sleep(0.05)
+
+        note = SimpleNamespace(type="note_on", note=60, velocity=100)
+        entries = [(due_s, TIMELINE_NOTE_ON, note, 0, (1, 2, 3)) for due_s in (0.0, 0.13, 0.27)]
+        led_timeline = LedTimeline(entries, 0.27)
+        scheduler = MidiPlaybackScheduler(midiports, SimpleNamespace(), None, None, None)
+        scheduler._play_led_timeline("song.mid", led_timeline, time.perf_counter() + 0.02)
+
+        lateness = app.midi_event_processor.lateness
+        self.assertEqual(len(lateness), 3)
+        # An idle frame is 100 ms; every entry lands well within one of its due time
+        self.assertLess(max(lateness), 0.25 / IDLE_FPS)
+
+
+if __name__ == "__main__":
+    unittest.main()
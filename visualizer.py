@@ -13,14 +13,17 @@ from lib.functions import fastColorWipe, screensaver, \
     manage_idle_animation, stop_animations
 from lib.gpio_handler import GPIOHandler
 from lib.led_effects_processor import LEDEffectsProcessor
+from lib.light_modes import compile_light_mode
 from lib.ledsettings import LedSettings
 from lib.ledstrip import LedStrip
 from lib.menulcd import MenuLCD
 from lib.midi_event_processor import MIDIEventProcessor
 from lib.color_mode import ColorMode
 from lib.webinterface_manager import WebInterfaceManager
-from lib.state_manager import StateManager
+from lib.state_manager import StateManager, SystemState
 from lib.display_refresh_policy import DisplayRefreshPolicy
+from lib.frame_scheduler import FrameScheduler
+from lib.display_worker import DisplayWorker
 from lib.rpi_drivers import Color
 
 from lib.log_setup import logger
@@ -93,6 +96,7 @@ class VisualizerApp:
                                                          self.last_sustain,
                                                          self.pedal_deadzone,
                                                          runtime_diagnostics=self.ci.midiports.runtime_diagnostics)
+        self._settings_versions = None
         self.runtime_diagnostics = self.ci.midiports.runtime_diagnostics
         self._instrument_strip_show()
 
@@ -110,8 +114,18 @@ class VisualizerApp:
         self._last_menu_tick = 0.0
         self.display_refresh_policy = DisplayRefreshPolicy()
 
+        # LED rendering runs on its own thread, paced by a fixed-rate frame scheduler
+        self.frame_scheduler = FrameScheduler(self.state_manager.get_frame_rate())
+        self._midi_render_pending = False
+        self._render_stop = threading.Event()
+        self._render_thread = None
+
+        # LCD menu redraws are coalesced and rendered off the main loop
+        self.display_worker = DisplayWorker(self.render_menu, runtime_diagnostics=self.runtime_diagnostics)
+
     def _instrument_strip_show(self):
-        strip = self.ci.ledstrip.strip
+        # Time the driver render itself; frames the frame buffer skips as unchanged never reach it.
+        strip = getattr(self.ci.ledstrip.strip, "driver", self.ci.ledstrip.strip)
         if getattr(strip.show, "_plv_runtime_wrapped", False):
             return
 
@@ -165,6 +179,9 @@ class VisualizerApp:
             self._input_detected_blink_lock.release()
 
     def handle_shutdown(self, signum, frame):
+        render_stop = getattr(self, "_render_stop", None)
+        if render_stop is not None:
+            render_stop.set()
         ci = getattr(self, "ci", None)
         if ci is not None:
             try:
@@ -186,9 +203,13 @@ class VisualizerApp:
         ci = self.ci
         platform = ci.platform
         platform.manage_hotspot(ci.hotspot, ci.usersettings, ci.midiports, True)
+        self.start_render_thread()
+        self.display_worker.start()
 
+        queues = getattr(ci.midiports, "queues", None)
         while True:
             loop_start = time.perf_counter()
+            input_sequence = queues.input_sequence if queues is not None else None
             try:
                 elapsed_time = loop_start - ci.saving.start_time
             except Exception as e:
@@ -228,32 +249,95 @@ class VisualizerApp:
             self._run_timed("manage_hotspot", platform.manage_hotspot, hotspot, usersettings, midiports, False, now_wall)
             self._run_timed("process_gpio_keys", self.gpio_handler.process_gpio_keys)
 
-            event_loop_time = loop_start - self.event_loop_stamp
-            self.event_loop_stamp = loop_start
+            midiports.sample_queue_diagnostics()
+            self.runtime_diagnostics.record_duration("main_loop", time.perf_counter() - loop_start)
+            if queues is not None and self.state_manager.current_state == SystemState.IDLE:
+                # Leave IDLE (screensaver, idle animation) on the first note, not up to a loop delay later
+                queues.wait_for_input(sleep_interval, input_sequence)
+            else:
+                time.sleep(sleep_interval)  # Dynamic delay based on system state
 
-            midiports.refresh_queue_diagnostics(now_perf=loop_start)
-            fade_started = time.perf_counter()
-            fade_processed = self.led_effects_processor.process_fade_effects(event_loop_time)
-            self.runtime_diagnostics.record_duration("process_fade_effects", time.perf_counter() - fade_started)
-            midi_started = time.perf_counter()
-            midi_processed = self.midi_event_processor.process_midi_events()
-            self.runtime_diagnostics.record_duration("process_midi_events", time.perf_counter() - midi_started)
+    def start_render_thread(self):
+        if self._render_thread is not None and self._render_thread.is_alive():
+            return
+        self._render_stop.clear()
+        self._render_thread = threading.Thread(target=self.render_loop, name="led-render", daemon=True)
+        self._render_thread.start()
 
-            # Only update LEDs if effects changed them or MIDI events occurred
-            should_update = fade_processed or midi_processed
-            self.runtime_diagnostics.set_gauge("led_update_requested", int(bool(should_update)))
-            
-            if should_update:
-                ledstrip.strip.show()
-                self.update_fps_stats()
-            else:
-                # Clear FPS after short inactivity so UI doesn't show stale values
-                now_perf = time.perf_counter()
-                if (now_perf - self.last_frame_time) > 1.0:
-                    ledstrip.current_fps = 0.0
-            midiports.refresh_queue_diagnostics()
-            self.runtime_diagnostics.record_duration("main_loop", time.perf_counter() - loop_start)
-            time.sleep(sleep_interval)  # Dynamic delay based on system state
+    def render_loop(self):
+        """Drain MIDI into key state as it arrives and render LEDs on the frame scheduler's deadlines."""
+        scheduler = self.frame_scheduler
+        diagnostics = self.runtime_diagnostics
+        self.event_loop_stamp = time.perf_counter()
+        queues = getattr(self.ci.midiports, "queues", None)
+        while not self._render_stop.is_set():
+            input_sequence = queues.input_sequence if queues is not None else None
+            try:
+                midi_started = time.perf_counter()
+                if self.midi_event_processor.process_midi_events():
+                    self._midi_render_pending = True
+                diagnostics.record_duration("process_midi_events", time.perf_counter() - midi_started)
+
+                now = time.perf_counter()
+                scheduler.set_fps(self.state_manager.get_frame_rate())
+                if scheduler.is_due(now):
+                    self.render_frame(now)
+
+                # Wait for the next frame deadline or the state's loop delay, whichever is first;
+                # new MIDI wakes the loop early. A backlog left by the per-call budget does not wait.
+                wait = min(scheduler.time_until_next(), self.state_manager.get_loop_delay())
+                led_timeline = getattr(self.ci.midiports, "led_timeline", None)
+                if led_timeline is not None:
+                    # Baked playback bypasses the queues, so wake for its next entry instead
+                    until_due = led_timeline.seconds_until_next(time.perf_counter())
+                    if until_due is not None and until_due < wait:
+                        wait = until_due
+                if self.ci.midiports.midipending:
+                    wait = 0
+            except Exception as e:
+                logger.warning(f"[render loop] Unexpected exception occurred: {e}")
+                wait = 0.01
+            if wait > 0:
+                if queues is not None:
+                    queues.wait_for_input(wait, input_sequence)
+                else:
+                    time.sleep(wait)
+
+    def render_frame(self, frame_started):
+        ledstrip = self.ci.ledstrip
+        scheduler = self.frame_scheduler
+        diagnostics = self.runtime_diagnostics
+
+        event_loop_time = frame_started - self.event_loop_stamp
+        self.event_loop_stamp = frame_started
+
+        fade_processed = self.led_effects_processor.process_fade_effects(event_loop_time)
+        diagnostics.record_duration("process_fade_effects", time.perf_counter() - frame_started)
+
+        # Only update LEDs if effects changed them or MIDI events occurred
+        should_update = fade_processed or self._midi_render_pending
+        self._midi_render_pending = False
+        diagnostics.set_gauge("led_update_requested", int(bool(should_update)))
+
+        if should_update:
+            ledstrip.strip.show()
+            shown = time.perf_counter()
+            for msg_timestamp in self.midi_event_processor.take_unrendered_timestamps():
+                diagnostics.record_latency("midi_in_to_led", shown - msg_timestamp)
+            diagnostics.set_gauge("strip_show_skipped_total", getattr(ledstrip.strip, "skipped_shows", 0))
+            self.update_fps_stats()
+        else:
+            # Clear FPS after short inactivity so UI doesn't show stale values
+            if (time.perf_counter() - self.last_frame_time) > 1.0:
+                ledstrip.current_fps = 0.0
+
+        frame_finished = time.perf_counter()
+        scheduler.frame_done(frame_started, frame_finished)
+        diagnostics.record_duration("render_frame", frame_finished - frame_started)
+        diagnostics.set_gauge("render_target_fps", scheduler.fps)
+        diagnostics.set_gauge("frame_budget_ms", round(scheduler.period * 1000.0, 4))
+        diagnostics.set_gauge("frame_budget_overruns_total", scheduler.overruns)
+        diagnostics.set_gauge("frames_dropped_total", scheduler.dropped_frames)
 
     def update_fps_stats(self):
         now = time.perf_counter()
@@ -281,7 +365,7 @@ class VisualizerApp:
         # Stop screensaver during active use
         if self.state_manager.is_active_use() and menu.screensaver_is_running:
             menu.screensaver_is_running = False
-            menu.show()
+            self.display_worker.request()
             return
         
         # Check if screensaver should start using state manager
@@ -314,10 +398,7 @@ class VisualizerApp:
         # Tick only if menu.scroll_needed is True
         if scroll_needed and screen_on == 1:
             if now - self._last_menu_tick >= tick_interval:
-                try:
-                    menu.update()  # advance cut_count/scroll_hold
-                except Exception as e:
-                    logger.debug(f"menu.update() tick skipped: {e}")
+                self.display_worker.request()  # advance cut_count/scroll_hold
                 self._last_menu_tick = now
 
         # State-based refresh logic
@@ -328,19 +409,35 @@ class VisualizerApp:
             scroll_needed=scroll_needed,
             should_refresh=should_refresh,
         ):
-            menu.show()
+            self.display_worker.request()
 
 
+    def render_menu(self):
+        # Resolve the menu at render time; check_settings_changes may have replaced it.
+        self.ci.menu.show()
+
     def check_color_mode(self, ledsettings):
         if ledsettings.color_mode != self.color_mode_name or ledsettings.incoming_setting_change:
             ledsettings.incoming_setting_change = False
-            self.color_mode = ColorMode(ledsettings.color_mode, ledsettings)
-            self.color_mode_name = ledsettings.color_mode
+            # Name and values from one snapshot, so a web request cannot land in between
+            settings = ledsettings.snapshot()
+            self.color_mode = ColorMode(settings.color_mode, settings)
+            self.color_mode_name = settings.color_mode
             # Reinitialize MIDIEventProcessor and LEDEffectsProcessor with the new color_mode
             self.midi_event_processor.color_mode = self.color_mode
             self.led_effects_processor.color_mode = self.color_mode
             logger.info(f"Color mode changed to {self.color_mode_name}")
 
+        # Recompile the light mode and settings caches only when LED or user settings changed,
+        # from a snapshot (cached per version) rather than the object Flask threads write to
+        settings = ledsettings.snapshot()
+        versions = (settings.version, self.ci.usersettings.version)
+        if versions != self._settings_versions:
+            self._settings_versions = versions
+            light_mode = compile_light_mode(settings)
+            self.midi_event_processor.refresh_settings(light_mode)
+            self.led_effects_processor.light_mode = light_mode
+
     def check_settings_changes(self, usersettings, current_time):
         ci = self.ci
         now = current_time
@@ -348,7 +445,7 @@ class VisualizerApp:
             return
 
         if usersettings.pending_changes:
-            self.color_mode.LoadSettings(ci.ledsettings)
+            self.color_mode.LoadSettings(ci.ledsettings.snapshot())
             usersettings.save_changes()
 
         if usersettings.pending_reset:
@@ -3,6 +3,7 @@ from flask import render_template, request, jsonify
 import os
 
 import time
+from lib.compiled_song_cache import precompile_song_in_background
 from lib.song_file_security import SongFileError, resolve_song_path, validate_song_filename
 
 ALLOWED_EXTENSIONS = {'mid', 'musicxml', 'mxl', 'xml', 'abc'}
@@ -90,4 +91,5 @@ def upload_file():
             return jsonify(success=False, error="file already exists", song_name=filename)
 
         file.save(str(song_path))
+        precompile_song_in_background(filename, base_dir=webinterface.config['UPLOAD_FOLDER'])
         return jsonify(success=True, reload_songs=True, song_name=filename)
@@ -44,6 +44,7 @@ from lib.song_file_security import (
     bundle_prefix,
     is_bundle_main,
     resolve_song_cache_path,
+    resolve_song_compiled_cache_path,
     resolve_song_path,
     validate_song_filename,
 )
@@ -79,16 +80,18 @@ def _song_error(error, status_code=None, **extra):
 
 
 def _rename_song_cache_if_exists(old_name, new_name):
-    old_cache = resolve_song_cache_path(old_name, base_dir=SONGS_DIR)
-    new_cache = resolve_song_cache_path(new_name, base_dir=SONGS_DIR)
-    if old_cache.exists():
-        old_cache.rename(new_cache)
+    for resolve_cache in (resolve_song_cache_path, resolve_song_compiled_cache_path):
+        old_cache = resolve_cache(old_name, base_dir=SONGS_DIR)
+        new_cache = resolve_cache(new_name, base_dir=SONGS_DIR)
+        if old_cache.exists():
+            old_cache.rename(new_cache)
 
 
 def _delete_song_cache_if_exists(song_name):
-    cache_path = resolve_song_cache_path(song_name, base_dir=SONGS_DIR)
-    if cache_path.exists():
-        cache_path.unlink()
+    for resolve_cache in (resolve_song_cache_path, resolve_song_compiled_cache_path):
+        cache_path = resolve_cache(song_name, base_dir=SONGS_DIR)
+        if cache_path.exists():
+            cache_path.unlink()
 
 
 def _sidecar_paths(song_name):
@@ -1236,6 +1239,10 @@ def change_setting():
         value = int(value == 'true')
         app_state.usersettings.change_setting_value("midi_logging", value)
 
+    if setting_name == "baked_led_playback":
+        value = int(value == 'true')
+        app_state.usersettings.change_setting_value("baked_led_playback", value)
+
     if setting_name == "multicolor_iteration":
         value = int(value == 'true')
         app_state.usersettings.change_setting_value("multicolor_iteration", value)